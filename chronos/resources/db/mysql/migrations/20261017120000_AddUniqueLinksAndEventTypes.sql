@@ -0,0 +1,41 @@
+USE darwin;
+
+-- Concurrent consumers insert links and event types with INSERT IGNORE, which relies on these unique indexes.
+-- Duplicates created before them (by racing check-then-insert saves) are removed first, the oldest row is kept.
+-- The script can be run again, e.g. when a consumer inserted a new duplicate before an index was added.
+
+DELETE duplicate
+FROM `links` AS duplicate
+         JOIN `links` AS kept
+              ON kept.`SourceEntityID` = duplicate.`SourceEntityID`
+                  AND kept.`DestinationEntityID` = duplicate.`DestinationEntityID`
+                  AND kept.`LinkID` < duplicate.`LinkID`;
+
+SET @statement = (SELECT IF(COUNT(*) = 0,
+                            'ALTER TABLE `links` ADD UNIQUE INDEX `uid_links_source_destination` (`SourceEntityID`, `DestinationEntityID`)',
+                            'DO 0')
+                  FROM information_schema.STATISTICS
+                  WHERE TABLE_SCHEMA = DATABASE()
+                    AND TABLE_NAME = 'links'
+                    AND INDEX_NAME = 'uid_links_source_destination');
+PREPARE add_index FROM @statement;
+EXECUTE add_index;
+DEALLOCATE PREPARE add_index;
+
+DELETE duplicate
+FROM `event_type` AS duplicate
+         JOIN `event_type` AS kept
+              ON kept.`event_type` = duplicate.`event_type`
+                  AND kept.`severity` = duplicate.`severity`
+                  AND kept.`event_type_id` < duplicate.`event_type_id`;
+
+SET @statement = (SELECT IF(COUNT(*) = 0,
+                            'ALTER TABLE `event_type` ADD UNIQUE INDEX `uid_event_type_event_type_severity` (`event_type`, `severity`)',
+                            'DO 0')
+                  FROM information_schema.STATISTICS
+                  WHERE TABLE_SCHEMA = DATABASE()
+                    AND TABLE_NAME = 'event_type'
+                    AND INDEX_NAME = 'uid_event_type_event_type_severity');
+PREPARE add_index FROM @statement;
+EXECUTE add_index;
+DEALLOCATE PREPARE add_index;
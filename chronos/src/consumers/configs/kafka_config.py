@@ -13,6 +13,9 @@ def get_kafka_config(env: str):
         "auto_offset_reset": "latest",
         "max_poll_records": 1000,
         "max_poll_interval_ms": 60000,
+        "processing_concurrency": 32,
+        "max_in_flight_records": 2000,
+        "ordering": "partition",
         "is_remote_consumer": False,
         "session.timeout.ms": 100000,
         "max.partition.fetch.bytes": 10000000,
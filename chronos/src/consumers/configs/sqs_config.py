@@ -14,7 +14,11 @@ def get_sqs_config(env: str):
             "region": base_config.get("sqs_region"),
             "queue_name": base_config.get("raw_event_queue"),
             "visibility_timeout": 30,
-            "max_messages": 10
+            "max_messages": 10,
+            "wait_time_seconds": 20,
+            "num_receivers": 4,
+            "processing_concurrency": 32,
+            "max_visibility_seconds": 600
         }
     }
 
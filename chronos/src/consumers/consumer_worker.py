@@ -1,7 +1,14 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from loguru import logger
 import os
-from kafka import KafkaConsumer
+from kafka import KafkaConsumer, ConsumerRebalanceListener, TopicPartition
+from kafka.errors import CommitFailedError
+from kafka.structs import OffsetAndMetadata
 
+from src.consumers.offset_tracker import OffsetTracker
 from src.service.queue_event_processor import QueueEventProcessor
 from src.util.client_id_util import get_client_id
 from src.util.ser_des_util import get_ser_des
@@ -17,20 +24,52 @@ SASL_PASSWORD = os.environ.get("SASL_PASSWORD", None)
 SECURITY_PROTOCOL = os.environ.get("SECURITY_PROTOCOL", "PLAINTEXT")
 SASL_MECHANISM = os.environ.get("SASL_MECHANISM")
 
+# records of a partition are processed in offset order, partitions concurrently
+ORDERING_BY_PARTITION = "partition"
+# records with the same kafka key are processed in offset order, keyless records in the order of their partition
+ORDERING_BY_KEY = "key"
+ORDERING_NONE = "none"
+
+
+class _CommitOnRevoke(ConsumerRebalanceListener):
+    """Commits what completed on partitions being revoked, runs inside poll on the polling thread"""
+
+    def __init__(self, worker: "ConsumerWorker"):
+        self.worker = worker
+
+    def on_partitions_revoked(self, revoked):
+        self.worker.commit_completed(revoked)
+        self.worker.offset_tracker.revoke(revoked)
+
+    def on_partitions_assigned(self, assigned):
+        pass
+
 
 class ConsumerWorker:
     def __init__(self, config: dict, env: str):
         # creating a separate logger for individual worker. As they only need to print in stdout or stderr
         self.config = config
 
+        self.offset_tracker = OffsetTracker()
         self.kafka_consumer = None
+        # KafkaConsumer is not thread safe, every call to it runs on this single thread, off the event loop
+        self.kafka_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="kafka-consumer")
         self.create_kafka_consumer()
 
         self.stop_worker = False
         self.poll_timeout_ms = 3000
+        # polls while records are in flight return quicker so completed offsets are committed sooner
+        self.busy_poll_timeout_ms = self.config.get("busy_poll_timeout_ms", 100)
+        self.processing_concurrency = self.config.get("processing_concurrency", 32)
+        self.max_in_flight_records = self.config.get("max_in_flight_records", 1000)
+        self.ordering = self.config.get("ordering", ORDERING_BY_PARTITION)
         self.is_closed = False
         self.event_processor = QueueEventProcessor(env)
 
+        self._semaphore = None
+        self._tasks = set()
+        self._ordering_tails = {}
+
     def create_kafka_consumer(self):
         try:
             self.kafka_consumer = KafkaConsumer(
@@ -51,37 +90,105 @@ class ConsumerWorker:
                 max_partition_fetch_bytes=self.config.get("max.partition.fetch.bytes", 1000000),
                 consumer_timeout_ms=self.config.get("session.timeout.ms", 150000),
             )
-            self.kafka_consumer.subscribe([self.config.get("topic_name")])
+            self.kafka_consumer.subscribe([self.config.get("topic_name")], listener=_CommitOnRevoke(self))
         except Exception as e:
             logger.exception(f"Error while creating kafka consumer : {e}")
             raise e
 
-    async def async_generator(self):
-        # Define the items to iterate over
-        my_list = [1, 2, 3, 4, 5]
-        # Create an infinite loop using an asynchronous generator
-        while True:
-            # Yield each item from the list
-            for item in my_list:
-                yield item
+    async def _call_consumer(self, method, *args, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.kafka_executor, partial(method, *args, **kwargs))
 
     async def run(self) -> None:
+        """
+        Polls off the event loop and processes every polled record as its own task, at most processing_concurrency
+        at a time. Records of the same ordering key wait for the previous one, see ORDERING_BY_PARTITION.
+        Offsets are committed up to the highest contiguous completed record of each partition, and the assigned
+        partitions are paused while max_in_flight_records records are still being processed.
+        """
         logger.info(f"run: {self.config.get('topic_name')}")
+        self._semaphore = asyncio.Semaphore(self.processing_concurrency)
+        paused = False
         try:
-            async for _it in self.async_generator():
-                tp_records_dict = self.kafka_consumer.poll(timeout_ms=self.poll_timeout_ms)
-                if tp_records_dict is None or len(tp_records_dict.items()) == 0:
-                    continue
-                for tp, records in tp_records_dict.items():
+            while not self.stop_worker:
+                in_flight = self.offset_tracker.pending_count
+                if not paused and in_flight >= self.max_in_flight_records:
+                    await self._call_consumer(self._pause_assigned)
+                    paused = True
+                elif paused and in_flight < self.max_in_flight_records:
+                    await self._call_consumer(self._resume_paused)
+                    paused = False
+
+                timeout_ms = self.busy_poll_timeout_ms if in_flight else self.poll_timeout_ms
+                tp_records_dict = await self._call_consumer(self.kafka_consumer.poll, timeout_ms=timeout_ms)
+                for tp, records in (tp_records_dict or {}).items():
                     for record in records:
-                        raw_event_id = record.value['rawEventID']
-                        await self.event_processor.process(raw_event_id)
-
-                self.kafka_consumer.commit()
-                if self.stop_worker:
-                    self.kafka_consumer.close()
-                    self.is_closed = True
-                    break
+                        self._schedule(tp, record)
+
+                # lets the new tasks start before the next blocking poll
+                await asyncio.sleep(0)
+                await self._call_consumer(self.commit_completed)
+
+            if self._tasks:
+                await asyncio.wait(list(self._tasks))
+            await self._call_consumer(self.commit_completed)
+            await self._call_consumer(self.kafka_consumer.close)
+            self.is_closed = True
+            self.kafka_executor.shutdown(wait=False)
         except Exception as e:
             logger.exception(f"Error while running consumer worker! with error : {e}")
             raise e
+
+    def _schedule(self, tp: TopicPartition, record) -> None:
+        generation = self.offset_tracker.add(tp, record.offset)
+        ordering_key = self._ordering_key(tp, record)
+        previous = self._ordering_tails.get(ordering_key) if ordering_key is not None else None
+
+        task = asyncio.ensure_future(self._process_record(tp, record, generation, previous))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        if ordering_key is not None:
+            self._ordering_tails[ordering_key] = task
+            task.add_done_callback(partial(self._release_ordering_key, ordering_key))
+
+    def _ordering_key(self, tp: TopicPartition, record):
+        if self.ordering == ORDERING_BY_KEY and record.key is not None:
+            return tp, record.key
+        if self.ordering in (ORDERING_BY_PARTITION, ORDERING_BY_KEY):
+            # the raw event producer sends keyless records, they must not lose their order
+            return tp
+        return None
+
+    def _release_ordering_key(self, ordering_key, task) -> None:
+        if self._ordering_tails.get(ordering_key) is task:
+            del self._ordering_tails[ordering_key]
+
+    async def _process_record(self, tp: TopicPartition, record, generation: int, previous) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            async with self._semaphore:
+                raw_event_id = record.value['rawEventID']
+                await self.event_processor.process(raw_event_id)
+        except Exception as e:
+            # process already sends failed events to the dlq, this only skips records without a raw event id
+            logger.exception(f"Error processing record {tp.topic}-{tp.partition}@{record.offset} : {e}")
+        finally:
+            self.offset_tracker.complete(tp, record.offset, generation)
+
+    def commit_completed(self, partitions=None) -> None:
+        """Commits the completed offsets of the given or all partitions, must run on the polling thread"""
+        offsets = self.offset_tracker.offsets_to_commit(partitions)
+        if not offsets:
+            return
+        try:
+            self.kafka_consumer.commit({tp: OffsetAndMetadata(offset, None) for tp, offset in offsets.items()})
+            self.offset_tracker.mark_committed(offsets)
+        except CommitFailedError as e:
+            # the group rebalanced, the uncommitted records are delivered again to the new owner
+            logger.warning(f"Failed to commit offsets {offsets} : {e}")
+
+    def _pause_assigned(self) -> None:
+        self.kafka_consumer.pause(*self.kafka_consumer.assignment())
+
+    def _resume_paused(self) -> None:
+        self.kafka_consumer.resume(*self.kafka_consumer.paused())
@@ -0,0 +1,76 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, Hashable, Iterable, Set
+
+
+class OffsetTracker:
+    """
+    Tracks the records of every partition that are being processed out of order and the offset up to which
+    all of them completed, i.e. the offset that is safe to commit.
+
+    Offsets of a partition must be added in increasing order, they can complete in any order.
+    The committable offset of a partition is one past its highest contiguous completed record, so a record that
+    is still being processed holds back the commit of every later record of its partition.
+    Every assignment of a partition is a new generation, completions of records added before the partition was
+    revoked are ignored so they can not move the committable offset of a later assignment.
+    Thread safe, as the rebalance listener reads it from the polling thread.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Hashable, Deque[int]] = {}
+        self._completed: Dict[Hashable, Set[int]] = {}
+        self._committable: Dict[Hashable, int] = {}
+        self._committed: Dict[Hashable, int] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._pending = 0
+
+    @property
+    def pending_count(self) -> int:
+        """records added and not completed yet"""
+        return self._pending
+
+    def add(self, partition: Hashable, offset: int) -> int:
+        """returns the generation of the partition to complete the record with"""
+        with self._lock:
+            self._in_flight.setdefault(partition, deque()).append(offset)
+            self._completed.setdefault(partition, set())
+            self._pending += 1
+            return self._generations.get(partition, 0)
+
+    def complete(self, partition: Hashable, offset: int, generation: int) -> None:
+        with self._lock:
+            in_flight = self._in_flight.get(partition)
+            if in_flight is None or generation != self._generations.get(partition, 0):
+                # the partition was revoked while the record was processed
+                return
+            self._completed[partition].add(offset)
+            self._pending -= 1
+            while in_flight and in_flight[0] in self._completed[partition]:
+                done = in_flight.popleft()
+                self._completed[partition].discard(done)
+                self._committable[partition] = done + 1
+
+    def offsets_to_commit(self, partitions: Iterable[Hashable] = None) -> Dict[Hashable, int]:
+        """committable offsets that moved past the last committed offset, of the given or all partitions"""
+        with self._lock:
+            candidates = self._committable.keys() if partitions is None else partitions
+            return {
+                partition: self._committable[partition]
+                for partition in candidates
+                if partition in self._committable and self._committable[partition] > self._committed.get(partition, -1)
+            }
+
+    def mark_committed(self, offsets: Dict[Hashable, int]) -> None:
+        with self._lock:
+            for partition, offset in offsets.items():
+                self._committed[partition] = max(offset, self._committed.get(partition, -1))
+
+    def revoke(self, partitions: Iterable[Hashable]) -> None:
+        """forgets revoked partitions, their records still in flight no longer count as pending"""
+        with self._lock:
+            for partition in partitions:
+                self._pending -= len(self._in_flight.pop(partition, ())) - len(self._completed.pop(partition, ()))
+                self._committable.pop(partition, None)
+                self._committed.pop(partition, None)
+                self._generations[partition] = self._generations.get(partition, 0) + 1
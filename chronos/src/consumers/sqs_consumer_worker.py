@@ -1,99 +1,168 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from loguru import logger
 import json
 import boto3
+from botocore.config import Config as BotoConfig
 from src.service.queue_event_processor import QueueEventProcessor
 
+# SQS returns at most 10 messages per receive and accepts at most 10 entries per batch call
+SQS_MAX_BATCH_SIZE = 10
+# longest long poll SQS allows
+SQS_MAX_WAIT_TIME_SECONDS = 20
+
 
 class SQSConsumerWorker:
     def __init__(self, config: dict, env: str):
         # creating a separate logger for individual worker. As they only need to print in stdout or stderr
         self.config = config
 
+        self.num_receivers = self.config.get("num_receivers", 4)
+        self.processing_concurrency = self.config.get("processing_concurrency", 32)
+        self.max_messages = min(self.config.get("max_messages", SQS_MAX_BATCH_SIZE), SQS_MAX_BATCH_SIZE)
+        self.wait_time_seconds = min(self.config.get("wait_time_seconds", SQS_MAX_WAIT_TIME_SECONDS), SQS_MAX_WAIT_TIME_SECONDS)
+        self.visibility_timeout = self.config.get("visibility_timeout", 30)
+        # in flight messages get their visibility extended until they were hidden for this long
+        self.max_visibility_seconds = self.config.get("max_visibility_seconds", 600)
+        # boto3 clients are thread safe, blocking calls run here instead of on the event loop
+        self.sqs_executor = ThreadPoolExecutor(max_workers=2 * self.num_receivers + 2, thread_name_prefix="sqs-consumer")
+
         self.sqs_consumer = None
         self.create_sqs_consumer()
 
         self.stop_worker = False
-        self.poll_timeout_ms = 3000
         self.is_closed = False
         self.event_processor = QueueEventProcessor(env)
+        self._semaphore = None
 
     def create_sqs_consumer(self):
         try:
             client_config = {
                 'service_name': 'sqs',
-                'region_name': self.config.get("region", "us-east-1")
+                'region_name': self.config.get("region", "us-east-1"),
+                'config': BotoConfig(max_pool_connections=2 * self.num_receivers + 2),
             }
 
             if self.config.get("endpoint_url"):
                 client_config['endpoint_url'] = self.config.get("endpoint_url")
 
             self.sqs_consumer = boto3.client(**client_config)
-            
+
             # Get queue URL
             queue_name = self.config.get("queue_name")
             response = self.sqs_consumer.get_queue_url(QueueName=queue_name)
             self.queue_url = response['QueueUrl']
-            
+
             logger.info(f"SQS consumer subscribed to queue: {queue_name}")
-            
+
         except Exception as e:
             logger.exception(f"Error while creating SQS consumer : {e}")
             raise e
 
-    async def async_generator(self):
-        # Define the items to iterate over
-        my_list = [1, 2, 3, 4, 5]
-        # Create an infinite loop using an asynchronous generator
-        while True:
-            # Yield each item from the list
-            for item in my_list:
-                yield item
+    async def _call_sqs(self, method, **kwargs):
+        return await asyncio.get_running_loop().run_in_executor(self.sqs_executor, partial(method, **kwargs))
 
     async def run(self) -> None:
+        """
+        Runs num_receivers long-polling receivers, each processes its received batch concurrently (at most
+        processing_concurrency messages across receivers), extends the visibility of messages still being
+        processed and deletes the processed ones with a single batch call.
+        """
         logger.info(f"run: {self.config.get('queue_name')}")
+        self._semaphore = asyncio.Semaphore(self.processing_concurrency)
         try:
-            async for _it in self.async_generator():
-                # Poll SQS queue for messages
-                response = self.sqs_consumer.receive_message(
-                    QueueUrl=self.queue_url,
-                    MaxNumberOfMessages=self.config.get("max_messages", 1000),
-                    WaitTimeSeconds=int(self.poll_timeout_ms / 1000),  # Convert ms to seconds
-                    VisibilityTimeout=self.config.get("visibility_timeout", 30)
-                )
-                
-                messages = response.get('Messages', [])
-                
-                # Check if any messages were received
-                if messages is None or len(messages) == 0:
-                    continue
-                    
-                # Process each message
-                for message in messages:
-                    try:
-                        # Extract raw event ID from message body
-                        body = json.loads(message['Body'])
-                        raw_event_id = body['rawEventID']
-                        await self.event_processor.process(raw_event_id)
-                        
-                        # Delete message after successful processing
-                        self.sqs_consumer.delete_message(
-                            QueueUrl=self.queue_url,
-                            ReceiptHandle=message['ReceiptHandle']
-                        )
-                        
-                    except Exception as e:
-                        logger.exception(f"Error processing SQS message: {e}")
-                        # Message will become visible again after visibility timeout
-
-                if self.stop_worker:
-                    # Mark worker as closed
-                    self.is_closed = True
-                    break
-                    
+            await asyncio.gather(*(self._receive_loop() for _ in range(self.num_receivers)))
+            # Mark worker as closed
+            self.is_closed = True
+            self.sqs_executor.shutdown(wait=False)
         except Exception as e:
             logger.exception(f"Error while running SQS consumer worker! with error : {e}")
             raise e
 
+    async def _receive_loop(self) -> None:
+        while not self.stop_worker:
+            # Long poll SQS queue for messages
+            response = await self._call_sqs(
+                self.sqs_consumer.receive_message,
+                QueueUrl=self.queue_url,
+                MaxNumberOfMessages=self.max_messages,
+                WaitTimeSeconds=self.wait_time_seconds,
+                VisibilityTimeout=self.visibility_timeout
+            )
+            messages = response.get('Messages', [])
+            if messages:
+                await self._process_batch(messages)
+
+    async def _process_batch(self, messages: list) -> None:
+        in_flight = {message['MessageId']: message for message in messages}
+        extender = asyncio.ensure_future(self._extend_visibility(in_flight))
+        try:
+            results = await asyncio.gather(*(self._process_message(message, in_flight) for message in messages))
+        finally:
+            extender.cancel()
+
+        # Delete messages after successful processing, failed ones become visible again after the visibility timeout
+        processed = [message for message, ok in zip(messages, results) if ok]
+        if processed:
+            await self._delete_messages(processed)
+
+    async def _process_message(self, message: dict, in_flight: dict) -> bool:
+        try:
+            async with self._semaphore:
+                # Extract raw event ID from message body
+                body = json.loads(message['Body'])
+                raw_event_id = body['rawEventID']
+                await self.event_processor.process(raw_event_id)
+            return True
+        except Exception as e:
+            logger.exception(f"Error processing SQS message: {e}")
+            return False
+        finally:
+            in_flight.pop(message['MessageId'], None)
+
+    async def _extend_visibility(self, in_flight: dict) -> None:
+        """Keeps messages of a batch hidden while they are processed, up to max_visibility_seconds"""
+        interval = max(self.visibility_timeout / 2, 1)
+        hidden_for = 0
+        while True:
+            await asyncio.sleep(interval)
+            hidden_for += interval
+            if not in_flight or hidden_for + self.visibility_timeout > self.max_visibility_seconds:
+                return
+            entries = [
+                {
+                    'Id': str(i),
+                    'ReceiptHandle': message['ReceiptHandle'],
+                    'VisibilityTimeout': self.visibility_timeout,
+                }
+                for i, message in enumerate(list(in_flight.values()))
+            ]
+            try:
+                response = await self._call_sqs(
+                    self.sqs_consumer.change_message_visibility_batch, QueueUrl=self.queue_url, Entries=entries
+                )
+                for failure in response.get('Failed', []):
+                    logger.warning(f"Failed to extend visibility of SQS message: {failure}")
+            except Exception as e:
+                logger.warning(f"Failed to extend visibility of SQS messages: {e}")
+
+    async def _delete_messages(self, messages: list) -> None:
+        for start in range(0, len(messages), SQS_MAX_BATCH_SIZE):
+            entries = [
+                {'Id': str(i), 'ReceiptHandle': message['ReceiptHandle']}
+                for i, message in enumerate(messages[start:start + SQS_MAX_BATCH_SIZE])
+            ]
+            try:
+                response = await self._call_sqs(
+                    self.sqs_consumer.delete_message_batch, QueueUrl=self.queue_url, Entries=entries
+                )
+                for failure in response.get('Failed', []):
+                    logger.error(f"Failed to delete SQS message, it will be delivered again: {failure}")
+            except Exception as e:
+                logger.exception(f"Failed to delete SQS messages, they will be delivered again: {e}")
+
     def is_worker_closed(self) -> bool:
         """Check if the SQS consumer worker is closed"""
-        return self.is_closed
\ No newline at end of file
+        return self.is_closed
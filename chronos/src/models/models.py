@@ -130,6 +130,8 @@ class Link(models.Model):
 
     class Meta:
         table = "links"
+        # added to existing databases by resources/db/mysql/migrations/20261017120000_AddUniqueLinksAndEventTypes.sql
+        unique_together = (("SourceEntityID", "DestinationEntityID"),)
 
 
 class Entity(models.Model):
@@ -147,3 +149,5 @@ class EventType(models.Model):
 
     class Meta:
         table = "event_type"
+        # added to existing databases by resources/db/mysql/migrations/20261017120000_AddUniqueLinksAndEventTypes.sql
+        unique_together = (("event_type", "severity"),)
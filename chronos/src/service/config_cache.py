@@ -0,0 +1,51 @@
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Tuple
+
+from src.transformers.registry import transformer_registry
+
+CONFIG_CACHE_TTL_SECONDS = float(os.environ.get("CONFIG_CACHE_TTL_SECONDS", 60))
+
+
+class ConfigCache:
+    """
+    Process local cache of the configuration read for every processed event: sources, the ordered transformers
+    of a source and the event types already stored.
+    Entries expire after ttl_seconds so changes made by other processes are picked up, changes made through the
+    source and transformer services of this process invalidate it right away.
+    """
+
+    def __init__(self, ttl_seconds: float = CONFIG_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self._event_types: Dict[Tuple[str, str], float] = {}
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """returns the cached value of key, loading it with loader when missing or expired. Failed loads are not cached"""
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        value = await loader()
+        self._entries[key] = (now + self.ttl_seconds, value)
+        return value
+
+    def unknown_event_types(self, event_types: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+        now = time.monotonic()
+        return [event_type for event_type in event_types if self._event_types.get(event_type, 0) <= now]
+
+    def add_event_types(self, event_types: Iterable[Tuple[str, str]]) -> None:
+        """records event types known to be stored, only call it once the transaction storing them committed"""
+        expires_at = time.monotonic() + self.ttl_seconds
+        for event_type in event_types:
+            self._event_types[event_type] = expires_at
+
+    async def invalidate(self) -> None:
+        """drops every entry along with the transformer instances built from the cached transformers"""
+        self._entries = {}
+        self._event_types = {}
+        await transformer_registry.clear_cache()
+
+
+# Singleton instance of ConfigCache
+config_cache = ConfigCache()
@@ -1,31 +1,135 @@
-from typing import List, Optional
+from typing import Dict, List, Tuple, Type
 
 from src.consumers.configs.config import Config
 from src.dao.stream_writer_factory import get_stream_writer
-from src.dto.schema import LinkCreate, TestEventResponse
-from src.dto.schema.base_transformers import ProcessedEventData, EntityData, RelationData
+from src.dto.schema import TestEventResponse
+from src.dto.schema.base_transformers import EntityData, TransformerOutput
 from src.errors.errors import SourceNotFound, TransformersNotFound
 from src.models.models import RawEvent, Source, Entity, ProcessedEvent, Link, ProcessedEventV2, EventType
+from src.service.config_cache import config_cache
 from src.service.transformers import TransformerService
 from src.transformers.registry import transformer_registry
-import tortoise.exceptions
+from tortoise import connections
+from tortoise.models import Model
+from tortoise.transactions import in_transaction
 from loguru import logger
 
 transformer_service = TransformerService()
 
+UNIQUE_INDEXES_QUERY = """
+    SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX) AS index_columns
+    FROM information_schema.STATISTICS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 0
+    GROUP BY INDEX_NAME
+"""
+LINK_KEY = ("SourceEntityID", "DestinationEntityID")
+EVENT_TYPE_KEY = ("event_type", "severity")
+
+
+class ProcessedRows:
+    """Rows produced by transformers for one or more raw events, persisted together"""
+
+    def __init__(self):
+        self.processed_events: List[dict] = []
+        self.event_types: Dict[Tuple[str, str], None] = {}
+        self.entities: Dict[str, EntityData] = {}
+        self.links: Dict[Tuple[str, str], None] = {}
+
+    def add(self, source_id: int, raw_event_id: int, transformer_id: int, output: TransformerOutput) -> None:
+        for processed_event_data in output.processed_events or []:
+            self.processed_events.append({
+                "RawEventID": raw_event_id,
+                "EventType": processed_event_data.EventType,
+                "EventData": processed_event_data.EventData,
+                "EntityID": processed_event_data.EntityID,
+                "Source_id": source_id,
+                "Transformer_id": transformer_id,
+                "Severity": processed_event_data.Severity,
+                "Message": processed_event_data.Message,
+            })
+            self.event_types[(processed_event_data.EventType, processed_event_data.Severity)] = None
+        for entity_data in output.entities or []:
+            # the first row of an entity wins, existing entities are left as they are
+            if entity_data is not None and entity_data.EntityID not in self.entities:
+                self.entities[entity_data.EntityID] = entity_data
+        for link_data in output.links or []:
+            src = link_data.SourceEntityID
+            destination = link_data.DestinationEntityID
+            if src != destination:
+                self.links[(src, destination)] = None
+                self.links[(destination, src)] = None
+
+    def is_empty(self) -> bool:
+        return not (self.processed_events or self.event_types or self.entities or self.links)
+
+
+class TransformerResult:
+    """Output of one transformer for one raw event"""
+
+    def __init__(self, source_id: int, raw_event_id: int, transformer_id: int, output: TransformerOutput):
+        self.source_id = source_id
+        self.raw_event_id = raw_event_id
+        self.transformer_id = transformer_id
+        self.output = output
+
 
 class EventProcessor:
 
     def __init__(self, env):
         self.config = Config(env)
         self.writer = get_stream_writer(env)
+        # table -> whether it has the unique index the inserts of its rows rely on, looked up once
+        self._unique_indexes: Dict[str, bool] = {}
 
     async def process_event(self, raw_event: RawEvent):
+        await self.process_events([raw_event])
+
+    async def process_events(self, raw_events: List[RawEvent]):
+        """
+        Applies the transformers of their source to the raw events and persists everything they produce,
+        processed events, event types, entities and links, with bulk inserts in a single transaction.
+        When that transaction fails the output of every transformer is saved in its own transaction, so a failing
+        row only loses the output of its transformer.
+        Processed events are written to the processed event destination once their transaction committed.
+        """
+        outputs: List[TransformerResult] = []
+        for raw_event in raw_events:
+            await self._apply_transformers(raw_event, outputs)
+        if len(outputs) == 0:
+            return
+
+        processed_events = None
+        if len(outputs) > 1:
+            try:
+                processed_events = await self._save_outputs(outputs)
+            except Exception as e:
+                logger.warning(f"Failed to save the output of {len(outputs)} transformers together, saving them one by one : {e}")
+        if processed_events is None:
+            processed_events = []
+            for output in outputs:
+                try:
+                    processed_events.extend(await self._save_outputs([output]))
+                except Exception as e:
+                    # TODO mark the event as isProcessed as False or log the error
+                    logger.exception(f"Error processing event {output.raw_event_id} with transformer {output.transformer_id} - {e}")
+        # TODO mark the events as isProcessed as true
+
+        for processed_event in processed_events:
+            try:
+                self.writer.write_record(self.config.get_processed_event_destination, processed_event.to_dict())
+            except Exception as e:
+                logger.exception(f"Failed to write processed event {processed_event.ProcessedEventID} to queue: {e}")
+
+    async def _apply_transformers(self, raw_event: RawEvent, outputs: List[TransformerResult]):
         # Check the source table
-        source = await Source.get(SourceName=raw_event.Source, EventFormatType=raw_event.ContentType)
+        source = await config_cache.get(
+            ("source", raw_event.Source, raw_event.ContentType),
+            lambda: Source.get(SourceName=raw_event.Source, EventFormatType=raw_event.ContentType))
 
         # Get applicable transformers
-        transformers = await transformer_service.get_all_transformers_by_source(source.SourceID)
+        transformers = await config_cache.get(
+            ("transformers", source.SourceID),
+            lambda: transformer_service.get_all_transformers_by_source(source.SourceID))
 
         for transformer in transformers:
             try:
@@ -34,100 +138,119 @@ class EventProcessor:
 
                 if processed_event_data is None:
                     continue
-                event_types = [
-                    {
-                        "event_type": event.EventType,
-                        "severity": event.Severity
-                    } for event in processed_event_data.processed_events
-                ]
-
-                await self._save_event_data(
-                    source.SourceID,
-                    raw_event.RawEventID,
-                    transformer.TransformerID,
-                    processed_event_data.processed_events)
-                await self._save_event_types(event_types)
-                await self._save_entities(processed_event_data.entities)
-                await self._save_links(processed_event_data.links)
-                # TODO mark the event as isProcessed as true
+                outputs.append(TransformerResult(source.SourceID, raw_event.RawEventID, transformer.TransformerID,
+                                                 processed_event_data))
             except Exception as e:
                 # TODO mark the event as isProcessed as False or log the error
                 logger.exception(f"Error processing event {raw_event.RawEventID} with transformer {transformer.TransformerID} - {e}")
 
-    async def _save_event_types(self, event_types: List[EventType]):
-        if (event_types is None) or (len(event_types) == 0):
-            return
-        for event_type in event_types:
-            try:
-                await EventType.get_or_create(**event_type)
-            except Exception as e:
-                logger.exception(f"Error saving event types - {event_types} : {e}")
+    async def _save_outputs(self, outputs: List[TransformerResult]) -> List[ProcessedEvent]:
+        rows = ProcessedRows()
+        for output in outputs:
+            rows.add(output.source_id, output.raw_event_id, output.transformer_id, output.output)
+        if rows.is_empty():
+            return []
+
+        async with in_transaction("default") as connection:
+            processed_events = await self._save_event_data(rows.processed_events, connection)
+            event_types = await self._save_event_types(list(rows.event_types), connection)
+            await self._save_entities(list(rows.entities.values()), connection)
+            await self._save_links(list(rows.links), connection)
+        config_cache.add_event_types(event_types)
+        await self._remove_duplicates(EventType, EVENT_TYPE_KEY, event_types)
+        await self._remove_duplicates(Link, LINK_KEY, list(rows.links))
+        return processed_events
 
-    async def _save_event_data(self, source_id: int, raw_event_id: int, transformer_id: int,
-                               processed_data: Optional[List[ProcessedEventData]]):
-        if (processed_data is None) or (len(processed_data) == 0):
+    async def _save_event_data(self, processed_events: List[dict], connection) -> List[ProcessedEvent]:
+        if len(processed_events) == 0:
+            return []
+        await ProcessedEventV2.bulk_create(
+            [ProcessedEventV2(**processed_event) for processed_event in processed_events], using_db=connection)
+        # inserted one by one as bulk inserts do not return the generated ids, which are published
+        return [await ProcessedEvent.create(**processed_event, using_db=connection)
+                for processed_event in processed_events]
+
+    async def _save_event_types(self, event_types: List[Tuple[str, str]], connection) -> List[Tuple[str, str]]:
+        """stores the event types not stored yet, returns the ones that were looked up"""
+        # event types without a severity can not be stored
+        event_types = [(event_type, severity) for event_type, severity in event_types if severity is not None]
+        # event types are never deleted, the ones seen recently are known to be stored
+        event_types = config_cache.unknown_event_types(event_types)
+        if len(event_types) == 0:
+            return []
+        existing = set(await EventType.filter(event_type__in=list({event_type for event_type, _ in event_types}))
+                       .using_db(connection).values_list("event_type", "severity"))
+        missing = [EventType(event_type=event_type, severity=severity)
+                   for event_type, severity in event_types if (event_type, severity) not in existing]
+        if missing:
+            # a concurrent insert of the same event type is ignored through the unique constraint,
+            # on databases missing it the duplicate is removed once committed, see _remove_duplicates
+            await EventType.bulk_create(missing, ignore_conflicts=True, using_db=connection)
+        return event_types
+
+    async def _save_entities(self, entities: List[EntityData], connection):
+        if len(entities) == 0:
             return
+        await Entity.bulk_create([Entity(**entity_data.dict()) for entity_data in entities],
+                                 ignore_conflicts=True, using_db=connection)
 
-        for processed_event_data in processed_data:
-            try:
-                await ProcessedEventV2.create(
-                    RawEventID=raw_event_id,
-                    EventType=processed_event_data.EventType,
-                    EventData=processed_event_data.EventData,
-                    EntityID=processed_event_data.EntityID,
-                    Source_id=source_id,
-                    Transformer_id=transformer_id,
-                    Severity=processed_event_data.Severity,
-                    Message=processed_event_data.Message
-                )
-
-                processed_event = await ProcessedEvent.create(
-                    RawEventID=raw_event_id,
-                    EventType=processed_event_data.EventType,
-                    EventData=processed_event_data.EventData,
-                    EntityID=processed_event_data.EntityID,
-                    Source_id=source_id,
-                    Transformer_id=transformer_id,
-                    Severity=processed_event_data.Severity,
-                    Message=processed_event_data.Message
-                )
-                try:
-                    self.writer.write_record(self.config.get_processed_event_destination, processed_event.to_dict())
-                except Exception as e:
-                    logger.exception(f"Failed to write processed event {processed_event.ProcessedEventID} to queue: {e}")
-            except Exception as e:
-                logger.exception(f"Failed to save event data : {e}")
+    async def _save_links(self, links: List[Tuple[str, str]], connection):
+        if len(links) == 0:
+            return
+        existing = set(await Link.filter(SourceEntityID__in=list({src for src, _ in links}),
+                                         DestinationEntityID__in=list({destination for _, destination in links}))
+                       .using_db(connection).values_list("SourceEntityID", "DestinationEntityID"))
+        missing = [Link(SourceEntityID=src, DestinationEntityID=destination)
+                   for src, destination in links if (src, destination) not in existing]
+        if missing:
+            # a concurrent insert of the same link is ignored through the unique constraint,
+            # on databases missing it the duplicate is removed once committed, see _remove_duplicates
+            await Link.bulk_create(missing, ignore_conflicts=True, using_db=connection)
 
-    async def _save_entities(self, entities: Optional[List[EntityData]]):
-        if (entities is None) or (len(entities) == 0):
+    async def _remove_duplicates(self, model: Type[Model], key: Tuple[str, str], values: List[Tuple[str, str]]):
+        """
+        Keeps only the oldest row of every key in values, for tables still missing the unique index on the key
+        (see resources/db/mysql/migrations). Runs after the inserting transaction committed and reads from the
+        master, so of two events inserting the same key concurrently the one committing last sees both rows.
+        """
+        if len(values) == 0 or await self._has_unique_index(model._meta.db_table, key):
             return
-        for entity_data in entities:
-            try:
-                if entity_data is None:
+        try:
+            connection = connections.get("default")
+            rows = await model.filter(**{f"{key[0]}__in": list({value[0] for value in values}),
+                                         f"{key[1]}__in": list({value[1] for value in values})}) \
+                .using_db(connection).values_list(model._meta.pk_attr, *key)
+            wanted = set(values)
+            kept = set()
+            duplicates = []
+            for row in sorted(rows):
+                row_key = tuple(row[1:])
+                if row_key not in wanted:
                     continue
-                try:
-                    # First try to get the entity
-                    await Entity.get(EntityID=entity_data.EntityID)
-                except tortoise.exceptions.DoesNotExist:
-                    # If it doesn't exist, try to create it
-                    await Entity.create(**entity_data.dict())
-            except Exception as e:
-                logger.exception(f"Failed to save entities: {e}")
+                if row_key in kept:
+                    duplicates.append(row[0])
+                else:
+                    kept.add(row_key)
+            if duplicates:
+                logger.info(f"Removing {len(duplicates)} duplicate rows of {model._meta.db_table}")
+                await model.filter(pk__in=duplicates).using_db(connection).delete()
+        except Exception as e:
+            # the rows are committed, a duplicate left behind is removed by the next event storing the same key
+            logger.warning(f"Failed to remove duplicate rows of {model._meta.db_table} : {e}")
 
-    async def _save_links(self, links: Optional[List[RelationData]]):
-        if (links is None) or (len(links) == 0):
-            return
-        for link_data in links:
-            src = link_data.SourceEntityID
-            destination = link_data.DestinationEntityID
-            if src != destination:
-                try:
-                    right = LinkCreate(**link_data.dict())
-                    left = LinkCreate(DestinationEntityID=src, SourceEntityID=destination)
-                    await Link.get_or_create(**right.dict())
-                    await Link.get_or_create(**left.dict())
-                except Exception as e:
-                    logger.exception(f"Failed to save links: {e}")
+    async def _has_unique_index(self, table: str, columns: Tuple[str, ...]) -> bool:
+        if table not in self._unique_indexes:
+            connection = connections.get("default")
+            if connection.capabilities.dialect != "mysql":
+                # other databases are only used with schemas generated from the models, which declare the index
+                self._unique_indexes[table] = True
+            else:
+                _, rows = await connection.execute_query(UNIQUE_INDEXES_QUERY, [table])
+                self._unique_indexes[table] = any(tuple(row["index_columns"].split(",")) == columns for row in rows)
+                if not self._unique_indexes[table]:
+                    logger.warning(f"Table {table} has no unique index on {columns}, duplicates of concurrent inserts "
+                                   f"are removed after commit until the chronos migrations are applied")
+        return self._unique_indexes[table]
 
     async def test_event(self, raw_event: RawEvent) -> List[TestEventResponse]:
         # Check the source table
@@ -1,5 +1,6 @@
 from src.dto.schema.source import SourceCreate, SourceUpdate
 from src.models.models import Source
+from src.service.config_cache import config_cache
 
 
 class SourceService:
@@ -14,11 +15,13 @@ class SourceService:
         source_obj = await Source.get(SourceID=source_id)
         await source_obj.update_from_dict(source.dict())
         await source_obj.save()
+        await config_cache.invalidate()
         return source_obj
 
     async def delete_source(self, source_id: int):
         source_obj = await Source.get(SourceID=source_id)
         await source_obj.delete()
+        await config_cache.invalidate()
         return source_obj
 
     async def get_all_sources(self):
@@ -10,11 +10,18 @@ from src.dto.schema.transformer import (
 )
 from src.models.models import JSONTransformer, Transformer, Source
 from src.models.models import PythonTransformer
+from src.service.config_cache import config_cache
 
 
 class TransformerService:
-    @atomic("default")
     async def create_transformer(self, transformer: Union[JSONTransformerCreate, PythonTransformerCreate]):
+        response = await self._create_transformer(transformer)
+        # invalidated once committed, a reload in between would cache the transformers without the new one
+        await config_cache.invalidate()
+        return response
+
+    @atomic("default")
+    async def _create_transformer(self, transformer: Union[JSONTransformerCreate, PythonTransformerCreate]):
         source = await Source.get(SourceID=transformer.SourceID)
 
         transformer_obj = await Transformer.create(
@@ -121,6 +128,7 @@ class TransformerService:
         if existing_transformer:
             await existing_transformer.update_from_dict(transformer.dict())
             await existing_transformer.save()
+            await config_cache.invalidate()
             return JSONTransformerResponse(
                 TransformerID=existing_transformer.Transformer.TransformerID,
                 TransformerName=existing_transformer.Transformer.TransformerName,
@@ -144,6 +152,7 @@ class TransformerService:
         if existing_transformer:
             await existing_transformer.update_from_dict(transformer.dict())
             await existing_transformer.save()
+            await config_cache.invalidate()
             return PythonTransformerResponse(
                 TransformerID=existing_transformer.Transformer.TransformerID,
                 TransformerName=existing_transformer.Transformer.TransformerName,
@@ -161,6 +170,7 @@ class TransformerService:
             'Transformer')
         if transformer:
             await transformer.delete()
+            await config_cache.invalidate()
             return JSONTransformerResponse(
                 TransformerID=transformer.Transformer.TransformerID,
                 TransformerName=transformer.Transformer.TransformerName,
@@ -183,6 +193,7 @@ class TransformerService:
             'Transformer')
         if transformer:
             await transformer.delete()
+            await config_cache.invalidate()
             return PythonTransformerResponse(
                 TransformerID=transformer.Transformer.TransformerID,
                 TransformerName=transformer.Transformer.TransformerName,
@@ -1,4 +1,8 @@
-import importlib
+import hashlib
+import importlib.util
+import os
+from types import ModuleType
+from typing import Dict, Tuple
 
 from src.dto.schema import RawEvent
 from src.dto.schema.base_transformers import TransformerOutput
@@ -6,6 +10,36 @@ from src.transformers.base_python_transformer import BasePythonTransformer
 from src.transformers.registry import register_transformer
 from src.transformers.transformers import TransformerStrategy
 
+# script path -> (mtime and size of the loaded script, sha256 of its content, module)
+_module_cache: Dict[str, Tuple[Tuple[int, int], str, ModuleType]] = {}
+
+
+def load_transformer_module(script_path: str) -> ModuleType:
+    """
+    Returns the module of a transformer script, compiled and executed only when its content changed since it
+    was last loaded. The script is read again only when its modification time or size changed.
+    """
+    stat = os.stat(script_path)
+    file_version = (stat.st_mtime_ns, stat.st_size)
+    cached = _module_cache.get(script_path)
+    if cached is not None and cached[0] == file_version:
+        return cached[2]
+
+    with open(script_path, "rb") as script:
+        source = script.read()
+    content_hash = hashlib.sha256(source).hexdigest()
+    if cached is not None and cached[1] == content_hash:
+        # touched but not changed
+        _module_cache[script_path] = (file_version, content_hash, cached[2])
+        return cached[2]
+
+    spec = importlib.util.spec_from_file_location("transformer_script", script_path)
+    transformer_module = importlib.util.module_from_spec(spec)
+    # executes the content that was hashed, the file may have changed again since it was read
+    exec(compile(source, script_path, "exec"), transformer_module.__dict__)
+    _module_cache[script_path] = (file_version, content_hash, transformer_module)
+    return transformer_module
+
 
 @register_transformer('PythonTransformer')
 class PythonTransformer(TransformerStrategy):
@@ -15,11 +49,14 @@ class PythonTransformer(TransformerStrategy):
         self.class_name = transformer_record.ClassName
         self.function_name = "transform"
         self.eligible_function_name = "is_transformer_applicable"
+        self._module = None
+        self._transformer_instance = None
+
+    def _get_transformer_instance(self) -> BasePythonTransformer:
+        transformer_module = load_transformer_module(self.script_path)
+        if transformer_module is self._module:
+            return self._transformer_instance
 
-    async def apply(self, raw_event: RawEvent) -> TransformerOutput:
-        spec = importlib.util.spec_from_file_location("transformer_script", self.script_path)
-        transformer_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(transformer_module)
         transformer_class = getattr(transformer_module, self.class_name)
         transformer_instance = transformer_class()
 
@@ -27,6 +64,13 @@ class PythonTransformer(TransformerStrategy):
         if not isinstance(transformer_instance, BasePythonTransformer):
             raise TypeError(f"{self.class_name} must extend BasePythonTransformer")
 
+        self._module = transformer_module
+        self._transformer_instance = transformer_instance
+        return transformer_instance
+
+    async def apply(self, raw_event: RawEvent) -> TransformerOutput:
+        transformer_instance = self._get_transformer_instance()
+
         # Call the transform function
         transform_function = getattr(transformer_instance, self.function_name)
         is_transformation_eligible_func = getattr(transformer_instance, self.eligible_function_name)
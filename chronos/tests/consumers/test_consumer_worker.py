@@ -0,0 +1,201 @@
+import asyncio
+
+import pytest
+from kafka import TopicPartition
+from kafka.consumer.fetcher import ConsumerRecord
+
+from src.consumers import consumer_worker
+from src.consumers.consumer_worker import ConsumerWorker, ORDERING_BY_KEY, ORDERING_NONE
+from src.consumers.offset_tracker import OffsetTracker
+
+TP0 = TopicPartition("raw-events", 0)
+TP1 = TopicPartition("raw-events", 1)
+
+
+def _record(tp, offset, raw_event_id, key=None):
+    return ConsumerRecord(tp.topic, tp.partition, offset, 0, 0, key, {"rawEventID": raw_event_id}, [], None, -1, -1, -1)
+
+
+class FakeKafkaConsumer:
+    def __init__(self, batches, worker):
+        self.batches = list(batches)
+        self.worker = worker
+        self.commits = []
+        self.closed = False
+
+    def poll(self, timeout_ms=0):
+        if self.batches:
+            return self.batches.pop(0)
+        if self.worker.offset_tracker.pending_count == 0:
+            self.worker.stop_worker = True
+        return {}
+
+    def commit(self, offsets):
+        self.commits.append({tp: meta.offset for tp, meta in offsets.items()})
+
+    def assignment(self):
+        return {TP0, TP1}
+
+    def paused(self):
+        return set()
+
+    def pause(self, *partitions):
+        pass
+
+    def resume(self, *partitions):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEventProcessor:
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+        self.finished = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def process(self, raw_event_id):
+        self.started.append(raw_event_id)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delays.get(raw_event_id, 0))
+        self.in_flight -= 1
+        self.finished.append(raw_event_id)
+        return raw_event_id
+
+
+@pytest.fixture
+def make_worker(monkeypatch):
+    monkeypatch.setattr(ConsumerWorker, "create_kafka_consumer", lambda self: None)
+    monkeypatch.setattr(consumer_worker, "QueueEventProcessor", lambda env: None)
+
+    def make(batches, delays, **config):
+        worker = ConsumerWorker({"topic_name": "raw-events", **config}, "local")
+        worker.kafka_consumer = FakeKafkaConsumer(batches, worker)
+        worker.event_processor = FakeEventProcessor(delays)
+        return worker
+
+    return make
+
+
+class TestOffsetTracker:
+
+    def test_commits_only_contiguous_completed_offsets(self):
+        tracker = OffsetTracker()
+        for offset in (10, 11, 12):
+            tracker.add(TP0, offset)
+
+        tracker.complete(TP0, 11, 0)
+        assert tracker.offsets_to_commit() == {}
+
+        tracker.complete(TP0, 10, 0)
+        assert tracker.offsets_to_commit() == {TP0: 12}
+        tracker.mark_committed({TP0: 12})
+        assert tracker.offsets_to_commit() == {}
+        assert tracker.pending_count == 1
+
+        tracker.complete(TP0, 12, 0)
+        assert tracker.offsets_to_commit() == {TP0: 13}
+        assert tracker.pending_count == 0
+
+    def test_revoke_forgets_partition(self):
+        tracker = OffsetTracker()
+        generation = tracker.add(TP0, 1)
+        tracker.add(TP0, 2)
+        tracker.add(TP1, 5)
+        tracker.complete(TP0, 2, generation)
+
+        tracker.revoke([TP0])
+        tracker.complete(TP0, 1, generation)
+
+        assert tracker.pending_count == 1
+        assert tracker.offsets_to_commit() == {}
+
+    def test_ignores_completions_from_before_partition_was_reassigned(self):
+        tracker = OffsetTracker()
+        old_generation = tracker.add(TP0, 1)
+        tracker.add(TP0, 2)
+        tracker.revoke([TP0])
+
+        # re-assigned, the records not committed are delivered again
+        new_generation = tracker.add(TP0, 1)
+        tracker.add(TP0, 2)
+        tracker.complete(TP0, 1, old_generation)
+        tracker.complete(TP0, 2, old_generation)
+
+        assert new_generation != old_generation
+        assert tracker.pending_count == 2
+        assert tracker.offsets_to_commit() == {}
+
+        tracker.complete(TP0, 1, new_generation)
+        assert tracker.offsets_to_commit() == {TP0: 2}
+        assert tracker.pending_count == 1
+
+
+class TestConsumerWorker:
+
+    async def test_processes_batch_concurrently_and_commits_highest_contiguous(self, make_worker):
+        batch = {
+            TP0: [_record(TP0, 0, 1), _record(TP0, 1, 2), _record(TP0, 2, 3)],
+            TP1: [_record(TP1, 7, 4)],
+        }
+        worker = make_worker([batch], {1: 0.05, 2: 0.01, 3: 0.01, 4: 0.01}, processing_concurrency=4,
+                             ordering=ORDERING_NONE)
+
+        await worker.run()
+
+        assert worker.event_processor.max_in_flight == 4
+        assert sorted(worker.event_processor.finished) == [1, 2, 3, 4]
+        committed = {}
+        for commit in worker.kafka_consumer.commits:
+            assert all(offset > committed.get(tp, -1) for tp, offset in commit.items())
+            committed.update(commit)
+        assert committed == {TP0: 3, TP1: 8}
+        assert worker.kafka_consumer.closed and worker.is_closed
+
+    async def test_keeps_order_of_records_with_same_key(self, make_worker):
+        batch = {TP0: [_record(TP0, 0, 1, key="pod-a"), _record(TP0, 1, 2, key="pod-b"), _record(TP0, 2, 3, key="pod-a")]}
+        worker = make_worker([batch], {1: 0.05, 2: 0.0, 3: 0.0}, processing_concurrency=4, ordering=ORDERING_BY_KEY)
+
+        await worker.run()
+
+        finished = worker.event_processor.finished
+        assert finished.index(2) < finished.index(1) < finished.index(3)
+
+    async def test_keeps_order_of_keyless_records_of_a_partition(self, make_worker):
+        # the raw event producer sends records without a key
+        batch = {
+            TP0: [_record(TP0, 0, 1), _record(TP0, 1, 2), _record(TP0, 2, 3)],
+            TP1: [_record(TP1, 0, 4)],
+        }
+        for ordering in (None, ORDERING_BY_KEY):
+            config = {"processing_concurrency": 4} if ordering is None else {"processing_concurrency": 4, "ordering": ordering}
+            worker = make_worker([batch], {1: 0.05, 2: 0.01, 3: 0.0, 4: 0.0}, **config)
+
+            await worker.run()
+
+            finished = worker.event_processor.finished
+            assert finished.index(1) < finished.index(2) < finished.index(3)
+            # partitions are still processed concurrently
+            assert finished.index(4) < finished.index(1)
+
+    async def test_concurrency_is_capped(self, make_worker):
+        batch = {TP0: [_record(TP0, offset, offset) for offset in range(10)]}
+        worker = make_worker([batch], {}, processing_concurrency=3, ordering=ORDERING_NONE)
+
+        await worker.run()
+
+        assert worker.event_processor.max_in_flight <= 3
+        assert len(worker.event_processor.finished) == 10
+
+    async def test_record_without_raw_event_id_is_skipped_and_committed(self, make_worker):
+        bad = ConsumerRecord(TP0.topic, 0, 0, 0, 0, None, {"error": "bad json"}, [], None, -1, -1, -1)
+        worker = make_worker([{TP0: [bad, _record(TP0, 1, 2)]}], {})
+
+        await worker.run()
+
+        assert worker.event_processor.finished == [2]
+        assert worker.kafka_consumer.commits[-1] == {TP0: 2}
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+import pytest
+
+from src.consumers import sqs_consumer_worker
+from src.consumers.sqs_consumer_worker import SQSConsumerWorker
+
+
+def _message(raw_event_id):
+    return {"MessageId": f"m{raw_event_id}", "ReceiptHandle": f"r{raw_event_id}", "Body": json.dumps({"rawEventID": raw_event_id})}
+
+
+class FakeSqsClient:
+    def __init__(self, batches, worker):
+        self.batches = list(batches)
+        self.worker = worker
+        self.receive_calls = []
+        self.deleted = []
+        self.delete_calls = 0
+        self.extended = []
+
+    def receive_message(self, **kwargs):
+        self.receive_calls.append(kwargs)
+        if self.batches:
+            return {"Messages": self.batches.pop(0)}
+        self.worker.stop_worker = True
+        return {}
+
+    def delete_message_batch(self, QueueUrl, Entries):
+        self.delete_calls += 1
+        self.deleted.extend(entry["ReceiptHandle"] for entry in Entries)
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+    def change_message_visibility_batch(self, QueueUrl, Entries):
+        self.extended.extend(entry["ReceiptHandle"] for entry in Entries)
+        return {"Successful": [{"Id": entry["Id"]} for entry in Entries]}
+
+
+class FakeEventProcessor:
+    def __init__(self, delays):
+        self.delays = delays
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def process(self, raw_event_id):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(self.delays.get(raw_event_id, 0))
+        self.in_flight -= 1
+        return raw_event_id
+
+
+@pytest.fixture
+def make_worker(monkeypatch):
+    monkeypatch.setattr(SQSConsumerWorker, "create_sqs_consumer", lambda self: None)
+    monkeypatch.setattr(sqs_consumer_worker, "QueueEventProcessor", lambda env: None)
+
+    def make(batches, delays, **config):
+        worker = SQSConsumerWorker({"queue_name": "raw", **config}, "local")
+        worker.queue_url = "queue-url"
+        worker.sqs_consumer = FakeSqsClient(batches, worker)
+        worker.event_processor = FakeEventProcessor(delays)
+        return worker
+
+    return make
+
+
+class TestSQSConsumerWorker:
+
+    async def test_long_polls_capped_batches_and_deletes_in_one_call(self, make_worker):
+        worker = make_worker([[_message(i) for i in range(10)]], {}, num_receivers=1, max_messages=1000)
+
+        await worker.run()
+
+        assert worker.sqs_consumer.receive_calls[0]["MaxNumberOfMessages"] == 10
+        assert worker.sqs_consumer.receive_calls[0]["WaitTimeSeconds"] == 20
+        assert worker.event_processor.max_in_flight == 10
+        assert worker.sqs_consumer.delete_calls == 1
+        assert sorted(worker.sqs_consumer.deleted) == sorted(f"r{i}" for i in range(10))
+        assert worker.is_worker_closed()
+
+    async def test_failed_message_is_not_deleted(self, make_worker):
+        bad = {"MessageId": "bad", "ReceiptHandle": "r-bad", "Body": "not json"}
+        worker = make_worker([[_message(1), bad]], {}, num_receivers=1)
+
+        await worker.run()
+
+        assert worker.sqs_consumer.deleted == ["r1"]
+
+    async def test_extends_visibility_of_slow_messages(self, make_worker):
+        worker = make_worker([[_message(1), _message(2)]], {1: 1.3}, num_receivers=1, visibility_timeout=2)
+
+        await worker.run()
+
+        assert worker.sqs_consumer.extended == ["r1"]
+        assert sorted(worker.sqs_consumer.deleted) == ["r1", "r2"]
@@ -0,0 +1,153 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from tortoise import Tortoise
+
+from src.dto.schema.base_transformers import EntityData, ProcessedEventData, RelationData, TransformerOutput
+from src.models.models import Entity, EventType, Link, ProcessedEvent, ProcessedEventV2, RawEvent, Source, Transformer
+from src.service.config_cache import config_cache
+from src.service.event_processor_service import EventProcessor, transformer_service
+
+
+@pytest.fixture
+async def db():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["src.models.models"]})
+    await Tortoise.generate_schemas()
+    await config_cache.invalidate()
+    yield
+    await Tortoise.close_connections()
+
+
+def _output(entity_id, event_type, severity="info", links=()):
+    return TransformerOutput(
+        processed_events=[ProcessedEventData(EventType=event_type, EntityID=entity_id, EventData={"id": entity_id},
+                                             Severity=severity, Message="message")],
+        entities=[EntityData(EntityID=entity_id, EntityType="pod")],
+        links=[RelationData(SourceEntityID=src, DestinationEntityID=dst) for src, dst in links],
+    )
+
+
+@pytest.fixture
+async def processor(db):
+    source = await Source.create(SourceName="k8s", Description="", EventFormatType="application/json")
+    transformer = await Transformer.create(TransformerName="pods", TransformerType="python", Description="",
+                                           Source=source, ProcessType="async")
+    with patch("src.service.event_processor_service.get_stream_writer", return_value=MagicMock()), \
+            patch("src.service.event_processor_service.Config"):
+        event_processor = EventProcessor("local")
+    with patch("src.service.event_processor_service.transformer_service.get_all_transformers_by_source",
+               AsyncMock(return_value=[transformer])):
+        yield event_processor
+
+
+def _raw_event(raw_event_id):
+    return RawEvent(RawEventID=raw_event_id, Source="k8s", ContentType="application/json", EventData=b"{}")
+
+
+async def _process(event_processor, raw_events, outputs):
+    transformer_class = MagicMock()
+    transformer_class.apply = AsyncMock(side_effect=outputs)
+    with patch("src.service.event_processor_service.transformer_registry.get_transformer",
+               AsyncMock(return_value=transformer_class)):
+        await event_processor.process_events(raw_events)
+
+
+async def test_persists_rows_of_a_batch_and_publishes_processed_events(processor):
+    await _process(processor, [_raw_event(1), _raw_event(2)], [
+        _output("pod-a", "POD_CREATED", links=[("pod-a", "node-1")]),
+        _output("pod-b", "POD_CREATED", links=[("pod-b", "node-1"), ("node-1", "pod-b")]),
+    ])
+
+    assert await ProcessedEvent.all().count() == 2
+    assert await ProcessedEventV2.all().count() == 2
+    assert sorted(await Entity.all().values_list("EntityID", flat=True)) == ["pod-a", "pod-b"]
+    assert await EventType.all().values_list("event_type", "severity") == [("POD_CREATED", "info")]
+    assert sorted(await Link.all().values_list("SourceEntityID", "DestinationEntityID")) == [
+        ("node-1", "pod-a"), ("node-1", "pod-b"), ("pod-a", "node-1"), ("pod-b", "node-1")]
+
+    published = [call.args[1] for call in processor.writer.write_record.call_args_list]
+    assert [record["RawEventID"] for record in published] == [1, 2]
+    assert all(record["ProcessedEventID"] is not None for record in published)
+
+
+async def test_reprocessing_does_not_duplicate_entities_event_types_or_links(processor):
+    await _process(processor, [_raw_event(1)], [_output("pod-a", "POD_CREATED", links=[("pod-a", "node-1")])])
+    processor.writer.write_record.reset_mock()
+
+    await _process(processor, [_raw_event(1)], [_output("pod-a", "POD_CREATED", links=[("pod-a", "node-1")])])
+
+    assert await ProcessedEvent.all().count() == 2
+    assert await Entity.all().count() == 1
+    assert await EventType.all().count() == 1
+    assert await Link.all().count() == 2
+    published = [call.args[1] for call in processor.writer.write_record.call_args_list]
+    assert len(published) == 1
+    assert published[0]["ProcessedEventID"] == max(await ProcessedEvent.all().values_list("ProcessedEventID", flat=True))
+
+
+async def test_source_transformers_and_event_types_are_cached_until_invalidated(processor):
+    loader = transformer_service.get_all_transformers_by_source
+    await _process(processor, [_raw_event(1)], [_output("pod-a", "POD_CREATED")])
+    await Source.filter(SourceName="k8s").update(Description="changed")
+    await EventType.all().delete()
+
+    await _process(processor, [_raw_event(2)], [_output("pod-a", "POD_CREATED")])
+    assert loader.await_count == 1
+    # known event types are not looked up again
+    assert await EventType.all().count() == 0
+
+    await config_cache.invalidate()
+    await _process(processor, [_raw_event(3)], [_output("pod-a", "POD_CREATED")])
+    assert loader.await_count == 2
+    assert await EventType.all().count() == 1
+
+
+async def test_failing_output_only_loses_the_rows_of_its_transformer(processor):
+    save_entities = EventProcessor._save_entities
+
+    async def failing_save_entities(self, entities, connection):
+        if any(entity.EntityID == "pod-bad" for entity in entities):
+            raise ValueError("bad entity")
+        await save_entities(self, entities, connection)
+
+    with patch.object(EventProcessor, "_save_entities", failing_save_entities):
+        await _process(processor, [_raw_event(1), _raw_event(2)], [
+            _output("pod-a", "POD_CREATED", links=[("pod-a", "node-1")]),
+            _output("pod-bad", "POD_CREATED", links=[("pod-bad", "node-1")]),
+        ])
+
+    assert await ProcessedEvent.all().values_list("RawEventID", flat=True) == [1]
+    assert await ProcessedEventV2.all().values_list("RawEventID", flat=True) == [1]
+    assert await Entity.all().values_list("EntityID", flat=True) == ["pod-a"]
+    assert await Link.all().count() == 2
+    published = [call.args[1] for call in processor.writer.write_record.call_args_list]
+    assert [record["RawEventID"] for record in published] == [1]
+
+
+async def test_removes_duplicates_of_racing_inserts_when_the_unique_indexes_are_missing(processor):
+    # tables of a database created before the unique indexes, see resources/db/mysql/migrations
+    await Tortoise.get_connection("default").execute_script("""
+        DROP TABLE "links";
+        CREATE TABLE "links" ("LinkID" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, "SourceEntityID" VARCHAR(255) NOT NULL,
+                              "DestinationEntityID" VARCHAR(255) NOT NULL, "CreatedAt" TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP);
+        DROP TABLE "event_type";
+        CREATE TABLE "event_type" ("event_type_id" INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL,
+                                   "event_type" VARCHAR(50) NOT NULL, "severity" VARCHAR(50) NOT NULL);
+    """)
+    processor._unique_indexes = {"links": False, "event_type": False}
+    # rows a concurrent event inserted before this one committed
+    kept_link = await Link.create(SourceEntityID="pod-a", DestinationEntityID="node-1")
+    await Link.create(SourceEntityID="pod-a", DestinationEntityID="node-1")
+    kept_event_type = await EventType.create(event_type="POD_CREATED", severity="info")
+    await EventType.create(event_type="POD_CREATED", severity="info")
+    await Link.create(SourceEntityID="pod-z", DestinationEntityID="node-9")
+    await Link.create(SourceEntityID="pod-z", DestinationEntityID="node-9")
+
+    await _process(processor, [_raw_event(1)], [_output("pod-a", "POD_CREATED", links=[("pod-a", "node-1")])])
+
+    links = await Link.all().order_by("LinkID").values_list("LinkID", "SourceEntityID", "DestinationEntityID")
+    assert [link for link in links if link[1] != "pod-z"][0] == (kept_link.LinkID, "pod-a", "node-1")
+    assert sorted(link[1:] for link in links) == [("node-1", "pod-a"), ("pod-a", "node-1"),
+                                                  # keys not stored by the event are left as they are
+                                                  ("pod-z", "node-9"), ("pod-z", "node-9")]
+    assert await EventType.all().values_list("event_type_id", flat=True) == [kept_event_type.event_type_id]
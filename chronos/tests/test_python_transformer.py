@@ -0,0 +1,66 @@
+import os
+from types import SimpleNamespace
+
+from src.dto.schema import RawEvent
+from src.transformers.python_transformer import PythonTransformer
+
+SCRIPT = """
+from src.transformers.base_python_transformer import BasePythonTransformer
+
+LOADS = globals().get("LOADS", 0) + 1
+
+
+class CountingTransformer(BasePythonTransformer):
+    async def is_transformer_applicable(self, event_data):
+        return True
+
+    async def transform(self, event_data):
+        return "{version}"
+"""
+
+
+def _write_script(path, version):
+    path.write_text(SCRIPT.format(version=version))
+
+
+def _transformer(path):
+    return PythonTransformer(SimpleNamespace(TransformerID=1, ScriptPath=str(path), ClassName="CountingTransformer"))
+
+
+def _raw_event():
+    return RawEvent(RawEventID=1, Source="k8s", ContentType="application/json", EventData="{}",
+                    IngestionTimestamp="2024-06-20T15:10:21")
+
+
+async def test_script_is_loaded_once_and_reloaded_when_it_changes(tmp_path):
+    script = tmp_path / "counting_transformer.py"
+    _write_script(script, "v1")
+    transformer = _transformer(script)
+
+    assert await transformer.apply(_raw_event()) == "v1"
+    instance = transformer._transformer_instance
+    assert await transformer.apply(_raw_event()) == "v1"
+    assert transformer._transformer_instance is instance
+
+    # touched without changes, the module is kept
+    stat = os.stat(script)
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert await transformer.apply(_raw_event()) == "v1"
+    assert transformer._transformer_instance is instance
+
+    _write_script(script, "v2")
+    os.utime(script, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2_000_000))
+    assert await transformer.apply(_raw_event()) == "v2"
+    assert transformer._transformer_instance is not instance
+
+
+async def test_transformers_of_the_same_script_share_its_module(tmp_path):
+    script = tmp_path / "shared_transformer.py"
+    _write_script(script, "v1")
+    first, second = _transformer(script), _transformer(script)
+
+    await first.apply(_raw_event())
+    await second.apply(_raw_event())
+
+    assert first._module is second._module
+    assert first._module.LOADS == 1
@@ -0,0 +1,252 @@
+"""
+In-memory stand-in for the feature store server and admin, for local benchmarks of the sdk.
+
+Serves the endpoints called by ofs_v2_service, ofs_v2_async_service and ofs_v2_admin_service
+(entity and feature group create / metadata, schema, latest version, state, read-features and write-features-v2)
+with the same request and response bodies as the real services. Rows are kept in memory per feature group version.
+Every request is delayed by latency-ms plus a uniform jitter, and read / write requests fail with a 503 at error-rate.
+
+Run standalone with:
+  python -m benchmark.local_feature_store --port 18090 --latency-ms 1
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from darwin_fs.config import DARWIN_OFS_V2_ADMIN_ENTITY_ENDPOINT, DARWIN_OFS_V2_ADMIN_ENTITY_METADATA_ENDPOINT, \
+  DARWIN_OFS_V2_ADMIN_FG_ENDPOINT, DARWIN_OFS_V2_ADMIN_FG_METADATA_ENDPOINT, DARWIN_OFS_V2_ADMIN_FG_SCHEMA_ENDPOINT, \
+  DARWIN_OFS_V2_ADMIN_FG_LATEST_VERSION_ENDPOINT, DARWIN_OFS_V2_FG_READ_ENDPOINT, DARWIN_OFS_V2_FG_WRITE_V2_ENDPOINT
+
+DEFAULT_TENANT = {"read": "default-tenant", "write": "default-tenant", "consume": "default-tenant"}
+
+
+class ApiError(Exception):
+  def __init__(self, status: int, code: str, message: str):
+    super().__init__(message)
+    self.status = status
+    self.code = code
+    self.message = message
+
+
+class LocalFeatureStore:
+  """entities, feature group versions and their rows, keyed by primary key tuple"""
+
+  def __init__(self):
+    self.entities: Dict[str, Dict[str, Any]] = {}
+    self.feature_groups: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    self.latest_versions: Dict[str, str] = {}
+    self.rows: Dict[Tuple[str, str], Dict[Tuple, Dict[str, Any]]] = {}
+
+  def create_entity(self, body: Dict[str, Any]) -> Dict[str, Any]:
+    entity = body["entity"]
+    name = entity["tableName"]
+    if name in self.entities:
+      raise ApiError(400, "ENTITY-ALREADY-EXISTS-EXCEPTION", "entity already exists")
+    columns = {feature["name"] for feature in entity["features"]}
+    if not entity["primaryKeys"] or not set(entity["primaryKeys"]) <= columns:
+      raise ApiError(400, "ENTITY-SCHEMA-VALIDATION-EXCEPTION", "invalid entity schema")
+    now = _now_millis()
+    self.entities[name] = {
+      "name": name, "entity": entity, "owner": body.get("owner", ""), "tags": body.get("tags", []),
+      "description": body.get("description", ""), "state": "LIVE", "createdAt": now, "updatedAt": now,
+    }
+    return {"entity": entity}
+
+  def get_entity_metadata(self, name: str) -> Dict[str, Any]:
+    if name not in self.entities:
+      raise ApiError(400, "ENTITY-NOT-FOUND-EXCEPTION", "entity not found")
+    return {"metadata": self.entities[name]}
+
+  def create_feature_group(self, body: Dict[str, Any], upgrade: bool) -> Dict[str, Any]:
+    feature_group = body["featureGroup"]
+    name = feature_group["featureGroupName"]
+    if feature_group["entityName"] not in self.entities:
+      raise ApiError(400, "ENTITY-NOT-FOUND-EXCEPTION", "entity not found")
+    if name in self.feature_groups and not upgrade:
+      raise ApiError(400, "FEATURE-GROUP-ALREADY-EXISTS-EXCEPTION", "feature group already exists")
+    if name not in self.feature_groups and upgrade:
+      raise ApiError(404, "FEATURE-GROUP-NOT-FOUND-EXCEPTION", "feature group not found")
+
+    version = f"v{len(self.feature_groups.get(name, {})) + 1}"
+    now = _now_millis()
+    self.feature_groups.setdefault(name, {})[version] = {
+      "name": name, "versionEnabled": feature_group.get("versionEnabled", True), "version": version,
+      "owner": body.get("owner", ""), "tags": body.get("tags", []), "description": body.get("description", ""),
+      "state": "LIVE", "tenant": DEFAULT_TENANT, "featureGroupType": feature_group.get("featureGroupType", "ONLINE"),
+      "featureGroup": feature_group, "createdAt": now, "updatedAt": now,
+    }
+    self.latest_versions[name] = version
+    self.rows[(name, version)] = {}
+    return {"featureGroup": feature_group, "version": version}
+
+  def get_feature_group_metadata(self, name: str, version: Optional[str]) -> Dict[str, Any]:
+    return {"metadata": self._feature_group(name, version)}
+
+  def get_feature_group_schema(self, name: str, version: Optional[str]) -> Dict[str, Any]:
+    metadata = self._feature_group(name, version)
+    entity = self.entities[metadata["featureGroup"]["entityName"]]["entity"]
+    return {
+      "schema": entity["features"] + metadata["featureGroup"]["features"],
+      "primaryKeys": entity["primaryKeys"],
+      "version": metadata["version"],
+      "featureGroupType": metadata["featureGroupType"],
+    }
+
+  def get_latest_version(self, name: str) -> Dict[str, Any]:
+    metadata = self._feature_group(name, None)
+    return {"version": {"name": name, "latestVersion": metadata["version"], "updatedAt": metadata["updatedAt"]}}
+
+  def update_state(self, name: str, version: Optional[str], body: Dict[str, Any]) -> Dict[str, Any]:
+    metadata = self._feature_group(name, version)
+    metadata["state"] = body["state"]
+    metadata["updatedAt"] = _now_millis()
+    return {"state": body["state"]}
+
+  def write_features(self, body: Dict[str, Any]) -> Dict[str, Any]:
+    name = body["featureGroupName"]
+    schema = self.get_feature_group_schema(name, body.get("featureGroupVersion"))
+    version = schema["version"]
+    names = body["features"]["names"]
+    unknown = set(names) - {column["name"] for column in schema["schema"]}
+    if unknown or not set(schema["primaryKeys"]) <= set(names):
+      raise ApiError(400, "INVALID-REQUEST-EXCEPTION", f"feature columns must contain the primary keys and exist in the schema, "
+                                                       f"unknown columns {sorted(unknown)}")
+
+    key_indices = [names.index(key) for key in schema["primaryKeys"]]
+    rows = self.rows[(name, version)]
+    successful_rows, failed_rows = [], []
+    for values in body["features"]["values"]:
+      key = tuple(values[i] for i in key_indices) if len(values) == len(names) else None
+      if key is None or any(value is None for value in key):
+        failed_rows.append(values)
+        continue
+      rows.setdefault(key, {}).update(zip(names, values))
+      successful_rows.append(values)
+    return {
+      "featureGroupName": name, "featureGroupVersion": version, "featureColumns": names,
+      "successfulRows": successful_rows, "failedRows": failed_rows,
+    }
+
+  def read_features(self, body: Dict[str, Any]) -> Dict[str, Any]:
+    name = body["featureGroupName"]
+    schema = self.get_feature_group_schema(name, body.get("featureGroupVersion"))
+    version = schema["version"]
+    key_names = body["primaryKeys"]["names"]
+    if sorted(key_names) != sorted(schema["primaryKeys"]):
+      raise ApiError(400, "INVALID-REQUEST-EXCEPTION", f"primary keys must be {schema['primaryKeys']}")
+
+    # the request may name the keys in any order, rows are stored in schema order
+    order = [key_names.index(key) for key in schema["primaryKeys"]]
+    feature_columns = body["featureColumns"]
+    rows = self.rows[(name, version)]
+    successful_keys, failed_keys = [], []
+    for key in body["primaryKeys"]["values"]:
+      row = rows.get(tuple(key[i] for i in order))
+      if row is None:
+        failed_keys.append(key)
+      else:
+        successful_keys.append({"key": key, "features": [row.get(column) for column in feature_columns]})
+    return {"featureGroupName": name, "featureGroupVersion": version, "successfulKeys": successful_keys, "failedKeys": failed_keys}
+
+  def _feature_group(self, name: str, version: Optional[str]) -> Dict[str, Any]:
+    versions = self.feature_groups.get(name, {})
+    metadata = versions.get(version or self.latest_versions.get(name))
+    if metadata is None:
+      raise ApiError(404, "FEATURE-GROUP-NOT-FOUND-EXCEPTION", "feature group not found")
+    return metadata
+
+
+def _now_millis() -> int:
+  return int(time.time() * 1000)
+
+
+def _error_response(status: int, code: str, message: str) -> web.Response:
+  return web.json_response({"error": {"message": message, "cause": message, "code": code}}, status=status)
+
+
+def create_app(store: LocalFeatureStore = None, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+               error_rate: float = 0.0, seed: int = None) -> web.Application:
+  store = store or LocalFeatureStore()
+  rng = random.Random(seed)
+  data_paths = {DARWIN_OFS_V2_FG_READ_ENDPOINT, DARWIN_OFS_V2_FG_WRITE_V2_ENDPOINT}
+
+  @web.middleware
+  async def inject_latency_and_errors(request: web.Request, handler) -> web.Response:
+    delay_ms = latency_ms + (rng.uniform(0, jitter_ms) if jitter_ms > 0 else 0.0)
+    if delay_ms > 0:
+      await asyncio.sleep(delay_ms / 1000.0)
+    if error_rate > 0 and request.path in data_paths and rng.random() < error_rate:
+      return _error_response(503, "SERVICE-UNAVAILABLE-EXCEPTION", "injected error")
+    try:
+      return web.json_response({"data": await handler(request)})
+    except ApiError as e:
+      return _error_response(e.status, e.code, e.message)
+    except (KeyError, TypeError, ValueError) as e:
+      return _error_response(400, "INVALID-REQUEST-EXCEPTION", f"invalid request: {e!r}")
+
+  async def create_entity(request: web.Request):
+    return store.create_entity(await request.json())
+
+  async def get_entity_metadata(request: web.Request):
+    return store.get_entity_metadata(request.query["name"])
+
+  async def create_feature_group(request: web.Request):
+    return store.create_feature_group(await request.json(), upgrade=request.headers.get("upgrade", "").lower() == "true")
+
+  async def update_feature_group_state(request: web.Request):
+    return store.update_state(request.query["name"], request.query.get("version"), await request.json())
+
+  async def get_feature_group_metadata(request: web.Request):
+    return store.get_feature_group_metadata(request.query["name"], request.query.get("version"))
+
+  async def get_feature_group_schema(request: web.Request):
+    return store.get_feature_group_schema(request.query["name"], request.query.get("version"))
+
+  async def get_latest_version(request: web.Request):
+    return store.get_latest_version(request.query["name"])
+
+  async def write_features(request: web.Request):
+    return store.write_features(await request.json())
+
+  async def read_features(request: web.Request):
+    return store.read_features(await request.json())
+
+  app = web.Application(middlewares=[inject_latency_and_errors], client_max_size=64 * 1024 * 1024)
+  app["store"] = store
+  app.router.add_post(DARWIN_OFS_V2_ADMIN_ENTITY_ENDPOINT, create_entity)
+  app.router.add_get(DARWIN_OFS_V2_ADMIN_ENTITY_METADATA_ENDPOINT, get_entity_metadata)
+  app.router.add_post(DARWIN_OFS_V2_ADMIN_FG_ENDPOINT, create_feature_group)
+  app.router.add_put(DARWIN_OFS_V2_ADMIN_FG_ENDPOINT, update_feature_group_state)
+  app.router.add_get(DARWIN_OFS_V2_ADMIN_FG_METADATA_ENDPOINT, get_feature_group_metadata)
+  app.router.add_get(DARWIN_OFS_V2_ADMIN_FG_SCHEMA_ENDPOINT, get_feature_group_schema)
+  app.router.add_get(DARWIN_OFS_V2_ADMIN_FG_LATEST_VERSION_ENDPOINT, get_latest_version)
+  app.router.add_post(DARWIN_OFS_V2_FG_WRITE_V2_ENDPOINT, write_features)
+  app.router.add_get(DARWIN_OFS_V2_FG_READ_ENDPOINT, read_features)
+  return app
+
+
+def main():
+  parser = argparse.ArgumentParser(description="In-memory feature store for darwin_fs benchmarks")
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=18090)
+  parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+  parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random delay added on top of latency-ms")
+  parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of read / write requests failed with a 503")
+  parser.add_argument("--seed", type=int, default=None)
+  args = parser.parse_args()
+
+  web.run_app(
+    create_app(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate, seed=args.seed),
+    host=args.host,
+    port=args.port,
+    print=None,
+    access_log=None,
+  )
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,370 @@
+"""
+Throughput benchmark of the darwin_fs online read and write apis against the local in-memory feature store.
+
+Starts benchmark.local_feature_store as a subprocess, points the sdk at it, creates an entity and a feature group,
+loads key-space rows and then runs every scenario closed loop for a fixed duration:
+  sync_read    client.read_features, batch-size keys per call
+  async_read   client.read_features_async, concurrency calls in flight
+  bulk_read    client.read_features_bulk_async, bulk-keys keys per call split into chunk-size chunks
+  sync_write   client.write_features_sync, batch-size rows per call
+  async_write  client.write_features_async, concurrency calls in flight
+and reports keys per second and call latency percentiles. Results are written as JSON, tagged with the git commit,
+so runs can be compared across commits with --compare.
+
+Run from the darwin_fs directory:
+  python -m benchmark.run_benchmark --latency-ms 1 --output results.json [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import aiohttp
+
+SDK_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ENTITY_NAME = "benchmark_entity"
+FEATURE_GROUP_NAME = "benchmark_fg"
+PRIMARY_KEY = "entity_id"
+PERCENTILES = (50, 95, 99)
+SCENARIOS = ("sync_read", "async_read", "bulk_read", "sync_write", "async_write")
+
+
+def _free_port() -> int:
+  with socket.socket() as sock:
+    sock.bind(("127.0.0.1", 0))
+    return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+  try:
+    return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SDK_DIR, text=True).strip()
+  except (OSError, subprocess.CalledProcessError):
+    return None
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+  """nearest-rank percentile of an already sorted list"""
+  if not sorted_values:
+    return 0.0
+  rank = max(int(round(percentile / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+  return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def feature_names(num_features: int) -> List[str]:
+  return [f"feature_{i}" for i in range(num_features)]
+
+
+def feature_row(key: int, num_features: int, generation: int = 0) -> List[Any]:
+  return [key] + [float((key * 31 + i * 7919 + generation) % 1000) / 10.0 for i in range(num_features)]
+
+
+class Measurement:
+  """call latencies and key counts of the measured part of a scenario"""
+
+  def __init__(self, warmup: float, duration: float):
+    self.measure_from = time.perf_counter() + warmup
+    self.stop_at = self.measure_from + duration
+    self.latencies: List[float] = []
+    self.keys = 0
+    self.failed_keys = 0
+    self.errors = 0
+
+  def done(self) -> bool:
+    return time.perf_counter() >= self.stop_at
+
+  def record(self, started_at: float, result: Optional[Tuple[int, int]]) -> None:
+    if started_at < self.measure_from:
+      return
+    if result is None:
+      self.errors += 1
+      return
+    self.latencies.append(time.perf_counter() - started_at)
+    self.keys += result[0]
+    self.failed_keys += result[1]
+
+  def report(self, scenario: str) -> Dict[str, Any]:
+    self.latencies.sort()
+    elapsed = time.perf_counter() - self.measure_from
+    result = {
+      "scenario": scenario,
+      "calls": len(self.latencies),
+      "keys": self.keys,
+      "failed_keys": self.failed_keys,
+      "errors": self.errors,
+      "keys_per_second": round(self.keys / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    for percentile in PERCENTILES:
+      result[f"p{percentile}_ms"] = round(_percentile(self.latencies, percentile) * 1000, 3)
+    return result
+
+
+def _run_sync(call: Callable[[], Tuple[int, int]], warmup: float, duration: float) -> Measurement:
+  from darwin_fs.exception import SdkException
+
+  measurement = Measurement(warmup, duration)
+  while not measurement.done():
+    started_at = time.perf_counter()
+    try:
+      result = call()
+    except SdkException:
+      result = None
+    measurement.record(started_at, result)
+  return measurement
+
+
+async def _run_async(call, concurrency: int, warmup: float, duration: float) -> Measurement:
+  from darwin_fs.exception import SdkException
+
+  measurement = Measurement(warmup, duration)
+  connector = aiohttp.TCPConnector(limit=0)
+  async with aiohttp.ClientSession(connector=connector) as session:
+
+    async def worker():
+      while not measurement.done():
+        started_at = time.perf_counter()
+        try:
+          result = await call(session)
+        except SdkException:
+          result = None
+        measurement.record(started_at, result)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+  return measurement
+
+
+class Scenarios:
+  """builds the sdk calls of every scenario from seeded random keys"""
+
+  def __init__(self, args):
+    from darwin_fs import client
+    from darwin_fs.model.primary_keys import PrimaryKeys
+    from darwin_fs.model.read_features_request import ReadFeaturesRequest
+    from darwin_fs.model.write_features import WriteFeatures
+    from darwin_fs.model.write_features_request import WriteFeaturesRequest
+
+    self.args = args
+    self.client = client
+    self.columns = feature_names(args.num_features)
+    self.random = random.Random(args.seed)
+    self.generation = 0
+    self._primary_keys = PrimaryKeys
+    self._read_request = ReadFeaturesRequest
+    self._write_features = WriteFeatures
+    self._write_request = WriteFeaturesRequest
+
+  def read_request(self, num_keys: int):
+    keys = [[self.random.randrange(self.args.key_space)] for _ in range(num_keys)]
+    return self._read_request(
+      feature_group_name=FEATURE_GROUP_NAME,
+      feature_columns=self.columns,
+      primary_keys=self._primary_keys(names=[PRIMARY_KEY], values=keys),
+    )
+
+  def write_request(self, num_rows: int):
+    self.generation += 1
+    rows = [feature_row(self.random.randrange(self.args.key_space), self.args.num_features, self.generation)
+            for _ in range(num_rows)]
+    return self._write_request(
+      feature_group_name=FEATURE_GROUP_NAME,
+      features=self._write_features(names=[PRIMARY_KEY] + self.columns, values=rows),
+    )
+
+  def setup(self) -> None:
+    from darwin_fs.constant.constants import DataType, FeatureGroupType
+    from darwin_fs.exception import SdkException
+    from darwin_fs.model.create_entity_request import CreateEntityRequest
+    from darwin_fs.model.create_feature_group_request import CreateFeatureGroupRequest
+    from darwin_fs.model.entity import Entity
+    from darwin_fs.model.feature_column import FeatureColumn
+    from darwin_fs.model.feature_group import FeatureGroup
+
+    entity_request = CreateEntityRequest(
+      entity=Entity(table_name=ENTITY_NAME, primary_keys=[PRIMARY_KEY],
+                    features=[FeatureColumn(name=PRIMARY_KEY, type=DataType.INT, description="", tags=[])]),
+      owner="benchmark", tags=[], description="",
+    )
+    feature_group_request = CreateFeatureGroupRequest(
+      feature_group=FeatureGroup(
+        feature_group_name=FEATURE_GROUP_NAME, entity_name=ENTITY_NAME, feature_group_type=FeatureGroupType.ONLINE,
+        features=[FeatureColumn(name=c, type=DataType.DOUBLE, description="", tags=[]) for c in self.columns],
+      ),
+      owner="benchmark", tags=[], description="",
+    )
+    # both print the created config
+    with contextlib.redirect_stdout(io.StringIO()):
+      self.client.create_entity(entity_request)
+      self.client.create_feature_group(feature_group_request)
+    for start in range(0, self.args.key_space, 1000):
+      rows = [feature_row(key, self.args.num_features) for key in range(start, min(start + 1000, self.args.key_space))]
+      request = self._write_request(
+        feature_group_name=FEATURE_GROUP_NAME,
+        features=self._write_features(names=[PRIMARY_KEY] + self.columns, values=rows),
+      )
+      # writes are not retried by the sdk, retry here so injected errors do not fail the load
+      for attempt in range(10):
+        try:
+          self.client.write_features_sync(request)
+          break
+        except SdkException:
+          if attempt == 9:
+            raise
+
+  def run(self, scenario: str) -> Dict[str, Any]:
+    args = self.args
+    output_format = args.output_format
+    if scenario == "sync_read":
+      def call():
+        return _read_counts(self.client.read_features(self.read_request(args.batch_size), output_format))
+      measurement = _run_sync(call, args.warmup, args.duration)
+    elif scenario == "async_read":
+      async def call(session):
+        return _read_counts(await self.client.read_features_async(session, self.read_request(args.batch_size), output_format))
+      measurement = asyncio.run(_run_async(call, args.concurrency, args.warmup, args.duration))
+    elif scenario == "bulk_read":
+      async def call(session):
+        response = await self.client.read_features_bulk_async(
+          session, self.read_request(args.bulk_keys), chunk_size=args.chunk_size,
+          max_concurrency=args.concurrency, output_format=output_format,
+        )
+        return _read_counts(response)
+      measurement = asyncio.run(_run_async(call, 1, args.warmup, args.duration))
+    elif scenario == "sync_write":
+      def call():
+        return _write_counts(self.client.write_features_sync(self.write_request(args.batch_size)))
+      measurement = _run_sync(call, args.warmup, args.duration)
+    elif scenario == "async_write":
+      async def call(session):
+        return _write_counts(await self.client.write_features_async(session, self.write_request(args.batch_size)))
+      measurement = asyncio.run(_run_async(call, args.concurrency, args.warmup, args.duration))
+    else:
+      raise ValueError(f"unknown scenario {scenario}, expected one of {SCENARIOS}")
+    return measurement.report(scenario)
+
+
+def _read_counts(response) -> Tuple[int, int]:
+  if hasattr(response, "successful_keys"):
+    return len(response.successful_keys), len(response.failed_keys)
+  return len(response.data), len(response.failed_keys)
+
+
+def _write_counts(response) -> Tuple[int, int]:
+  return len(response.successful_rows), len(response.failed_rows)
+
+
+def _start_store(args, port: int) -> subprocess.Popen:
+  process = subprocess.Popen(
+    [
+      sys.executable, "-m", "benchmark.local_feature_store",
+      "--port", str(port),
+      "--latency-ms", str(args.latency_ms),
+      "--jitter-ms", str(args.jitter_ms),
+      "--error-rate", str(args.error_rate),
+      "--seed", str(args.seed),
+    ],
+    cwd=SDK_DIR,
+  )
+  return process
+
+
+def _wait_until_ready(port: int, process: subprocess.Popen, timeout: float) -> None:
+  deadline = time.monotonic() + timeout
+  while time.monotonic() < deadline:
+    if process.poll() is not None:
+      raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+    try:
+      socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+      return
+    except OSError:
+      time.sleep(0.1)
+  raise RuntimeError(f"local feature store on port {port} not ready after {timeout}s")
+
+
+def _print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+  baseline_scenarios = {result["scenario"]: result for result in (baseline or {}).get("results", [])}
+  header = f"{'scenario':>12} {'keys/s':>12} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'failed':>8} {'errors':>7}"
+  print(header)
+  print("-" * len(header))
+  for result in results:
+    print(f"{result['scenario']:>12} {result['keys_per_second']:>12.1f} {result['p50_ms']:>10.2f} "
+          f"{result['p95_ms']:>10.2f} {result['p99_ms']:>10.2f} {result['failed_keys']:>8} {result['errors']:>7}")
+    previous = baseline_scenarios.get(result["scenario"])
+    if previous:
+      deltas = [f"{metric} {_relative_change(previous[metric], result[metric]):+.1f}%"
+                for metric in ("keys_per_second", "p50_ms", "p95_ms", "p99_ms")]
+      print(f"{'':>12} vs {baseline.get('commit') or 'baseline'}: {', '.join(deltas)}")
+
+
+def _relative_change(before: float, after: float) -> float:
+  return (after - before) / before * 100.0 if before else 0.0
+
+
+def main():
+  parser = argparse.ArgumentParser(description="Benchmark darwin_fs online reads and writes against a local feature store")
+  parser.add_argument("--scenarios", default=",".join(SCENARIOS), type=lambda value: value.split(","),
+                      help="Comma separated scenarios to run")
+  parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per scenario")
+  parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds per scenario")
+  parser.add_argument("--batch-size", type=int, default=100, help="Keys per read call and rows per write call")
+  parser.add_argument("--concurrency", type=int, default=16, help="Calls in flight for async, chunks in flight for bulk")
+  parser.add_argument("--bulk-keys", type=int, default=5000, help="Keys per bulk read call")
+  parser.add_argument("--chunk-size", type=int, default=100, help="Keys per chunk of a bulk read")
+  parser.add_argument("--output-format", choices=["pandas", "arrow"], default=None, help="Columnar decoding of reads")
+  parser.add_argument("--num-features", type=int, default=16)
+  parser.add_argument("--key-space", type=int, default=10000, help="Rows loaded before the scenarios run")
+  parser.add_argument("--latency-ms", type=float, default=1.0, help="Latency added by the local feature store")
+  parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random latency added on top of latency-ms")
+  parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of read / write calls failed with a 503")
+  parser.add_argument("--seed", type=int, default=42)
+  parser.add_argument("--output", help="Write results as JSON to this file")
+  parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+  args = parser.parse_args()
+
+  unknown = set(args.scenarios) - set(SCENARIOS)
+  if unknown:
+    parser.error(f"unknown scenarios {sorted(unknown)}, expected some of {', '.join(SCENARIOS)}")
+
+  baseline = None
+  if args.compare:
+    with open(args.compare) as f:
+      baseline = json.load(f)
+
+  port = _free_port()
+  url = f"http://127.0.0.1:{port}"
+  process = _start_store(args, port)
+  try:
+    _wait_until_ready(port, process, timeout=30)
+    # darwin_fs.config reads the hosts at import, so the sdk is only imported once they are set
+    os.environ["sdk.python.environment"] = "test"
+    os.environ["ofs.server.host"] = url
+    os.environ["ofs.admin.host"] = url
+    scenarios = Scenarios(args)
+    scenarios.setup()
+    results = [scenarios.run(scenario) for scenario in args.scenarios]
+  finally:
+    process.terminate()
+    process.wait(timeout=30)
+
+  report = {
+    "commit": _git_commit(),
+    "python": platform.python_version(),
+    "cpu_count": os.cpu_count(),
+    "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+    "results": results,
+  }
+  _print_results(results, baseline)
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+  main()
@@ -1,19 +1,23 @@
+from dataclasses import replace
 from datetime import datetime
 from os import environ
-from typing import Optional
+from typing import Optional, Union, List, Any, Dict
 
 import yaml
 
 import darwin_fs.service.ofs_v2_admin_service as admin_service
 import darwin_fs.service.ofs_v2_service as ofs_service
-from darwin_fs.constant.constants import FeatureGroupType, DataType, State
+from darwin_fs.config import DARWIN_FS_WRITE_PARALLEL_SINKS
+from darwin_fs.constant.constants import FeatureGroupType, DataType, State, PointInTimeJoinStrategy
 from darwin_fs.exception import SdkException, ApiException, SparkWriterException
+from darwin_fs.model.columnar_read_features_response import ColumnarReadFeaturesResponse
 from darwin_fs.model.create_entity_request import CreateEntityRequest
 from darwin_fs.model.create_feature_group_request import CreateFeatureGroupRequest
 from darwin_fs.model.entity import Entity
 from darwin_fs.model.feature_group import FeatureGroup
 from darwin_fs.model.feature_group_schema import FeatureGroupSchema
 from darwin_fs.model.feature_group_version import FeatureGroupVersion
+from darwin_fs.model.point_in_time_feature_group import PointInTimeFeatureGroup
 from darwin_fs.model.read_features_request import ReadFeaturesRequest
 from darwin_fs.model.read_features_response import ReadFeaturesResponse
 from darwin_fs.model.write_features_request import WriteFeaturesRequest
@@ -21,11 +25,15 @@ from darwin_fs.model.write_features_response import WriteFeaturesResponse
 
 try:
   from pyspark.sql import SparkSession, DataFrame
-  from darwin_fs.service import spark_service
+  from pyspark.sql.streaming import StreamingQuery
+  from darwin_fs.service import spark_service, point_in_time_service, streaming_service
 except ImportError:
   SparkSession: Optional[type] = None
   DataFrame: Optional[type] = None
+  StreamingQuery: Optional[type] = None
   spark_service: Optional[type] = None
+  point_in_time_service: Optional[type] = None
+  streaming_service: Optional[type] = None
 
 try:
   from aiohttp import ClientSession
@@ -133,9 +141,42 @@ def get_feature_group_schema(name: str, version: str = None) -> FeatureGroupSche
     raise SdkException(f"unknown exception fetching feature-group schema\n\t{e}", "UNKNOWN_EXCEPTION")
 
 
-def read_features(request: ReadFeaturesRequest) -> ReadFeaturesResponse:
+def pin_feature_group_version(name: str, version: str) -> None:
+  """
+  pins a feature group version for this process, reads, writes and lookups of the feature group
+  that do not specify a version use it instead of the latest version
+  """
+  admin_service.pin_feature_group_version(name, version)
+
+
+def unpin_feature_group_version(name: str) -> None:
+  admin_service.unpin_feature_group_version(name)
+
+
+def invalidate_metadata_cache(feature_group_name: str = None, entity_name: str = None) -> None:
+  """drops cached admin lookups of the given feature group and entity, or all of them when neither is given"""
+  if feature_group_name is None and entity_name is None:
+    admin_service.clear_metadata_cache()
+  if feature_group_name is not None:
+    admin_service.invalidate_feature_group(feature_group_name)
+  if entity_name is not None:
+    admin_service.invalidate_entity(entity_name)
+
+
+def _with_pinned_version(request: ReadFeaturesRequest) -> ReadFeaturesRequest:
+  version = admin_service.resolve_feature_group_version(request.feature_group_name, request.feature_group_version)
+  if version == request.feature_group_version:
+    return request
+  return replace(request, feature_group_version=version)
+
+
+def read_features(request: ReadFeaturesRequest, output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  """
+  output_format "pandas" or "arrow" decodes the response column wise into a ColumnarReadFeaturesResponse,
+  skipping the per key objects of ReadFeaturesResponse
+  """
   try:
-    return ofs_service.feature_group_read_features(request)
+    return ofs_service.feature_group_read_features(_with_pinned_version(request), output_format)
   except SdkException as sdk_exception:
     raise sdk_exception
   except ApiException as api_exception:
@@ -175,7 +216,12 @@ async def write_features_async(client: ClientSession, request: WriteFeaturesRequ
     raise SdkException(f"unknown exception writing features to feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
 
 
-async def read_features_async(client: ClientSession, request: ReadFeaturesRequest) -> ReadFeaturesResponse:
+async def read_features_async(client: ClientSession, request: ReadFeaturesRequest,
+                              output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  """
+  output_format "pandas" or "arrow" decodes the response column wise into a ColumnarReadFeaturesResponse,
+  skipping the per key objects of ReadFeaturesResponse
+  """
   if ClientSession is None:
     raise SdkException(f"unable to find aiohttp dependency\neither install it manually or use\n pip3 install ofs_sdk[async]",
                        "DEPENDENCY_EXCEPTION")
@@ -186,7 +232,7 @@ async def read_features_async(client: ClientSession, request: ReadFeaturesReques
       raise SdkException(f"unable to import ofs_sdk.service.ofs_v2_async_service\n\t{e}", "IMPORT_EXCEPTION")
 
   try:
-    return await ofs_v2_async_service.feature_group_read_features(client, request)
+    return await ofs_v2_async_service.feature_group_read_features(client, _with_pinned_version(request), output_format)
   except SdkException as sdk_exception:
     raise sdk_exception
   except ApiException as api_exception:
@@ -195,7 +241,51 @@ async def read_features_async(client: ClientSession, request: ReadFeaturesReques
     raise SdkException(f"unknown exception writing features to feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
 
 
-def write_features(df: DataFrame, feature_group_name: str, feature_group_version: str = None, mode: str = "overwrite") -> None:
+async def read_features_bulk_async(client: ClientSession, request: ReadFeaturesRequest, chunk_size: int = None,
+                                   max_concurrency: int = None, max_retries: int = None,
+                                   output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  """
+  reads features for a large number of keys by splitting them into chunks read concurrently.
+  keys of chunks that still fail after max_retries are returned in failed_keys of the merged response.
+  the aiohttp connector limit of client also caps the concurrency (100 by default).
+  output_format "pandas" or "arrow" merges the chunks into a single DataFrame or Table.
+  """
+  if ClientSession is None:
+    raise SdkException(f"unable to find aiohttp dependency\neither install it manually or use\n pip3 install ofs_sdk[async]",
+                       "DEPENDENCY_EXCEPTION")
+  elif ofs_v2_async_service is None:
+    try:
+      import darwin_fs.service.ofs_v2_async_service
+    except ImportError as e:
+      raise SdkException(f"unable to import ofs_sdk.service.ofs_v2_async_service\n\t{e}", "IMPORT_EXCEPTION")
+
+  kwargs = {"output_format": output_format}
+  if chunk_size is not None:
+    kwargs["chunk_size"] = chunk_size
+  if max_concurrency is not None:
+    kwargs["max_concurrency"] = max_concurrency
+  if max_retries is not None:
+    kwargs["max_retries"] = max_retries
+
+  try:
+    return await ofs_v2_async_service.feature_group_bulk_read_features(client, _with_pinned_version(request), **kwargs)
+  except SdkException as sdk_exception:
+    raise sdk_exception
+  except ApiException as api_exception:
+    raise SdkException(api_exception.message, api_exception.error_code)
+  except Exception as e:
+    raise SdkException(f"unknown exception bulk reading features from feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
+
+
+def write_features(df: DataFrame, feature_group_name: str, feature_group_version: str = None, mode: str = "overwrite",
+                   parallel_sinks: bool = None) -> None:
+  """
+  writes df to the online (for online feature groups) and offline store.
+  df is materialised once (persisted unless already cached, and unpersisted afterwards) and both sinks
+  read from it, so upstream transformations are not recomputed per sink.
+  parallel_sinks runs the online and offline writes as concurrent spark jobs,
+  defaults to DARWIN_FS_WRITE_PARALLEL_SINKS.
+  """
   if SparkSession is None:
     raise SdkException(f"unable to find pyspark dependency\neither install it manually or use\n pip3 install ofs_sdk[all]",
                        "DEPENDENCY_EXCEPTION")
@@ -208,45 +298,110 @@ def write_features(df: DataFrame, feature_group_name: str, feature_group_version
   spark_context = df.sparkSession.sparkContext
   if environ.get("OFS_SDK_IMPORT_UNSAFE", "false").lower() != "true":
     spark_service.check_ofs_jar(spark_context)
+  if parallel_sinks is None:
+    parallel_sinks = DARWIN_FS_WRITE_PARALLEL_SINKS
 
-  start_time = int(datetime.now().timestamp())
-  count = df.count()
-  error: Exception = None
-  run_id = spark_service.create_run_id()
+  feature_group_version = admin_service.resolve_feature_group_version(feature_group_name, feature_group_version)
+  df, persisted_here = spark_service.persist_for_write(df)
   try:
-    schema_metadata = spark_service.get_schema_using_spark_jar(spark_context, feature_group_name, feature_group_version)
-    feature_group_type = schema_metadata.getFeatureGroupType().name()
-    feature_group_version = schema_metadata.getVersion()
-    if feature_group_type == FeatureGroupType.ONLINE.name:
-      spark_service.write_online_features(df, feature_group_name, feature_group_version, run_id)
+    start_time = int(datetime.now().timestamp())
+    # also materialises the persisted dataframe for the sinks
+    count = df.count()
+    error: Exception = None
+    run_id = spark_service.create_run_id()
+    try:
+      schema_metadata = spark_service.get_schema_using_spark_jar(spark_context, feature_group_name, feature_group_version)
+      feature_group_type = schema_metadata.getFeatureGroupType().name()
+      feature_group_version = schema_metadata.getVersion()
+      expected_schema = spark_service.get_df_schema_for_fg_using_spark_jar(spark_context, schema_metadata)
+      spark_service.write_online_and_offline_features(df, feature_group_name, feature_group_version, run_id,
+                                                      expected_schema, mode,
+                                                      write_online=feature_group_type == FeatureGroupType.ONLINE.name,
+                                                      parallel=parallel_sinks)
+
+    except SdkException as sdk_exception:
+      error = sdk_exception
+      raise sdk_exception
+    except ApiException as api_exception:
+      error = api_exception
+      raise SdkException(api_exception.message, api_exception.error_code)
+    except SparkWriterException as spark_writer_exception:
+      error = spark_writer_exception
+      raise SdkException(spark_writer_exception.message, spark_writer_exception.error_code)
+    except Exception as e:
+      error = e
+      raise SdkException(f"unknown exception writing features to feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
+    finally:
+      time_taken = int(datetime.now().timestamp()) - start_time
+      spark_service.put_feature_group_run_using_spark_jar(df, feature_group_name=feature_group_name,
+                                                          feature_group_version=feature_group_version,
+                                                          run_id=run_id,
+                                                          time_taken=time_taken,
+                                                          count=count,
+                                                          error=error)
+  finally:
+    if persisted_here:
+      df.unpersist()
+
+
+def write_features_stream(df: DataFrame, feature_group_name: str, checkpoint_location: str, feature_group_version: str = None,
+                          trigger_interval: str = None, available_now: bool = False, skip_unchanged: bool = True,
+                          order_column: str = None, query_name: str = None) -> StreamingQuery:
+  """
+  incrementally writes a streaming df to the online store of an online feature group and returns the started query.
+  every micro-batch keeps the latest row per primary key (by order_column when given, otherwise any) and is upserted
+  with a run id derived from its batch id, progress is checkpointed at checkpoint_location.
+  skip_unchanged keeps a hash of the last written feature values per key under checkpoint_location
+  and drops rows whose values did not change, order_column is not part of that comparison.
+  trigger_interval defaults to DARWIN_FS_STREAM_TRIGGER_INTERVAL, available_now processes what is available and stops.
+  """
+  if SparkSession is None:
+    raise SdkException(f"unable to find pyspark dependency\neither install it manually or use\n pip3 install ofs_sdk[all]",
+                       "DEPENDENCY_EXCEPTION")
+  elif streaming_service is None:
+    try:
+      import darwin_fs.service.streaming_service
+    except ImportError as e:
+      raise SdkException(f"unable to import ofs_sdk.service.streaming_service\n\t{e}", "IMPORT_EXCEPTION")
+
+  spark_context = df.sparkSession.sparkContext
+  if environ.get("OFS_SDK_IMPORT_UNSAFE", "false").lower() != "true":
+    spark_service.check_ofs_jar(spark_context)
 
-    expected_schema = spark_service.get_df_schema_for_fg_using_spark_jar(spark_context, schema_metadata)
-    spark_service.write_offline_features(df, feature_group_name, feature_group_version, expected_schema, mode)
+  try:
+    feature_group_version = admin_service.resolve_feature_group_version(feature_group_name, feature_group_version)
+    schema_metadata = spark_service.get_schema_using_spark_jar(spark_context, feature_group_name, feature_group_version)
+    if schema_metadata.getFeatureGroupType().name() != FeatureGroupType.ONLINE.name:
+      raise SdkException(f"feature-group {feature_group_name} is not an online feature group, streaming writes go to the online store",
+                         "INVALID_FEATURE_GROUP_TYPE")
+    schema = admin_service.get_feature_group_schema(feature_group_name=feature_group_name,
+                                                    feature_group_version=schema_metadata.getVersion())
+    return streaming_service.write_online_features_stream(df, feature_group_name, schema.version, schema.primary_keys,
+                                                          checkpoint_location, trigger_interval=trigger_interval,
+                                                          available_now=available_now, skip_unchanged=skip_unchanged,
+                                                          order_column=order_column, query_name=query_name)
 
   except SdkException as sdk_exception:
-    error = sdk_exception
     raise sdk_exception
   except ApiException as api_exception:
-    error = api_exception
     raise SdkException(api_exception.message, api_exception.error_code)
   except SparkWriterException as spark_writer_exception:
-    error = spark_writer_exception
     raise SdkException(spark_writer_exception.message, spark_writer_exception.error_code)
   except Exception as e:
-    error = e
-    raise SdkException(f"unknown exception writing features to feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
-  finally:
-    time_taken = int(datetime.now().timestamp()) - start_time
-    spark_service.put_feature_group_run_using_spark_jar(df, feature_group_name=feature_group_name,
-                                                        feature_group_version=feature_group_version,
-                                                        run_id=run_id,
-                                                        time_taken=time_taken,
-                                                        count=count,
-                                                        error=error)
+    raise SdkException(f"unknown exception streaming features to feature-group\n\t{e}", "UNKNOWN_EXCEPTION")
 
 
 def read_offline_features(spark: SparkSession, feature_group_name: str, feature_group_version: str = None, delta_table_version: int = None,
-                          timestamp: int = None) -> DataFrame:
+                          timestamp: int = None, columns: List[str] = None, filters: list = None, time_column: str = None,
+                          start_time: Any = None, end_time: Any = None, entity_keys: Dict[str, List[Any]] = None) -> DataFrame:
+  """
+  reads a feature group from the offline store, the optional selections are pushed down to the delta scan:
+    columns: columns to read
+    filters: sql expression strings or spark Columns, e.g. partition filters
+    time_column, start_time, end_time: keeps rows with start_time <= time_column < end_time
+    entity_keys: primary key values to read, column name to values, composite keys are zipped row wise
+      e.g. {"user_id": [1, 2], "region": ["in", "us"]} reads the keys (1, "in") and (2, "us")
+  """
   if SparkSession is None:
     raise SdkException(f"unable to find pyspark dependency\neither install it manually or use\n pip3 install ofs_sdk[all]",
                        "DEPENDENCY_EXCEPTION")
@@ -256,12 +411,15 @@ def read_offline_features(spark: SparkSession, feature_group_name: str, feature_
     except ImportError as e:
       raise SdkException(f"unable to import ofs_sdk.service.spark_service\n\t{e}", "IMPORT_EXCEPTION")
 
+  feature_group_version = admin_service.resolve_feature_group_version(feature_group_name, feature_group_version)
   try:
     # validation
     metadata = spark_service.get_schema_using_spark_jar(spark.sparkContext, feature_group_name, feature_group_version)
     if feature_group_version == None:
       feature_group_version = metadata.getVersion()
-    return spark_service.read_offline_features(spark, feature_group_name, feature_group_version, delta_table_version, timestamp)
+    return spark_service.read_offline_features(spark, feature_group_name, feature_group_version, delta_table_version, timestamp,
+                                               columns=columns, filters=filters, time_column=time_column,
+                                               start_time=start_time, end_time=end_time, entity_keys=entity_keys)
 
   except SdkException as sdk_exception:
     raise sdk_exception
@@ -271,3 +429,57 @@ def read_offline_features(spark: SparkSession, feature_group_name: str, feature_
     raise SdkException(spark_writer_exception.message, spark_writer_exception.error_code)
   except Exception as e:
     raise SdkException(f"unknown exception reading offline features \n\t{e}", "UNKNOWN_EXCEPTION")
+
+
+def get_point_in_time_features(events: DataFrame, event_timestamp_column: str, feature_groups: List[PointInTimeFeatureGroup],
+                               strategy: str = PointInTimeJoinStrategy.AUTO) -> DataFrame:
+  """
+  joins the offline features of every feature group to events as of each event's timestamp, i.e. the latest
+  feature row at or before the event (and within max_age when given) for the event's keys.
+  only the time range and columns needed are read from each feature group.
+  strategy: "range_bucket" (needs max_age), "sort_merge" or "auto" (range_bucket when max_age is set)
+  """
+  if SparkSession is None:
+    raise SdkException(f"unable to find pyspark dependency\neither install it manually or use\n pip3 install ofs_sdk[all]",
+                       "DEPENDENCY_EXCEPTION")
+  elif point_in_time_service is None:
+    try:
+      import darwin_fs.service.point_in_time_service
+    except ImportError as e:
+      raise SdkException(f"unable to import ofs_sdk.service.point_in_time_service\n\t{e}", "IMPORT_EXCEPTION")
+
+  try:
+    strategy = PointInTimeJoinStrategy(strategy)
+    resolved = []
+    for feature_group in feature_groups:
+      version = admin_service.resolve_feature_group_version(feature_group.feature_group_name, feature_group.feature_group_version)
+      schema = admin_service.get_feature_group_schema(feature_group_name=feature_group.feature_group_name,
+                                                      feature_group_version=version)
+      join_keys = feature_group.join_keys or schema.primary_keys
+      if len(join_keys) != len(schema.primary_keys):
+        raise SdkException(f"join_keys {join_keys} do not match the primary keys {schema.primary_keys} of feature-group "
+                           f"{feature_group.feature_group_name}", "INVALID_JOIN_KEYS")
+      feature_columns = feature_group.feature_columns or [
+        column.name for column in schema.schema
+        if column.name not in schema.primary_keys and column.name != feature_group.timestamp_column
+      ]
+      resolved.append(point_in_time_service.ResolvedFeatureGroup(
+        feature_group_name=feature_group.feature_group_name,
+        feature_group_version=schema.version,
+        timestamp_column=feature_group.timestamp_column,
+        primary_keys=schema.primary_keys,
+        join_keys=join_keys,
+        feature_columns=feature_columns,
+        max_age=feature_group.max_age,
+        prefix=feature_group.prefix or "",
+      ))
+    return point_in_time_service.point_in_time_join(events, event_timestamp_column, resolved, strategy)
+
+  except SdkException as sdk_exception:
+    raise sdk_exception
+  except ApiException as api_exception:
+    raise SdkException(api_exception.message, api_exception.error_code)
+  except SparkWriterException as spark_writer_exception:
+    raise SdkException(spark_writer_exception.message, spark_writer_exception.error_code)
+  except Exception as e:
+    raise SdkException(f"unknown exception joining point in time features\n\t{e}", "UNKNOWN_EXCEPTION")
@@ -45,3 +45,33 @@ if TEAM_SUFFIX != '' or VPC_SUFFIX != '':
   print(f"\tofs_writer_host: {DARWIN_OFS_V2_WRITER_HOST}")
   print(f"\tofs_admin_host: {DARWIN_OFS_V2_ADMIN_HOST}")
   print(f"\tofs_kafka_host: {DARWIN_OFS_V2_KAFKA_HOST}")
+
+# connection pooling and retries of the sync http services
+DARWIN_FS_HTTP_POOL_CONNECTIONS = int(os.environ.get("DARWIN_FS_HTTP_POOL_CONNECTIONS", "10"))
+DARWIN_FS_HTTP_POOL_MAXSIZE = int(os.environ.get("DARWIN_FS_HTTP_POOL_MAXSIZE", "32"))
+DARWIN_FS_HTTP_TCP_KEEPALIVE = os.environ.get("DARWIN_FS_HTTP_TCP_KEEPALIVE", "true").lower() == "true"
+DARWIN_FS_HTTP_MAX_RETRIES = int(os.environ.get("DARWIN_FS_HTTP_MAX_RETRIES", "3"))
+DARWIN_FS_HTTP_RETRY_BACKOFF_FACTOR = float(os.environ.get("DARWIN_FS_HTTP_RETRY_BACKOFF_FACTOR", "0.2"))
+
+# bulk online feature reads
+DARWIN_FS_BULK_READ_CHUNK_SIZE = int(os.environ.get("DARWIN_FS_BULK_READ_CHUNK_SIZE", "100"))
+DARWIN_FS_BULK_READ_MAX_CONCURRENCY = int(os.environ.get("DARWIN_FS_BULK_READ_MAX_CONCURRENCY", "16"))
+DARWIN_FS_BULK_READ_MAX_RETRIES = int(os.environ.get("DARWIN_FS_BULK_READ_MAX_RETRIES", "3"))
+DARWIN_FS_BULK_READ_RETRY_BACKOFF_SECONDS = float(os.environ.get("DARWIN_FS_BULK_READ_RETRY_BACKOFF_SECONDS", "0.2"))
+
+# opt-in cache of admin lookups of a given feature group version and of entities, 0 disables it
+DARWIN_FS_ADMIN_CACHE_TTL_SECONDS = float(os.environ.get("DARWIN_FS_ADMIN_CACHE_TTL_SECONDS", "0"))
+# lookups of the latest version (latest version details and unversioned schema and metadata) are cached for a short
+# time, versions created by other processes are seen once it expires, 0 disables it
+DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS = float(os.environ.get("DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS", "10"))
+
+# write_features materialises its input once with this storage level before running the online and offline sinks
+DARWIN_FS_WRITE_STORAGE_LEVEL = os.environ.get("DARWIN_FS_WRITE_STORAGE_LEVEL", "MEMORY_AND_DISK")
+DARWIN_FS_WRITE_PARALLEL_SINKS = os.environ.get("DARWIN_FS_WRITE_PARALLEL_SINKS", "false").lower() == "true"
+
+# opt-in cache of the latest offline delta table version per spark session, 0 disables it.
+# writes of other processes are seen by cached readers only once the entry expires
+DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS = float(os.environ.get("DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS", "0"))
+
+# streaming online writes run a micro-batch every interval unless a trigger is passed
+DARWIN_FS_STREAM_TRIGGER_INTERVAL = os.environ.get("DARWIN_FS_STREAM_TRIGGER_INTERVAL", "1 minute")
@@ -24,3 +24,12 @@ class FeatureGroupType(str, Enum):
 class State(str, Enum):
   LIVE = "LIVE"
   ARCHIVED = "ARCHIVED"
+
+class ReadOutputFormat(str, Enum):
+  PANDAS = "pandas"
+  ARROW = "arrow"
+
+class PointInTimeJoinStrategy(str, Enum):
+  AUTO = "auto"
+  SORT_MERGE = "sort_merge"
+  RANGE_BUCKET = "range_bucket"
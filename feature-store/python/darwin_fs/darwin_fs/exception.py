@@ -12,10 +12,11 @@ class SdkException(Exception):
     return super().__str__()
 
 class ApiException(Exception):
-  def __init__(self, api_error: ApiError):
+  def __init__(self, api_error: ApiError, status: int = None):
     super().__init__(api_error.message)
     self.message = api_error.message
     self.error_code = api_error.code
+    self.status = status
 
   def __str__(self):
     if self.error_code is not None:
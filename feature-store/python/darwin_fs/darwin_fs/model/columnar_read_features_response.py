@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+from typing import List, Any
+
+
+@dataclass
+class ColumnarReadFeaturesResponse:
+  """
+  read-features response decoded column wise.
+  data is a pandas DataFrame or pyarrow Table with one column per primary key and feature column.
+  """
+  feature_group_name: str
+  feature_group_version: str
+  data: Any
+  failed_keys: List[List[Any]]
@@ -0,0 +1,25 @@
+from dataclasses import dataclass
+from typing import List, Optional
+
+from dataclasses_json import dataclass_json, LetterCase
+
+
+@dataclass_json(letter_case=LetterCase.CAMEL, undefined="EXCLUDE")
+@dataclass
+class PointInTimeFeatureGroup:
+  """
+  feature group to join as of each event's timestamp.
+    timestamp_column: column of the offline feature group holding the time a row became valid,
+      same type and unit as the event timestamp column
+    feature_columns: columns to join, defaults to every column except primary keys and timestamp_column
+    join_keys: event columns matched to the feature group primary keys in order, defaults to the primary key names
+    max_age: ignore feature rows older than this, in seconds for timestamp columns or in the unit of numeric ones
+    prefix: prepended to the joined feature column names
+  """
+  feature_group_name: str
+  timestamp_column: str
+  feature_group_version: Optional[str] = None
+  feature_columns: Optional[List[str]] = None
+  join_keys: Optional[List[str]] = None
+  max_age: Optional[int] = None
+  prefix: Optional[str] = None
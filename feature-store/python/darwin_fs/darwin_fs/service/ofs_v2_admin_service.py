@@ -1,4 +1,4 @@
-import requests
+from typing import Dict, Optional
 
 from darwin_fs.config import *
 from darwin_fs.constant.constants import State
@@ -15,15 +15,69 @@ from darwin_fs.model.feature_group_schema import FeatureGroupSchema
 from darwin_fs.model.metadata_response import MetadataResponse
 from darwin_fs.model.version_metadata import VersionMetadata
 from darwin_fs.util.exception_utils import parse_api_exception
+from darwin_fs.util.http_session import get_session
+from darwin_fs.util.ttl_cache import TTLCache
+
+_SCHEMA = "schema"
+_FEATURE_GROUP_METADATA = "feature_group_metadata"
+_ENTITY_METADATA = "entity_metadata"
+_LATEST_VERSION = "latest_version"
+
+# lookups are keyed by (kind, name, ...) so they can be invalidated per feature group or entity
+_metadata_cache = TTLCache(DARWIN_FS_ADMIN_CACHE_TTL_SECONDS)
+# lookups of the latest version, which may change at any time, expire sooner
+_latest_cache = TTLCache(DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS)
+_pinned_versions: Dict[str, str] = {}
+
+
+def pin_feature_group_version(feature_group_name: str, feature_group_version: str) -> None:
+  """lookups of the feature group that do not specify a version use the pinned version instead of the latest one"""
+  _pinned_versions[feature_group_name] = feature_group_version
+
+
+def unpin_feature_group_version(feature_group_name: str) -> None:
+  _pinned_versions.pop(feature_group_name, None)
+
+
+def resolve_feature_group_version(feature_group_name: str, feature_group_version: Optional[str]) -> Optional[str]:
+  if feature_group_version is not None:
+    return feature_group_version
+  return _pinned_versions.get(feature_group_name)
+
+
+def invalidate_feature_group(feature_group_name: str) -> None:
+  _metadata_cache.invalidate(lambda key: key[0] != _ENTITY_METADATA and key[1] == feature_group_name)
+  _latest_cache.invalidate(lambda key: key[1] == feature_group_name)
+
+
+def invalidate_entity(entity_name: str) -> None:
+  _metadata_cache.invalidate(lambda key: key[0] == _ENTITY_METADATA and key[1] == entity_name)
+
+
+def clear_metadata_cache() -> None:
+  _metadata_cache.clear()
+  _latest_cache.clear()
+
+
+def _cache_for(feature_group_version: Optional[str]) -> TTLCache:
+  return _latest_cache if feature_group_version is None else _metadata_cache
 
 
 def get_feature_group_schema(feature_group_name: str, feature_group_version: None) -> FeatureGroupSchema:
+  feature_group_version = resolve_feature_group_version(feature_group_name, feature_group_version)
+  return _cache_for(feature_group_version).get_or_load(
+    (_SCHEMA, feature_group_name, feature_group_version),
+    lambda: _fetch_feature_group_schema(feature_group_name, feature_group_version),
+  )
+
+
+def _fetch_feature_group_schema(feature_group_name: str, feature_group_version: None) -> FeatureGroupSchema:
   url = DARWIN_OFS_V2_ADMIN_HOST + DARWIN_OFS_V2_ADMIN_FG_SCHEMA_ENDPOINT
   params = {"name": feature_group_name}
   if feature_group_version is not None:
     params["version"] = feature_group_version
 
-  response = requests.request("GET", url, params=params)
+  response = get_session().request("GET", url, params=params)
   if response.status_code != 200:
     parse_api_exception(response)
 
@@ -31,12 +85,20 @@ def get_feature_group_schema(feature_group_name: str, feature_group_version: Non
 
 
 def get_feature_group_metadata(feature_group_name: str, feature_group_version: None) -> FeatureGroupMetadata:
+  feature_group_version = resolve_feature_group_version(feature_group_name, feature_group_version)
+  return _cache_for(feature_group_version).get_or_load(
+    (_FEATURE_GROUP_METADATA, feature_group_name, feature_group_version),
+    lambda: _fetch_feature_group_metadata(feature_group_name, feature_group_version),
+  )
+
+
+def _fetch_feature_group_metadata(feature_group_name: str, feature_group_version: None) -> FeatureGroupMetadata:
   url = DARWIN_OFS_V2_ADMIN_HOST + DARWIN_OFS_V2_ADMIN_FG_METADATA_ENDPOINT
   params = {"name": feature_group_name}
   if feature_group_version is not None:
     params["version"] = feature_group_version
 
-  response = requests.request("GET", url, params=params)
+  response = get_session().request("GET", url, params=params)
   if response.status_code != 200:
     parse_api_exception(response)
   metadata = MetadataResponse.from_dict(DataResponse.from_dict(response.json()).data).metadata
@@ -44,10 +106,14 @@ def get_feature_group_metadata(feature_group_name: str, feature_group_version: N
 
 
 def get_entity_metadata(entity_name: str) -> EntityMetadata:
+  return _metadata_cache.get_or_load((_ENTITY_METADATA, entity_name), lambda: _fetch_entity_metadata(entity_name))
+
+
+def _fetch_entity_metadata(entity_name: str) -> EntityMetadata:
   url = DARWIN_OFS_V2_ADMIN_HOST + DARWIN_OFS_V2_ADMIN_ENTITY_METADATA_ENDPOINT
   params = {"name": entity_name}
 
-  response = requests.request("GET", url, params=params)
+  response = get_session().request("GET", url, params=params)
   if response.status_code != 200:
     parse_api_exception(response)
   metadata = MetadataResponse.from_dict(DataResponse.from_dict(response.json()).data).metadata
@@ -57,7 +123,8 @@ def get_entity_metadata(entity_name: str) -> EntityMetadata:
 def create_entity(create_entity_request: CreateEntityRequest) -> Entity:
   url = DARWIN_OFS_V2_ADMIN_HOST + DARWIN_OFS_V2_ADMIN_ENTITY_ENDPOINT
 
-  response = requests.request("POST", url, json=create_entity_request.to_dict())
+  response = get_session().request("POST", url, json=create_entity_request.to_dict())
+  invalidate_entity(create_entity_request.entity.table_name)
   if response.status_code != 200:
     parse_api_exception(response)
 
@@ -70,7 +137,8 @@ def create_feature_group(create_feature_group_request: CreateFeatureGroupRequest
   headers = {}
   if upgrade:
     headers = {"upgrade": "true"}
-  response = requests.request("POST", url, json=create_feature_group_request.to_dict(), headers=headers)
+  response = get_session().request("POST", url, json=create_feature_group_request.to_dict(), headers=headers)
+  invalidate_feature_group(create_feature_group_request.feature_group.feature_group_name)
   if response.status_code != 200:
     parse_api_exception(response)
   create_response = CreateFeatureGroupResponse.from_dict(DataResponse.from_dict(response.json()).data)
@@ -78,10 +146,15 @@ def create_feature_group(create_feature_group_request: CreateFeatureGroupRequest
 
 
 def get_feature_group_latest_version(feature_group_name: str) -> VersionMetadata:
+  return _latest_cache.get_or_load((_LATEST_VERSION, feature_group_name),
+                                   lambda: _fetch_feature_group_latest_version(feature_group_name))
+
+
+def _fetch_feature_group_latest_version(feature_group_name: str) -> VersionMetadata:
   url = DARWIN_OFS_V2_ADMIN_HOST + DARWIN_OFS_V2_ADMIN_FG_LATEST_VERSION_ENDPOINT
   params = {"name": feature_group_name}
 
-  response = requests.request("GET", url, params=params)
+  response = get_session().request("GET", url, params=params)
   if response.status_code != 200:
     parse_api_exception(response)
 
@@ -97,6 +170,7 @@ def update_feature_group_state(state: State, feature_group_name: str, feature_gr
   body = {
     "state": state
   }
-  response = requests.request("PUT", url, params=params, json=body)
+  response = get_session().request("PUT", url, params=params, json=body)
+  invalidate_feature_group(feature_group_name)
   if response.status_code != 200:
     parse_api_exception(response)
@@ -1,14 +1,27 @@
+import asyncio
 import json
+import logging
+import random
+from typing import List, Any, Union
 
-from aiohttp import ClientSession
+from aiohttp import ClientSession, ClientError
 
 from darwin_fs.config import *
+from darwin_fs.exception import ApiException
+from darwin_fs.model.columnar_read_features_response import ColumnarReadFeaturesResponse
 from darwin_fs.model.data_response import DataResponse
+from darwin_fs.model.primary_keys import PrimaryKeys
 from darwin_fs.model.read_features_request import ReadFeaturesRequest
 from darwin_fs.model.read_features_response import ReadFeaturesResponse
 from darwin_fs.model.write_features_request import WriteFeaturesRequest
 from darwin_fs.model.write_features_response import WriteFeaturesResponse
-from darwin_fs.util.exception_utils import parse_api_exception
+from darwin_fs.util.columnar_utils import decode_read_features_columnar, empty_columnar_response, \
+  concat_columnar_responses, validate_output_format
+from darwin_fs.util.exception_utils import parse_api_exception_async
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = (429, 500, 502, 503, 504)
 
 
 async def feature_group_write_features(client: ClientSession, write_features_request: WriteFeaturesRequest) -> WriteFeaturesResponse:
@@ -16,18 +29,96 @@ async def feature_group_write_features(client: ClientSession, write_features_req
 
   response = await client.request("POST", url, json=write_features_request.to_dict())
   if response.status != 200:
-    parse_api_exception(response)
+    await parse_api_exception_async(response)
 
   response_body = await response.read()
   return WriteFeaturesResponse.from_dict(DataResponse.from_dict(json.loads(response_body)).data)
 
 
-async def feature_group_read_features(client: ClientSession, read_features_request: ReadFeaturesRequest) -> ReadFeaturesResponse:
+async def feature_group_read_features(client: ClientSession, read_features_request: ReadFeaturesRequest,
+                                      output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  if output_format is not None:
+    validate_output_format(output_format)
   url = DARWIN_OFS_V2_HOST + DARWIN_OFS_V2_FG_READ_ENDPOINT
 
   response = await client.request("GET", url, json=read_features_request.to_dict())
   if response.status != 200:
-    parse_api_exception(response)
+    await parse_api_exception_async(response)
 
   response_body = await response.read()
+  if output_format is not None:
+    return decode_read_features_columnar(response_body, read_features_request, output_format)
   return ReadFeaturesResponse.from_dict(DataResponse.from_dict(json.loads(response_body)).data)
+
+
+async def feature_group_bulk_read_features(client: ClientSession, read_features_request: ReadFeaturesRequest,
+                                           chunk_size: int = DARWIN_FS_BULK_READ_CHUNK_SIZE,
+                                           max_concurrency: int = DARWIN_FS_BULK_READ_MAX_CONCURRENCY,
+                                           max_retries: int = DARWIN_FS_BULK_READ_MAX_RETRIES,
+                                           output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  """
+  splits the keys of the request into chunks of chunk_size and reads them concurrently,
+  with at most max_concurrency reads in flight.
+  a chunk failing with a connection error, timeout or retryable status is retried with jittered backoff,
+  once its retries are exhausted its keys are reported as failed keys of the merged response.
+  any other api error is raised as is since it would fail every chunk alike.
+  """
+  if chunk_size < 1 or max_concurrency < 1:
+    raise ValueError("chunk_size and max_concurrency must be at least 1")
+  if output_format is not None:
+    validate_output_format(output_format)
+
+  key_values = read_features_request.primary_keys.values
+  chunks = [key_values[i:i + chunk_size] for i in range(0, len(key_values), chunk_size)]
+  semaphore = asyncio.Semaphore(max_concurrency)
+
+  async def read_chunk(chunk: List[List[Any]]):
+    chunk_request = ReadFeaturesRequest(
+      feature_group_name=read_features_request.feature_group_name,
+      feature_columns=read_features_request.feature_columns,
+      primary_keys=PrimaryKeys(names=read_features_request.primary_keys.names, values=chunk),
+      feature_group_version=read_features_request.feature_group_version,
+    )
+    attempt = 0
+    async with semaphore:
+      while True:
+        try:
+          return await feature_group_read_features(client, chunk_request, output_format)
+        except (ClientError, asyncio.TimeoutError, ApiException) as e:
+          if isinstance(e, ApiException) and e.status not in RETRYABLE_STATUS_CODES:
+            raise e
+          if attempt >= max_retries:
+            logger.warning(f"failed reading {len(chunk)} keys of feature-group {read_features_request.feature_group_name} "
+                           f"after {attempt + 1} attempts: {e}")
+            if output_format is not None:
+              return empty_columnar_response(chunk_request, output_format, failed_keys=chunk)
+            return ReadFeaturesResponse(
+              feature_group_name=read_features_request.feature_group_name,
+              feature_group_version=read_features_request.feature_group_version,
+              successful_keys=[],
+              failed_keys=chunk,
+            )
+          await asyncio.sleep(random.uniform(0, DARWIN_FS_BULK_READ_RETRY_BACKOFF_SECONDS * (2 ** attempt)))
+          attempt += 1
+
+  tasks = [asyncio.ensure_future(read_chunk(chunk)) for chunk in chunks]
+  try:
+    responses = await asyncio.gather(*tasks)
+  except BaseException:
+    for task in tasks:
+      task.cancel()
+    raise
+
+  if output_format is not None:
+    return concat_columnar_responses(responses, read_features_request, output_format)
+
+  feature_group_version = next(
+    (response.feature_group_version for response in responses if response.successful_keys),
+    read_features_request.feature_group_version,
+  )
+  return ReadFeaturesResponse(
+    feature_group_name=read_features_request.feature_group_name,
+    feature_group_version=feature_group_version,
+    successful_keys=[key for response in responses for key in response.successful_keys],
+    failed_keys=[key for response in responses for key in response.failed_keys],
+  )
@@ -1,29 +1,37 @@
-import requests
+from typing import Union
 
 from darwin_fs.config import *
+from darwin_fs.model.columnar_read_features_response import ColumnarReadFeaturesResponse
 from darwin_fs.model.data_response import DataResponse
 from darwin_fs.model.read_features_request import ReadFeaturesRequest
 from darwin_fs.model.read_features_response import ReadFeaturesResponse
 from darwin_fs.model.write_features_request import WriteFeaturesRequest
 from darwin_fs.model.write_features_response import WriteFeaturesResponse
+from darwin_fs.util.columnar_utils import decode_read_features_columnar, validate_output_format
 from darwin_fs.util.exception_utils import parse_api_exception
+from darwin_fs.util.http_session import get_session
 
 
 def feature_group_write_features(write_features_request: WriteFeaturesRequest) -> WriteFeaturesResponse:
   url = DARWIN_OFS_V2_WRITER_HOST + DARWIN_OFS_V2_FG_WRITE_V2_ENDPOINT
 
-  response = requests.request("POST", url, json=write_features_request.to_dict())
+  response = get_session().request("POST", url, json=write_features_request.to_dict())
   if response.status_code != 200:
     parse_api_exception(response)
 
   return WriteFeaturesResponse.from_dict(DataResponse.from_dict(response.json()).data)
 
 
-def feature_group_read_features(read_features_request: ReadFeaturesRequest) -> ReadFeaturesResponse:
+def feature_group_read_features(read_features_request: ReadFeaturesRequest,
+                                output_format: str = None) -> Union[ReadFeaturesResponse, ColumnarReadFeaturesResponse]:
+  if output_format is not None:
+    validate_output_format(output_format)
   url = DARWIN_OFS_V2_HOST + DARWIN_OFS_V2_FG_READ_ENDPOINT
 
-  response = requests.request("GET", url, json=read_features_request.to_dict())
+  response = get_session().request("GET", url, json=read_features_request.to_dict())
   if response.status_code != 200:
     parse_api_exception(response)
 
+  if output_format is not None:
+    return decode_read_features_columnar(response.content, read_features_request, output_format)
   return ReadFeaturesResponse.from_dict(DataResponse.from_dict(response.json()).data)
@@ -0,0 +1,197 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, List, Optional
+
+from pyspark.sql import Column, DataFrame, Window
+from pyspark.sql import functions as F
+from pyspark.sql.types import DataType as SparkDataType, DateType, TimestampType
+
+from darwin_fs.constant.constants import PointInTimeJoinStrategy
+from darwin_fs.exception import SparkWriterException
+from darwin_fs.service import spark_service
+
+_EVENT_ID = "__ofs_event_id"
+_IS_EVENT = "__ofs_is_event"
+_TS = "__ofs_ts"
+_BUCKET = "__ofs_bucket"
+_FEATURE_BUCKET = "__ofs_feature_bucket"
+_FEATURE_TS = "__ofs_feature_ts"
+_FEATURES = "__ofs_features"
+_ROW_NUMBER = "__ofs_row_number"
+_TIE_BREAK = "__ofs_tie_break"
+
+
+@dataclass
+class ResolvedFeatureGroup:
+  feature_group_name: str
+  feature_group_version: str
+  timestamp_column: str
+  primary_keys: List[str]
+  join_keys: List[str]
+  feature_columns: List[str]
+  max_age: Optional[int]
+  prefix: str
+
+  def output_column(self, feature_column: str) -> str:
+    return f"{self.prefix}{feature_column}"
+
+
+def point_in_time_join(events: DataFrame, event_timestamp_column: str, feature_groups: List[ResolvedFeatureGroup],
+                       strategy: PointInTimeJoinStrategy = PointInTimeJoinStrategy.AUTO) -> DataFrame:
+  """
+  joins each feature group to events as of the event timestamp, i.e. the latest feature row with
+  timestamp <= event timestamp (and within max_age if given) for the event's keys.
+
+  every feature group is read only for the time range spanned by the events (minus max_age),
+  with only the needed columns, so delta prunes partitions and files before anything is shuffled.
+  - range_bucket (needs max_age): feature rows are bucketed by max_age wide time ranges and equi-joined on
+    (keys, bucket) so only candidate rows of the same or previous bucket meet, the latest candidate is kept
+  - sort_merge: events and feature rows are co-partitioned by key, sorted by time and the last feature row
+    seen before each event is carried forward, one shuffle of the pruned data and no join fan out
+  auto picks range_bucket when max_age is set and sort_merge otherwise.
+  rows of events are never dropped, features are null when nothing matches.
+  feature rows of a key sharing the latest timestamp are tied, both strategies keep the one whose feature values
+  sort last as json so the result does not depend on the strategy or on the order rows are read in.
+  range_bucket tags events with monotonically_increasing_id, so events should be deterministic or cached.
+  """
+  event_timestamp_type = events.schema[event_timestamp_column].dataType
+  bounds = events.agg(F.min(event_timestamp_column), F.max(event_timestamp_column)).first()
+  min_event_ts, max_event_ts = bounds[0], bounds[1]
+
+  result = events
+  for feature_group in feature_groups:
+    _check_output_columns(result, feature_group)
+    features = _read_feature_group(events.sparkSession, feature_group, min_event_ts, max_event_ts)
+    if _use_range_bucket(strategy, feature_group):
+      result = _range_bucket_as_of_join(result, event_timestamp_column, event_timestamp_type, features, feature_group)
+    else:
+      result = _sort_merge_as_of_join(result, event_timestamp_column, event_timestamp_type, features, feature_group)
+  return result
+
+
+def _use_range_bucket(strategy: PointInTimeJoinStrategy, feature_group: ResolvedFeatureGroup) -> bool:
+  if strategy == PointInTimeJoinStrategy.RANGE_BUCKET:
+    if feature_group.max_age is None:
+      raise SparkWriterException(f"range_bucket point in time join of feature-group {feature_group.feature_group_name} needs max_age",
+                                 "OFS_POINT_IN_TIME_JOIN_EXCEPTION")
+    return True
+  if strategy == PointInTimeJoinStrategy.SORT_MERGE:
+    return False
+  return feature_group.max_age is not None
+
+
+def _check_output_columns(events: DataFrame, feature_group: ResolvedFeatureGroup) -> None:
+  clashes = [feature_group.output_column(c) for c in feature_group.feature_columns
+             if feature_group.output_column(c) in events.columns]
+  if clashes:
+    raise SparkWriterException(f"feature columns {clashes} of feature-group {feature_group.feature_group_name} already exist "
+                               f"in events, set a prefix", "OFS_POINT_IN_TIME_JOIN_EXCEPTION")
+
+
+def _read_feature_group(spark, feature_group: ResolvedFeatureGroup, min_event_ts: Any, max_event_ts: Any) -> DataFrame:
+  filters = []
+  ts = F.col(feature_group.timestamp_column)
+  if max_event_ts is not None:
+    filters.append(ts <= F.lit(max_event_ts))
+  if min_event_ts is not None and feature_group.max_age is not None:
+    filters.append(ts >= F.lit(_subtract_age(min_event_ts, feature_group.max_age)))
+
+  columns = list(dict.fromkeys(feature_group.primary_keys + [feature_group.timestamp_column] + feature_group.feature_columns))
+  return spark_service.read_offline_features(spark, feature_group.feature_group_name, feature_group.feature_group_version,
+                                             columns=columns, filters=filters)
+
+
+def _subtract_age(value: Any, max_age: int) -> Any:
+  if isinstance(value, (datetime, date)):
+    return value - timedelta(seconds=max_age)
+  return value - max_age
+
+
+def _epoch(column: Column, data_type: SparkDataType) -> Column:
+  # fractional seconds are kept, a feature row later in the same second must not be seen as at or before the event
+  if isinstance(data_type, TimestampType):
+    return column.cast("double")
+  if isinstance(data_type, DateType):
+    return F.unix_timestamp(column)
+  return column
+
+
+def _renamed_features(feature_group: ResolvedFeatureGroup) -> List[Column]:
+  return [F.col(c).alias(feature_group.output_column(c)) for c in feature_group.feature_columns]
+
+
+def _tie_break(feature_group: ResolvedFeatureGroup) -> Column:
+  return F.to_json(F.struct(*_renamed_features(feature_group)))
+
+
+def _sort_merge_as_of_join(events: DataFrame, event_timestamp_column: str, event_timestamp_type: SparkDataType,
+                           features: DataFrame, feature_group: ResolvedFeatureGroup) -> DataFrame:
+  keys = feature_group.join_keys
+  feature_ts_type = features.schema[feature_group.timestamp_column].dataType
+  # features travel as one struct so a null feature value is not mistaken for a missing row
+  feature_rows = features.select(
+    *[F.col(pk).alias(key) for pk, key in zip(feature_group.primary_keys, keys)],
+    F.col(feature_group.timestamp_column).alias(_TS),
+    _tie_break(feature_group).alias(_TIE_BREAK),
+    F.struct(F.col(feature_group.timestamp_column).alias(_FEATURE_TS), *_renamed_features(feature_group)).alias(_FEATURES),
+    F.lit(0).alias(_IS_EVENT),
+  )
+  event_rows = events \
+    .withColumn(_TS, F.col(event_timestamp_column)) \
+    .withColumn(_IS_EVENT, F.lit(1)) \
+    .withColumn(_FEATURES, F.lit(None).cast(feature_rows.schema[_FEATURES].dataType))
+
+  # a feature row at the same timestamp as an event sorts before it and is visible to it,
+  # of tied feature rows the last one in tie break order is carried forward
+  window = Window.partitionBy(*keys).orderBy(_TS, _IS_EVENT, _TIE_BREAK) \
+    .rowsBetween(Window.unboundedPreceding, Window.currentRow)
+  joined = event_rows.unionByName(feature_rows, allowMissingColumns=True) \
+    .withColumn(_FEATURES, F.last(_FEATURES, ignorenulls=True).over(window)) \
+    .where(F.col(_IS_EVENT) == 1)
+
+  feature_ts = F.col(_FEATURES).getField(_FEATURE_TS)
+  valid = feature_ts.isNotNull()
+  if feature_group.max_age is not None:
+    valid = valid & (_epoch(F.col(event_timestamp_column), event_timestamp_type) - _epoch(feature_ts, feature_ts_type)
+                     <= F.lit(feature_group.max_age))
+  feature_columns = [F.when(valid, F.col(_FEATURES).getField(feature_group.output_column(c))).alias(feature_group.output_column(c))
+                     for c in feature_group.feature_columns]
+  return joined.select(*[F.col(c) for c in events.columns], *feature_columns)
+
+
+def _range_bucket_as_of_join(events: DataFrame, event_timestamp_column: str, event_timestamp_type: SparkDataType,
+                             features: DataFrame, feature_group: ResolvedFeatureGroup) -> DataFrame:
+  keys = feature_group.join_keys
+  bucket_size = feature_group.max_age
+  feature_ts_type = features.schema[feature_group.timestamp_column].dataType
+  feature_key_names = [f"__ofs_key_{i}" for i in range(len(keys))]
+
+  # a feature row at t can serve events in [t, t + max_age], which lie in its own bucket or the next one
+  feature_bucket = F.floor(_epoch(F.col(feature_group.timestamp_column), feature_ts_type) / bucket_size)
+  feature_rows = features.select(
+    *[F.col(pk).alias(name) for pk, name in zip(feature_group.primary_keys, feature_key_names)],
+    F.explode(F.array(feature_bucket, feature_bucket + 1)).alias(_FEATURE_BUCKET),
+    F.col(feature_group.timestamp_column).alias(_FEATURE_TS),
+    _tie_break(feature_group).alias(_TIE_BREAK),
+    *_renamed_features(feature_group),
+  )
+  event_rows = events \
+    .withColumn(_EVENT_ID, F.monotonically_increasing_id()) \
+    .withColumn(_BUCKET, F.floor(_epoch(F.col(event_timestamp_column), event_timestamp_type) / bucket_size))
+
+  event_epoch = _epoch(event_rows[event_timestamp_column], event_timestamp_type)
+  feature_epoch = _epoch(feature_rows[_FEATURE_TS], feature_ts_type)
+  condition = [event_rows[key] == feature_rows[name] for key, name in zip(keys, feature_key_names)]
+  condition += [
+    event_rows[_BUCKET] == feature_rows[_FEATURE_BUCKET],
+    feature_epoch <= event_epoch,
+    event_epoch - feature_epoch <= F.lit(bucket_size),
+  ]
+  joined = event_rows.join(feature_rows, on=condition, how="left")
+
+  # partitioned like the join output (keys, bucket), so keeping the latest candidate needs no extra shuffle
+  window = Window.partitionBy(*keys, _BUCKET, _EVENT_ID).orderBy(F.col(_FEATURE_TS).desc_nulls_last(),
+                                                                 F.col(_TIE_BREAK).desc_nulls_last())
+  latest = joined.withColumn(_ROW_NUMBER, F.row_number().over(window)).where(F.col(_ROW_NUMBER) == 1)
+  return latest.select(*[F.col(c) for c in events.columns],
+                       *[F.col(feature_group.output_column(c)) for c in feature_group.feature_columns])
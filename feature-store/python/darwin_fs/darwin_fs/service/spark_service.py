@@ -1,12 +1,18 @@
 import json
 import logging
 import re
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from os import environ
+from typing import Any, Dict, List, Tuple, Union
 
-from pyspark import SparkContext
+from pyspark import SparkContext, StorageLevel
 from pyspark.sql import DataFrame
-from pyspark.sql import SparkSession
+from pyspark.sql import SparkSession, Column
+from pyspark.sql import functions as F
 from pyspark.sql.types import StructType
 
 from darwin_fs import config
@@ -16,6 +22,10 @@ from darwin_fs.util.http_utils import remove_proto_from_url
 
 logger = logging.getLogger(__name__)
 
+# latest delta table version per table path, kept per spark session
+_latest_version_cache: "weakref.WeakKeyDictionary[SparkSession, Dict[str, Tuple[int, float]]]" = weakref.WeakKeyDictionary()
+_latest_version_cache_lock = threading.Lock()
+
 
 def write_online_features(df: DataFrame, feature_group_name: str, feature_group_version: str, run_id: str) -> str:
   try:
@@ -57,43 +67,149 @@ def write_offline_features(df: DataFrame, feature_group_name: str, feature_group
       .format("delta") \
       .mode(mode) \
       .save(table_path)
+    invalidate_delta_table_version_cache(df.sparkSession, feature_group_name, feature_group_version)
   except Exception as e:
     logger.debug(f"error writing data to offline feature store: {str(e)}")
     raise SparkWriterException(f"error writing data to offline feature store: {e}", "OFS_OFFLINE_WRITE_EXCEPTION")
 
 
+def write_online_and_offline_features(df: DataFrame, feature_group_name: str, feature_group_version: str, run_id: str,
+                                      schema: StructType, mode: str, write_online: bool, parallel: bool = False) -> None:
+  """
+  runs the online (if write_online) and offline sinks over the same dataframe, which should already be persisted
+  so neither sink recomputes its lineage. with parallel both sinks are submitted as concurrent spark jobs.
+  """
+  def online_sink():
+    write_online_features(df, feature_group_name, feature_group_version, run_id)
+
+  def offline_sink():
+    write_offline_features(df, feature_group_name, feature_group_version, schema, mode)
+
+  sinks = [online_sink, offline_sink] if write_online else [offline_sink]
+  if not parallel or len(sinks) == 1:
+    for sink in sinks:
+      sink()
+    return
+
+  with ThreadPoolExecutor(max_workers=len(sinks), thread_name_prefix="ofs-sink") as executor:
+    futures = [executor.submit(sink) for sink in sinks]
+  # wait for both sinks before raising, the first failure in sink order is surfaced
+  for future in futures:
+    future.result()
+
+
+def persist_for_write(df: DataFrame) -> (DataFrame, bool):
+  """
+  persists df unless the caller already did, returns the dataframe and whether it was persisted here
+  and so has to be unpersisted once the write is done
+  """
+  # StorageLevel has no __eq__, a dataframe is cached when it uses memory or disk
+  current_level = df.storageLevel
+  if current_level.useMemory or current_level.useDisk:
+    return df, False
+  storage_level = getattr(StorageLevel, config.DARWIN_FS_WRITE_STORAGE_LEVEL)
+  return df.persist(storage_level), True
+
+
 def read_offline_features(spark: SparkSession, feature_group_name: str, feature_group_version: str, delta_table_version: int = None,
-                          timestamp: int = None) -> DataFrame:
+                          timestamp: int = None, columns: List[str] = None, filters: List[Union[str, Column]] = None,
+                          time_column: str = None, start_time: Any = None, end_time: Any = None,
+                          entity_keys: Dict[str, List[Any]] = None) -> DataFrame:
   s3_base_path = DARWIN_OFS_V2_OFFLINE_STORE_BASE_S3_PATH
   if delta_table_version is not None and timestamp is not None:
     raise SparkWriterException(f"error reading data to offline feature store: at most one of 'delta-table-version' or 'timestamp' can be "
                                f"specified",
                                "OFS_OFFLINE_READ_EXCEPTION")
+  if (start_time is not None or end_time is not None) and time_column is None:
+    raise SparkWriterException(f"error reading data to offline feature store: 'time-column' is required with 'start-time' or 'end-time'",
+                               "OFS_OFFLINE_READ_EXCEPTION")
 
   path = _get_offline_table_path(feature_group_name, feature_group_version, s3_base_path)
-  try:
-    latest_version = _get_delta_table_latest_version(spark, path)
-  except Exception as e:
-    raise SparkWriterException(f"error fetching latest delta table version: {e}", "OFS_OF"
-                                                                                  "FLINE_READ_EXCEPTION")
   try:
     reader = spark.read \
       .format("delta")
 
     if timestamp is not None:
+      # delta rejects a read pinned to both a timestamp and a version
       reader.option("timestampAsOf", timestamp)
-
-    if delta_table_version is not None and 0 <= delta_table_version <= latest_version:
-      reader.option("versionAsOf", delta_table_version)
     else:
-      reader.option("versionAsOf", latest_version)
-
-    return reader.load(path)
+      reader.option("versionAsOf", _resolve_delta_table_version(spark, path, delta_table_version))
+
+    df = reader.load(path)
+    # applied right on the scan so delta prunes partitions and files and parquet skips unused columns and row groups
+    df = _apply_offline_read_pushdown(df, columns, filters, time_column, start_time, end_time, entity_keys)
+    return df
+  except SparkWriterException as spark_writer_exception:
+    raise spark_writer_exception
   except Exception as e:
     logger.debug(f"error reading data to offline feature store: {str(e)}")
     raise SparkWriterException(f"error reading data to offline feature store: {e}", "OFS_OFFLINE_READ_EXCEPTION")
 
 
+def _resolve_delta_table_version(spark: SparkSession, path: str, delta_table_version: int = None) -> int:
+  try:
+    latest_version = _get_cached_delta_table_latest_version(spark, path)
+  except Exception as e:
+    raise SparkWriterException(f"error fetching latest delta table version: {e}", "OFS_OFFLINE_READ_EXCEPTION")
+  if delta_table_version is not None and 0 <= delta_table_version <= latest_version:
+    return delta_table_version
+  return latest_version
+
+
+def _apply_offline_read_pushdown(df: DataFrame, columns: List[str] = None, filters: List[Union[str, Column]] = None,
+                                 time_column: str = None, start_time: Any = None, end_time: Any = None,
+                                 entity_keys: Dict[str, List[Any]] = None) -> DataFrame:
+  for condition in filters or []:
+    df = df.where(condition)
+
+  if start_time is not None:
+    df = df.where(F.col(time_column) >= F.lit(start_time))
+  if end_time is not None:
+    df = df.where(F.col(time_column) < F.lit(end_time))
+
+  if entity_keys:
+    key_names = list(entity_keys.keys())
+    key_rows = list(zip(*(entity_keys[name] for name in key_names)))
+    if any(len(entity_keys[name]) != len(key_rows) for name in key_names):
+      raise SparkWriterException(f"error reading data to offline feature store: all 'entity-keys' columns must have the same length",
+                                 "OFS_OFFLINE_READ_EXCEPTION")
+    # isin per column is pushed down to the scan and prunes files by their column stats
+    for name in key_names:
+      df = df.where(F.col(name).isin(list(set(entity_keys[name]))))
+    if len(key_names) > 1:
+      # per column filters also match mixed combinations, keep only the exact composite keys
+      keys_df = df.sparkSession.createDataFrame(key_rows, schema=df.select(*key_names).schema)
+      df = df.join(F.broadcast(keys_df), on=key_names, how="left_semi")
+
+  if columns:
+    df = df.select(*columns)
+  return df
+
+
+def invalidate_delta_table_version_cache(spark: SparkSession, feature_group_name: str, feature_group_version: str) -> None:
+  path = _get_offline_table_path(feature_group_name, feature_group_version, DARWIN_OFS_V2_OFFLINE_STORE_BASE_S3_PATH)
+  with _latest_version_cache_lock:
+    _latest_version_cache.get(spark, {}).pop(path, None)
+
+
+def _get_cached_delta_table_latest_version(spark: SparkSession, path: str) -> int:
+  """latest delta table version, cached per spark session for DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS"""
+  ttl_seconds = config.DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS
+  if ttl_seconds <= 0:
+    return _get_delta_table_latest_version(spark, path)
+
+  with _latest_version_cache_lock:
+    entry = _latest_version_cache.get(spark, {}).get(path)
+  if entry is not None and time.monotonic() < entry[1]:
+    return entry[0]
+
+  latest_version = _get_delta_table_latest_version(spark, path)
+  if latest_version is not None:
+    with _latest_version_cache_lock:
+      _latest_version_cache.setdefault(spark, {})[path] = (latest_version, time.monotonic() + ttl_seconds)
+  return latest_version
+
+
 def _get_offline_table_path(feature_group_name: str, feature_group_version: str, s3_base_path: str) -> str:
   return f"{s3_base_path}/{feature_group_name}/{feature_group_version}/"
 
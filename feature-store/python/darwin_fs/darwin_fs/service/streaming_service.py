@@ -0,0 +1,141 @@
+import logging
+import uuid
+from datetime import datetime
+from typing import List
+
+from pyspark.sql import Column, DataFrame, Window
+from pyspark.sql import functions as F
+from pyspark.sql.streaming import StreamingQuery
+
+from darwin_fs import config
+from darwin_fs.exception import SparkWriterException
+from darwin_fs.service import spark_service
+
+logger = logging.getLogger(__name__)
+
+_FEATURE_HASH = "__ofs_feature_hash"
+_ROW_NUMBER = "__ofs_row_number"
+_LAST_WRITTEN_TABLE = "_ofs_last_written"
+
+
+def write_online_features_stream(df: DataFrame, feature_group_name: str, feature_group_version: str, primary_keys: List[str],
+                                 checkpoint_location: str, trigger_interval: str = None, available_now: bool = False,
+                                 skip_unchanged: bool = True, order_column: str = None, query_name: str = None) -> StreamingQuery:
+  """
+  starts a streaming query writing every micro-batch of df to the online store through the batch "ofs" writer.
+  - progress is checkpointed at checkpoint_location, a restarted query resumes from the last committed micro-batch
+  - a micro-batch keeps one row per primary key (the latest by order_column when given) and is written with a
+    run id derived from its batch id, so a replayed micro-batch upserts the same rows under the same run id
+  - with skip_unchanged a hash of the feature values last written per key is kept in a delta table under
+    checkpoint_location and rows whose values did not change are not written again
+  micro-batches run every trigger_interval (e.g. "1 minute"), or once over all available data with available_now.
+  rows per micro-batch are capped on the source, e.g. maxOffsetsPerTrigger for kafka or maxFilesPerTrigger for files.
+  """
+  if not df.isStreaming:
+    raise SparkWriterException(f"error writing stream to online feature store: df is not a streaming dataframe, use write_features",
+                               "OFS_ONLINE_STREAM_WRITE_EXCEPTION")
+  missing_keys = [key for key in primary_keys if key not in df.columns]
+  if missing_keys:
+    raise SparkWriterException(f"error writing stream to online feature store: primary keys {missing_keys} not in df",
+                               "OFS_ONLINE_STREAM_WRITE_EXCEPTION")
+  if order_column is not None and order_column not in df.columns:
+    raise SparkWriterException(f"error writing stream to online feature store: order column {order_column} not in df",
+                               "OFS_ONLINE_STREAM_WRITE_EXCEPTION")
+
+  query_name = query_name or f"ofs-{feature_group_name}-{feature_group_version}"
+  # the order column changes on every update of a key, it is written but does not count as a feature change
+  hashed_columns = [c for c in df.columns if c not in primary_keys and c != order_column]
+  last_written_path = f"{checkpoint_location.rstrip('/')}/{_LAST_WRITTEN_TABLE}"
+
+  def write_micro_batch(batch_df: DataFrame, batch_id: int) -> None:
+    _write_micro_batch(batch_df, batch_id, feature_group_name, feature_group_version, primary_keys, hashed_columns,
+                       order_column, skip_unchanged, last_written_path, query_name)
+
+  try:
+    writer = df.writeStream \
+      .queryName(query_name) \
+      .option("checkpointLocation", checkpoint_location) \
+      .foreachBatch(write_micro_batch)
+    if available_now:
+      writer = writer.trigger(availableNow=True)
+    else:
+      writer = writer.trigger(processingTime=trigger_interval or config.DARWIN_FS_STREAM_TRIGGER_INTERVAL)
+    return writer.start()
+  except Exception as e:
+    logger.debug(f"error starting stream to online feature store: {str(e)}")
+    raise SparkWriterException(f"error starting stream to online feature store: {e}", "OFS_ONLINE_STREAM_WRITE_EXCEPTION")
+
+
+def _write_micro_batch(batch_df: DataFrame, batch_id: int, feature_group_name: str, feature_group_version: str,
+                       primary_keys: List[str], hashed_columns: List[str], order_column: str, skip_unchanged: bool,
+                       last_written_path: str, query_name: str) -> None:
+  run_id = f"run-stream-{query_name}-{batch_id}"
+  start_time = int(datetime.now().timestamp())
+  rows = _latest_per_key(batch_df, primary_keys, order_column)
+  if skip_unchanged:
+    rows = rows.withColumn(_FEATURE_HASH, _feature_hash(hashed_columns))
+    spark_service._check_and_init_delta_table(rows.sparkSession, rows.select(*primary_keys, _FEATURE_HASH).schema,
+                                              last_written_path)
+    last_written = rows.sparkSession.read.format("delta").load(last_written_path)
+    # null safe, a null primary key equals itself as in the merge recording the written hashes
+    unchanged = [rows[c].eqNullSafe(last_written[c]) for c in primary_keys + [_FEATURE_HASH]]
+    rows = rows.join(last_written, on=unchanged, how="left_anti")
+
+  # the changed rows are both written and recorded, persisted so the last written table is read once
+  rows, persisted_here = spark_service.persist_for_write(rows)
+  try:
+    count = rows.count()
+    if count == 0:
+      logger.debug(f"skipping micro-batch {batch_id} of feature-group {feature_group_name}, no changed rows")
+      return
+
+    error: Exception = None
+    try:
+      spark_service.write_online_features(rows.drop(_FEATURE_HASH), feature_group_name, feature_group_version, run_id)
+      # recorded only after the write, a failure in between replays the micro-batch and writes its rows again
+      if skip_unchanged:
+        _merge_last_written(rows.select(*primary_keys, _FEATURE_HASH), primary_keys, last_written_path)
+    except Exception as e:
+      error = e
+      raise e
+    finally:
+      spark_service.put_feature_group_run_using_spark_jar(rows, feature_group_name=feature_group_name,
+                                                          feature_group_version=feature_group_version,
+                                                          run_id=run_id,
+                                                          time_taken=int(datetime.now().timestamp()) - start_time,
+                                                          count=count,
+                                                          error=error)
+  finally:
+    if persisted_here:
+      rows.unpersist()
+
+
+def _latest_per_key(df: DataFrame, primary_keys: List[str], order_column: str = None) -> DataFrame:
+  if order_column is None:
+    return df.dropDuplicates(primary_keys)
+  window = Window.partitionBy(*primary_keys).orderBy(F.col(order_column).desc_nulls_last())
+  return df.withColumn(_ROW_NUMBER, F.row_number().over(window)) \
+    .where(F.col(_ROW_NUMBER) == 1) \
+    .drop(_ROW_NUMBER)
+
+
+def _feature_hash(columns: List[str]) -> Column:
+  # hashed as json since xxhash64 skips null fields, (null, 1) and (1, null) would hash alike
+  return F.xxhash64(F.to_json(F.struct(*[F.col(c) for c in columns])))
+
+
+def _merge_last_written(hashes: DataFrame, primary_keys: List[str], last_written_path: str) -> None:
+  spark = hashes.sparkSession
+  view_name = f"__ofs_last_written_{uuid.uuid4().hex}"
+  hashes.createOrReplaceTempView(view_name)
+  condition = " AND ".join(f"target.`{key}` <=> source.`{key}`" for key in primary_keys)
+  try:
+    spark.sql(f"""
+      MERGE INTO delta.`{last_written_path}` AS target
+      USING {view_name} AS source
+      ON {condition}
+      WHEN MATCHED THEN UPDATE SET target.`{_FEATURE_HASH}` = source.`{_FEATURE_HASH}`
+      WHEN NOT MATCHED THEN INSERT *
+    """)
+  finally:
+    spark.catalog.dropTempView(view_name)
@@ -0,0 +1,103 @@
+import json
+from typing import List, Any, Dict
+
+from darwin_fs.constant.constants import ReadOutputFormat
+from darwin_fs.exception import SdkException
+from darwin_fs.model.columnar_read_features_response import ColumnarReadFeaturesResponse
+from darwin_fs.model.read_features_request import ReadFeaturesRequest
+
+try:
+  import pandas as pd
+except ImportError:
+  pd = None
+
+try:
+  import pyarrow as pa
+except ImportError:
+  pa = None
+
+
+def validate_output_format(output_format: str) -> ReadOutputFormat:
+  try:
+    output_format = ReadOutputFormat(output_format)
+  except ValueError:
+    raise SdkException(f"unsupported output format {output_format}, expected one of "
+                       f"{[f.value for f in ReadOutputFormat]}", "INVALID_OUTPUT_FORMAT")
+  if output_format == ReadOutputFormat.PANDAS and pd is None:
+    raise SdkException(f"unable to find pandas dependency\neither install it manually or use\n pip3 install ofs_sdk[pandas]",
+                       "DEPENDENCY_EXCEPTION")
+  if output_format == ReadOutputFormat.ARROW and pa is None:
+    raise SdkException(f"unable to find pyarrow dependency\neither install it manually or use\n pip3 install ofs_sdk[arrow]",
+                       "DEPENDENCY_EXCEPTION")
+  return output_format
+
+
+def decode_read_features_columnar(response_body: bytes, request: ReadFeaturesRequest,
+                                  output_format: str) -> ColumnarReadFeaturesResponse:
+  """
+  decodes a raw read-features response straight into columns,
+  without building a SuccessfulKey object per key.
+  """
+  output_format = validate_output_format(output_format)
+  data = json.loads(response_body)["data"]
+  successful_keys = data.get("successfulKeys") or []
+
+  columns: Dict[str, List[Any]] = {}
+  feature_columns = request.feature_columns
+  feature_values = list(zip(*(entry["features"] for entry in successful_keys)))
+  key_values = list(zip(*(entry["key"] for entry in successful_keys)))
+  for i, name in enumerate(request.primary_keys.names):
+    # primary keys requested as features are already part of the feature columns
+    if name not in feature_columns:
+      columns[name] = list(key_values[i]) if key_values else []
+  for i, name in enumerate(feature_columns):
+    columns[name] = list(feature_values[i]) if feature_values else []
+
+  return ColumnarReadFeaturesResponse(
+    feature_group_name=data.get("featureGroupName", request.feature_group_name),
+    feature_group_version=data.get("featureGroupVersion", request.feature_group_version),
+    data=_to_frame(columns, output_format),
+    failed_keys=data.get("failedKeys") or [],
+  )
+
+
+def empty_columnar_response(request: ReadFeaturesRequest, output_format: str,
+                            failed_keys: List[List[Any]]) -> ColumnarReadFeaturesResponse:
+  names = [name for name in request.primary_keys.names if name not in request.feature_columns]
+  columns = {name: [] for name in names + list(request.feature_columns)}
+  return ColumnarReadFeaturesResponse(
+    feature_group_name=request.feature_group_name,
+    feature_group_version=request.feature_group_version,
+    data=_to_frame(columns, validate_output_format(output_format)),
+    failed_keys=failed_keys,
+  )
+
+
+def concat_columnar_responses(responses: List[ColumnarReadFeaturesResponse], request: ReadFeaturesRequest,
+                              output_format: str) -> ColumnarReadFeaturesResponse:
+  output_format = validate_output_format(output_format)
+  frames = [response.data for response in responses if len(response.data) > 0]
+  failed_keys = [key for response in responses for key in response.failed_keys]
+  if not frames:
+    return empty_columnar_response(request, output_format, failed_keys)
+
+  if output_format == ReadOutputFormat.PANDAS:
+    data = pd.concat(frames, ignore_index=True)
+  else:
+    try:
+      data = pa.concat_tables(frames, promote_options="permissive")
+    except TypeError:
+      # pyarrow < 14
+      data = pa.concat_tables(frames, promote=True)
+  return ColumnarReadFeaturesResponse(
+    feature_group_name=request.feature_group_name,
+    feature_group_version=next(response.feature_group_version for response in responses if len(response.data) > 0),
+    data=data,
+    failed_keys=failed_keys,
+  )
+
+
+def _to_frame(columns: Dict[str, List[Any]], output_format: ReadOutputFormat):
+  if output_format == ReadOutputFormat.PANDAS:
+    return pd.DataFrame(columns)
+  return pa.table(columns)
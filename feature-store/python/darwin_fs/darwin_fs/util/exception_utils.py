@@ -1,4 +1,4 @@
-from darwin_fs.model.error_response import ErrorResponse
+from darwin_fs.model.error_response import ErrorResponse, ApiError
 from darwin_fs.exception import SdkException, ApiException
 
 
@@ -7,4 +7,14 @@ def parse_api_exception(response):
     error_response = ErrorResponse.from_dict(response.json())
   except Exception as e:
     raise SdkException(f"unknown exception while parsing api response form ofs: {e}\n\tresponse: {response.text}")
-  raise ApiException(error_response.error)
\ No newline at end of file
+  raise ApiException(error_response.error, response.status_code)
+
+
+async def parse_api_exception_async(response):
+  body = await response.text()
+  try:
+    error = ErrorResponse.from_json(body).error
+  except Exception as e:
+    # keep the http status of non ofs errors (e.g. a 503 from a load balancer) so callers can retry them
+    error = ApiError(message=f"unknown api response from ofs: {body}", code="UNKNOWN_API_ERROR", cause=str(e))
+  raise ApiException(error, response.status)
@@ -0,0 +1,83 @@
+import os
+import socket
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
+
+from darwin_fs.config import *
+
+# retried only for idempotent methods, a failed write is surfaced to the caller instead
+RETRY_STATUS_CODES = (502, 503, 504)
+RETRY_METHODS = frozenset({"GET", "HEAD", "PUT", "DELETE", "OPTIONS"})
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+  """HTTPAdapter that enables TCP keep-alive on pooled connections"""
+
+  def init_poolmanager(self, *args, **kwargs):
+    if DARWIN_FS_HTTP_TCP_KEEPALIVE:
+      kwargs["socket_options"] = HTTPConnection.default_socket_options + [
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+      ]
+    super().init_poolmanager(*args, **kwargs)
+
+
+def _create_session() -> requests.Session:
+  retry = Retry(
+    total=DARWIN_FS_HTTP_MAX_RETRIES,
+    backoff_factor=DARWIN_FS_HTTP_RETRY_BACKOFF_FACTOR,
+    status_forcelist=RETRY_STATUS_CODES,
+    allowed_methods=RETRY_METHODS,
+    # hand the last error response back so it is parsed into an ApiException as before
+    raise_on_status=False,
+  )
+  adapter = _KeepAliveAdapter(
+    pool_connections=DARWIN_FS_HTTP_POOL_CONNECTIONS,
+    pool_maxsize=DARWIN_FS_HTTP_POOL_MAXSIZE,
+    max_retries=retry,
+  )
+  session = requests.Session()
+  session.mount("http://", adapter)
+  session.mount("https://", adapter)
+  return session
+
+
+def get_session() -> requests.Session:
+  """
+  Process wide requests session shared by the sync ofs services.
+
+  Connections are kept alive and pooled per host, so repeated calls skip the tcp handshake.
+  The underlying urllib3 pools are thread safe, so one session serves all threads.
+  """
+  global _session
+  if _session is None:
+    with _session_lock:
+      if _session is None:
+        _session = _create_session()
+  return _session
+
+
+def close_session() -> None:
+  global _session
+  with _session_lock:
+    if _session is not None:
+      _session.close()
+      _session = None
+
+
+def _reset_session_after_fork() -> None:
+  # pooled sockets must not be shared with a forked child, e.g. spark python workers
+  global _session, _session_lock
+  _session = None
+  _session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+  os.register_at_fork(after_in_child=_reset_session_after_fork)
@@ -0,0 +1,41 @@
+import copy
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class TTLCache:
+  """
+  thread safe in process cache whose entries expire ttl_seconds after they are loaded.
+  failed loads are not cached and a ttl of 0 disables caching.
+  values are deep copied on the way out so callers can not mutate cached entries.
+  """
+
+  def __init__(self, ttl_seconds: float):
+    self.ttl_seconds = ttl_seconds
+    self._entries: Dict[Hashable, Tuple[Any, float]] = {}
+    self._lock = threading.Lock()
+
+  def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+    if self.ttl_seconds <= 0:
+      return loader()
+
+    with self._lock:
+      entry = self._entries.get(key)
+    if entry is not None and time.monotonic() < entry[1]:
+      return copy.deepcopy(entry[0])
+
+    # loaded outside the lock, concurrent misses of the same key may load it twice
+    value = loader()
+    with self._lock:
+      self._entries[key] = (value, time.monotonic() + self.ttl_seconds)
+    return copy.deepcopy(value)
+
+  def invalidate(self, predicate: Callable[[Hashable], bool]) -> None:
+    with self._lock:
+      for key in [key for key in self._entries if predicate(key)]:
+        del self._entries[key]
+
+  def clear(self) -> None:
+    with self._lock:
+      self._entries.clear()
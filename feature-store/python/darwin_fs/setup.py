@@ -3,14 +3,16 @@ from setuptools import setup, find_packages
 setup(
   name="darwin_fs",
   version="2.0.3",
-  packages=find_packages(),
+  packages=find_packages(exclude=["benchmark", "benchmark.*"]),
   install_requires=[
     "requests~=2.32.3", "pyyaml~=6.0.2", "dataclasses-json~=0.5.7"
   ],
   extras_require={
-    "all": ["pyspark>=3.3.1,<=3.5.4", "aiohttp>=3.7"],
+    "all": ["pyspark>=3.3.1,<=3.5.4", "aiohttp>=3.7", "pandas>=1.3", "pyarrow>=8.0"],
     "spark": ["pyspark>=3.3.1,<=3.5.4"],
     "async": ["aiohttp>=3.7"],
+    "pandas": ["pandas>=1.3"],
+    "arrow": ["pyarrow>=8.0"],
     "test": ["pyspark", "aiohttp>=3.7", "asyncio", "wiremock==2.6.1", "pytest", "pytest-asyncio", "testcontainers==4.9.1", "kafka-python",
              "boto3"]
   },
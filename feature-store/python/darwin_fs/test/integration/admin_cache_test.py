@@ -0,0 +1,163 @@
+from os import environ
+
+import pytest
+
+environ["sdk.python.environment"] = "test"
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+  from darwin_fs.util.ttl_cache import TTLCache
+
+  calls = []
+
+  def fetch_schema(name, version):
+    calls.append(("schema", name, version))
+    return {"name": name, "version": version, "calls": len(calls)}
+
+  def fetch_entity(name):
+    calls.append(("entity", name))
+    return {"name": name, "calls": len(calls)}
+
+  def fetch_latest_version(name):
+    calls.append(("latest_version", name))
+    return {"name": name, "calls": len(calls)}
+
+  monkeypatch.setattr(admin_service, "_metadata_cache", TTLCache(60))
+  monkeypatch.setattr(admin_service, "_latest_cache", TTLCache(60))
+  monkeypatch.setattr(admin_service, "_fetch_feature_group_schema", fetch_schema)
+  monkeypatch.setattr(admin_service, "_fetch_entity_metadata", fetch_entity)
+  monkeypatch.setattr(admin_service, "_fetch_feature_group_latest_version", fetch_latest_version)
+  yield calls
+  admin_service._pinned_versions.clear()
+
+
+def test_admin_cache_defaults():
+  from darwin_fs.config import DARWIN_FS_ADMIN_CACHE_TTL_SECONDS, DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+
+  if "DARWIN_FS_ADMIN_CACHE_TTL_SECONDS" not in environ:
+    assert DARWIN_FS_ADMIN_CACHE_TTL_SECONDS == 0
+    assert admin_service._metadata_cache.ttl_seconds == 0
+  if "DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS" not in environ:
+    assert DARWIN_FS_ADMIN_LATEST_CACHE_TTL_SECONDS == 10
+    assert admin_service._latest_cache.ttl_seconds == 10
+
+
+def test_admin_cache_caches_lookups_of_a_given_version(fetches):
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+
+  first = admin_service.get_feature_group_schema("fg", "v1")
+  first["name"] = "mutated"
+  second = admin_service.get_feature_group_schema("fg", "v1")
+
+  assert fetches == [("schema", "fg", "v1")]
+  assert second["name"] == "fg"
+
+
+def test_latest_version_lookups_use_their_own_cache(fetches, monkeypatch):
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+  from darwin_fs.util.ttl_cache import TTLCache
+
+  # caching a given version stays off, the latest version is still cached
+  monkeypatch.setattr(admin_service, "_metadata_cache", TTLCache(0))
+  for _ in range(2):
+    admin_service.get_feature_group_schema("fg", None)
+    admin_service.get_feature_group_latest_version("fg")
+    admin_service.get_feature_group_schema("fg", "v1")
+
+  assert fetches == [("schema", "fg", None), ("latest_version", "fg"), ("schema", "fg", "v1"), ("schema", "fg", "v1")]
+
+  monkeypatch.setattr(admin_service, "_latest_cache", TTLCache(0))
+  admin_service.get_feature_group_latest_version("fg")
+  admin_service.get_feature_group_latest_version("fg")
+  assert fetches.count(("latest_version", "fg")) == 3
+
+
+def test_feature_group_changes_invalidate_latest_version_lookups(fetches, monkeypatch):
+  from types import SimpleNamespace
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+
+  class Response:
+    status_code = 200
+
+    @staticmethod
+    def json():
+      return {"data": {"featureGroup": None, "version": "v2"}}
+
+  class Session:
+    def request(self, *args, **kwargs):
+      return Response()
+
+  monkeypatch.setattr(admin_service, "DARWIN_OFS_V2_ADMIN_HOST", "http://admin")
+  monkeypatch.setattr(admin_service, "get_session", lambda: Session())
+
+  def lookups():
+    admin_service.get_feature_group_latest_version("fg")
+    admin_service.get_feature_group_schema("fg", None)
+    admin_service.get_feature_group_latest_version("other_fg")
+
+  lookups()
+  admin_service.update_feature_group_state("ARCHIVED", "fg", "v1")
+  lookups()
+  admin_service.create_feature_group(SimpleNamespace(feature_group=SimpleNamespace(feature_group_name="fg"),
+                                                     to_dict=lambda: {}))
+  lookups()
+
+  assert fetches.count(("latest_version", "fg")) == 3
+  assert fetches.count(("schema", "fg", None)) == 3
+  assert fetches.count(("latest_version", "other_fg")) == 1
+
+
+def test_admin_cache_invalidation(fetches):
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+  from darwin_fs.client import invalidate_metadata_cache
+
+  admin_service.get_feature_group_schema("fg", "v1")
+  admin_service.get_feature_group_schema("other_fg", "v1")
+  admin_service.get_entity_metadata("fg")
+
+  invalidate_metadata_cache(feature_group_name="fg")
+  admin_service.get_feature_group_schema("fg", "v1")
+  admin_service.get_feature_group_schema("other_fg", "v1")
+  admin_service.get_entity_metadata("fg")
+  assert fetches.count(("schema", "fg", "v1")) == 2
+  assert fetches.count(("schema", "other_fg", "v1")) == 1
+  assert fetches.count(("entity", "fg")) == 1
+
+  invalidate_metadata_cache()
+  admin_service.get_feature_group_schema("other_fg", "v1")
+  admin_service.get_entity_metadata("fg")
+  assert fetches.count(("schema", "other_fg", "v1")) == 2
+  assert fetches.count(("entity", "fg")) == 2
+
+
+def test_pinned_version_is_used_when_no_version_is_given(fetches, monkeypatch):
+  import darwin_fs.service.ofs_v2_admin_service as admin_service
+  import darwin_fs.service.ofs_v2_service as ofs_service
+  from darwin_fs.client import pin_feature_group_version, unpin_feature_group_version, read_features
+  from darwin_fs.model.read_features_request import ReadFeaturesRequest
+
+  requests = []
+  monkeypatch.setattr(ofs_service, "feature_group_read_features",
+                      lambda request, output_format=None: requests.append(request))
+
+  pin_feature_group_version("fg", "v2")
+  admin_service.get_feature_group_schema("fg", None)
+  admin_service.get_feature_group_schema("fg", "v1")
+  read_features(ReadFeaturesRequest(feature_group_name="fg", feature_columns=["col1"], primary_keys=None))
+  read_features(ReadFeaturesRequest(feature_group_name="fg", feature_columns=["col1"], primary_keys=None,
+                                    feature_group_version="v1"))
+  # pinning one feature group leaves the others on their latest version
+  admin_service.get_feature_group_schema("other_fg", None)
+
+  assert fetches == [("schema", "fg", "v2"), ("schema", "fg", "v1"), ("schema", "other_fg", None)]
+  assert [request.feature_group_version for request in requests] == ["v2", "v1"]
+
+  unpin_feature_group_version("fg")
+  admin_service.get_feature_group_schema("fg", None)
+  read_features(ReadFeaturesRequest(feature_group_name="fg", feature_columns=["col1"], primary_keys=None))
+
+  assert fetches[-1] == ("schema", "fg", None)
+  assert requests[-1].feature_group_version is None
@@ -0,0 +1,93 @@
+import json
+from os import environ
+
+import pytest
+
+environ["sdk.python.environment"] = "test"
+
+
+def _request(primary_key_names=("id",), values=((1,), (2,)), feature_columns=("col1", "col2")):
+  from darwin_fs.model.primary_keys import PrimaryKeys
+  from darwin_fs.model.read_features_request import ReadFeaturesRequest
+
+  return ReadFeaturesRequest(feature_group_name="fg", feature_columns=list(feature_columns),
+                             primary_keys=PrimaryKeys(names=list(primary_key_names), values=[list(v) for v in values]),
+                             feature_group_version="v1")
+
+
+def _response_body(successful_keys, failed_keys=None):
+  return json.dumps({"data": {"featureGroupName": "fg", "featureGroupVersion": "v1",
+                              "successfulKeys": successful_keys, "failedKeys": failed_keys or []}}).encode()
+
+
+@pytest.mark.parametrize("output_format", ["pandas", "arrow"])
+def test_decode_read_features_columnar(output_format):
+  from darwin_fs.util.columnar_utils import decode_read_features_columnar
+
+  body = _response_body([{"key": [1], "features": ["a", 10]}, {"key": [2], "features": ["b", None]}], failed_keys=[[3]])
+
+  response = decode_read_features_columnar(body, _request(), output_format)
+
+  data = response.data if output_format == "pandas" else response.data.to_pandas()
+  assert list(data.columns) == ["id", "col1", "col2"]
+  assert data["id"].tolist() == [1, 2]
+  assert data["col1"].tolist() == ["a", "b"]
+  assert data["col2"].tolist()[0] == 10
+  assert response.failed_keys == [[3]]
+  assert response.feature_group_version == "v1"
+
+
+def test_decode_read_features_columnar_primary_key_requested_as_feature():
+  from darwin_fs.util.columnar_utils import decode_read_features_columnar
+
+  body = _response_body([{"key": [1], "features": [1, "a"]}])
+
+  response = decode_read_features_columnar(body, _request(feature_columns=("id", "col1")), "pandas")
+
+  assert list(response.data.columns) == ["id", "col1"]
+  assert response.data["id"].tolist() == [1]
+
+
+@pytest.mark.parametrize("output_format", ["pandas", "arrow"])
+def test_decode_read_features_columnar_without_successful_keys(output_format):
+  from darwin_fs.util.columnar_utils import decode_read_features_columnar
+
+  response = decode_read_features_columnar(_response_body([], failed_keys=[[1], [2]]), _request(), output_format)
+
+  assert len(response.data) == 0
+  assert list(response.data.column_names if output_format == "arrow" else response.data.columns) == ["id", "col1", "col2"]
+  assert response.failed_keys == [[1], [2]]
+
+
+@pytest.mark.parametrize("output_format", ["pandas", "arrow"])
+def test_concat_columnar_responses(output_format):
+  from darwin_fs.util.columnar_utils import decode_read_features_columnar, empty_columnar_response, \
+    concat_columnar_responses
+
+  request = _request()
+  responses = [
+    decode_read_features_columnar(_response_body([{"key": [1], "features": ["a", 10]}]), request, output_format),
+    empty_columnar_response(request, output_format, failed_keys=[[2]]),
+    decode_read_features_columnar(_response_body([{"key": [3], "features": ["c", 30]}]), request, output_format),
+  ]
+
+  response = concat_columnar_responses(responses, request, output_format)
+
+  data = response.data if output_format == "pandas" else response.data.to_pandas()
+  assert data["id"].tolist() == [1, 3]
+  assert data["col1"].tolist() == ["a", "c"]
+  assert response.failed_keys == [[2]]
+
+
+def test_invalid_output_format_fails_before_the_request(monkeypatch):
+  import darwin_fs.service.ofs_v2_service as ofs_service
+  from darwin_fs.exception import SdkException
+
+  def no_session():
+    raise AssertionError("read-features must not be called with an invalid output format")
+
+  monkeypatch.setattr(ofs_service, "get_session", no_session)
+
+  with pytest.raises(SdkException) as error:
+    ofs_service.feature_group_read_features(_request(), "csv")
+  assert "unsupported output format csv" in str(error.value)
@@ -282,3 +282,20 @@ async def test_read_features_with_version():
   expected = ReadFeaturesResponse.from_dict(expected_data.get('test_read_features_with_version').get('response'))
   assert type(features) == ReadFeaturesResponse
   assert features == expected
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures("init_wiremock_server")
+async def test_read_features_bulk():
+  from darwin_fs.model.read_features_request import ReadFeaturesRequest
+  from darwin_fs.model.read_features_response import ReadFeaturesResponse
+  from darwin_fs.client import read_features_bulk_async
+
+  request = ReadFeaturesRequest.from_dict(test_data.get('test_read_features_bulk').get('request'))
+
+  async with aiohttp.ClientSession() as session:
+    features = await read_features_bulk_async(session, request, chunk_size=1, max_concurrency=2)
+
+  expected = ReadFeaturesResponse.from_dict(expected_data.get('test_read_features_bulk').get('response'))
+  assert type(features) == ReadFeaturesResponse
+  assert features == expected
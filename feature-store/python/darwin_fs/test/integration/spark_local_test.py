@@ -0,0 +1,329 @@
+import os
+import re
+import threading
+from datetime import datetime, timedelta
+from os import environ
+
+import pytest
+from pyspark.sql import SparkSession
+from pyspark.sql import functions as F
+from pyspark.sql.types import StructType, StructField, IntegerType, StringType, TimestampType, DoubleType
+
+curr_dir = os.path.dirname(os.path.abspath(__file__))
+jar_repo_base_path = f"{curr_dir}/../../../target/repository"
+
+environ["sdk.python.environment"] = "test"
+
+
+@pytest.fixture(scope="module")
+def spark():
+  spark = SparkSession.builder \
+    .master("local[2]") \
+    .appName("OfsLocalTest") \
+    .config("spark.jars",
+            f"{jar_repo_base_path}/delta-spark_2.12-3.2.0.jar,{jar_repo_base_path}/delta-storage-3.2.0.jar") \
+    .config("spark.sql.extensions", "io.delta.sql.DeltaSparkSessionExtension") \
+    .config("spark.sql.catalog.spark_catalog", "org.apache.spark.sql.delta.catalog.DeltaCatalog") \
+    .config("spark.sql.shuffle.partitions", "2") \
+    .getOrCreate()
+  yield spark
+  spark.stop()
+
+
+@pytest.fixture
+def offline_store(tmp_path, monkeypatch):
+  import darwin_fs.service.spark_service as spark_service
+
+  base_path = str(tmp_path / "offline")
+  monkeypatch.setattr(spark_service, "DARWIN_OFS_V2_OFFLINE_STORE_BASE_S3_PATH", base_path)
+  return base_path
+
+
+def create_features_df(spark: SparkSession, rows):
+  schema = StructType([
+    StructField("id", IntegerType(), False),
+    StructField("col1", StringType(), True),
+  ])
+  return spark.createDataFrame(rows, schema)
+
+
+def test_parallel_sinks_share_the_persisted_rows_and_run_concurrently(spark, offline_store, monkeypatch):
+  import darwin_fs.service.spark_service as spark_service
+
+  computed = spark.sparkContext.accumulator(0)
+
+  @F.udf(StringType())
+  def tracked(value):
+    computed.add(1)
+    return value
+
+  df = create_features_df(spark, [(1, "a"), (2, "b"), (3, "c")]).withColumn("col1", tracked("col1"))
+  # both sinks wait for each other, a sequential write would break the barrier
+  barrier = threading.Barrier(2, timeout=120)
+  online_rows, sink_threads = [], []
+  write_offline_features = spark_service.write_offline_features
+
+  def online_sink(sink_df, feature_group_name, feature_group_version, run_id):
+    sink_threads.append(threading.current_thread().name)
+    barrier.wait()
+    online_rows.extend(sink_df.collect())
+    return run_id
+
+  def offline_sink(*args):
+    sink_threads.append(threading.current_thread().name)
+    barrier.wait()
+    write_offline_features(*args)
+
+  monkeypatch.setattr(spark_service, "write_online_features", online_sink)
+  monkeypatch.setattr(spark_service, "write_offline_features", offline_sink)
+
+  df, persisted_here = spark_service.persist_for_write(df)
+  assert persisted_here
+  try:
+    df.count()
+    spark_service.write_online_and_offline_features(df, "fg", "v1", "run-1", df.schema, "overwrite",
+                                                    write_online=True, parallel=True)
+  finally:
+    df.unpersist()
+
+  offline_df = spark.read.format("delta").load(f"{offline_store}/fg/v1/")
+  assert sorted(offline_df.collect()) == sorted(df.collect())
+  assert sorted(row["id"] for row in online_rows) == [1, 2, 3]
+  assert all(name.startswith("ofs-sink") for name in sink_threads) and len(sink_threads) == 2
+  # the upstream transformation ran once for the count, not again per sink
+  assert computed.value == 3
+
+
+def test_parallel_sinks_finish_the_offline_write_before_raising_the_online_failure(spark, offline_store, monkeypatch):
+  import darwin_fs.service.spark_service as spark_service
+  from darwin_fs.exception import SparkWriterException
+
+  def failing_online_sink(sink_df, feature_group_name, feature_group_version, run_id):
+    raise SparkWriterException("error writing data to online feature store: kafka down", "OFS_ONLINE_WRITE_EXCEPTION")
+
+  monkeypatch.setattr(spark_service, "write_online_features", failing_online_sink)
+
+  df = create_features_df(spark, [(1, "a"), (2, "b")]).cache()
+  with pytest.raises(SparkWriterException) as error:
+    spark_service.write_online_and_offline_features(df, "fg", "v1", "run-1", df.schema, "overwrite",
+                                                    write_online=True, parallel=True)
+  df.unpersist()
+
+  assert error.value.error_code == "OFS_ONLINE_WRITE_EXCEPTION"
+  assert spark.read.format("delta").load(f"{offline_store}/fg/v1/").count() == 2
+
+
+def create_offline_table(spark: SparkSession, path: str, rows, mode: str = "overwrite"):
+  schema = StructType([
+    StructField("id", IntegerType(), False),
+    StructField("region", StringType(), False),
+    StructField("ts", TimestampType(), False),
+    StructField("col1", StringType(), True),
+    StructField("col2", StringType(), True),
+  ])
+  spark.createDataFrame(rows, schema).write.format("delta").mode(mode).partitionBy("region").save(path)
+
+
+def test_offline_read_pushes_selections_down_to_the_scan(spark, offline_store):
+  import darwin_fs.service.spark_service as spark_service
+
+  create_offline_table(spark, f"{offline_store}/fg/v1/", [
+    (1, "in", datetime(2024, 1, 1), "a", "x"),
+    (1, "us", datetime(2024, 1, 1), "b", "x"),
+    (2, "us", datetime(2024, 1, 2), "c", "x"),
+    (2, "us", datetime(2024, 1, 5), "d", "x"),
+    (3, "in", datetime(2024, 1, 2), "e", "x"),
+  ])
+
+  df = spark_service.read_offline_features(spark, "fg", "v1", columns=["id", "region", "col1"], filters=["region = 'us'"],
+                                           time_column="ts", start_time=datetime(2024, 1, 1), end_time=datetime(2024, 1, 3),
+                                           entity_keys={"id": [1, 2], "region": ["in", "us"]})
+
+  assert df.columns == ["id", "region", "col1"]
+  assert [tuple(row) for row in df.collect()] == [(2, "us", "c")]
+
+  plan = df._jdf.queryExecution().executedPlan().toString()
+  partition_filters = re.search(r"PartitionFilters: \[([^\]]*)\]", plan).group(1)
+  pushed_filters = re.search(r"PushedFilters: \[([^\]]*)\]", plan).group(1)
+  read_schema = re.search(r"ReadSchema: (struct<[^>]*>)", plan).group(1)
+  assert "region" in partition_filters
+  assert "GreaterThanOrEqual(ts" in pushed_filters and "LessThan(ts" in pushed_filters
+  assert "In(id" in pushed_filters
+  assert "col2" not in read_schema
+
+
+def test_offline_read_as_of_a_timestamp_reads_that_table_version(spark, offline_store):
+  import darwin_fs.service.spark_service as spark_service
+  from darwin_fs.exception import SparkWriterException
+
+  path = f"{offline_store}/fg/v1/"
+  create_offline_table(spark, path, [(1, "in", datetime(2024, 1, 1), "old", None)])
+  create_offline_table(spark, path, [(1, "in", datetime(2024, 1, 1), "new", None)])
+  first_commit = spark.sql(f"DESCRIBE HISTORY delta.`{path}`").where("version = 0").first()["timestamp"]
+
+  # delta rejects versionAsOf together with timestampAsOf, only the timestamp must be set
+  df = spark_service.read_offline_features(spark, "fg", "v1", timestamp=str(first_commit))
+
+  assert [row["col1"] for row in df.collect()] == ["old"]
+  assert [row["col1"] for row in spark_service.read_offline_features(spark, "fg", "v1").collect()] == ["new"]
+  with pytest.raises(SparkWriterException):
+    spark_service.read_offline_features(spark, "fg", "v1", delta_table_version=0, timestamp=str(first_commit))
+
+
+def test_offline_version_cache_is_opt_in(spark, offline_store, monkeypatch):
+  from darwin_fs import config
+  import darwin_fs.service.spark_service as spark_service
+
+  path = f"{offline_store}/fg/v1/"
+  create_offline_table(spark, path, [(1, "in", datetime(2024, 1, 1), "a", None)])
+  assert spark_service.read_offline_features(spark, "fg", "v1").count() == 1
+
+  if "DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS" not in environ:
+    assert config.DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS == 0
+    # a version written by another process is read right away
+    create_offline_table(spark, path, [(2, "in", datetime(2024, 1, 1), "b", None)], mode="append")
+    assert spark_service.read_offline_features(spark, "fg", "v1").count() == 2
+
+  monkeypatch.setattr(config, "DARWIN_FS_OFFLINE_VERSION_CACHE_TTL_SECONDS", 60)
+  cached_count = spark_service.read_offline_features(spark, "fg", "v1").count()
+  create_offline_table(spark, path, [(3, "in", datetime(2024, 1, 1), "c", None)], mode="append")
+  assert spark_service.read_offline_features(spark, "fg", "v1").count() == cached_count
+
+  # a write of this process invalidates the cached version
+  df = create_features_df(spark, [(4, "d")])
+  spark_service.write_offline_features(df, "fg", "v2", df.schema, "overwrite")
+  spark_service.read_offline_features(spark, "fg", "v2").count()
+  spark_service.write_offline_features(df, "fg", "v2", df.schema, "append")
+  assert spark_service.read_offline_features(spark, "fg", "v2").count() == 2
+
+
+def create_point_in_time_tables(spark: SparkSession, offline_store: str):
+  t0 = datetime(2024, 1, 1)
+  features = spark.createDataFrame([
+    (1, t0, 1.0, "a"),
+    # tied at the same timestamp
+    (1, t0 + timedelta(seconds=5), 2.0, "b"),
+    (1, t0 + timedelta(seconds=5), 3.0, "c"),
+    (1, t0 + timedelta(seconds=20.5), 4.0, "d"),
+    (2, t0, None, "e"),
+  ], StructType([
+    StructField("user_id", IntegerType(), False),
+    StructField("ts", TimestampType(), False),
+    StructField("score", DoubleType(), True),
+    StructField("label", StringType(), True),
+  ]))
+  # several files, so tied rows are not always read in the same order
+  features.repartition(3).write.format("delta").mode("overwrite").save(f"{offline_store}/fg/v1/")
+
+  events = spark.createDataFrame([
+    (1, 1, t0 + timedelta(seconds=5)),
+    (2, 1, t0 + timedelta(seconds=15)),
+    (3, 1, t0 + timedelta(seconds=15.5)),
+    (4, 1, t0 + timedelta(seconds=20.2)),
+    (5, 2, t0 + timedelta(seconds=3)),
+    (6, 3, t0 + timedelta(seconds=3)),
+    (7, 1, t0 - timedelta(seconds=1)),
+  ], StructType([
+    StructField("event_id", IntegerType(), False),
+    StructField("user_id", IntegerType(), False),
+    StructField("event_ts", TimestampType(), False),
+  ]))
+  return events.cache()
+
+
+def point_in_time_feature_group(max_age):
+  from darwin_fs.service.point_in_time_service import ResolvedFeatureGroup
+
+  return ResolvedFeatureGroup(feature_group_name="fg", feature_group_version="v1", timestamp_column="ts",
+                              primary_keys=["user_id"], join_keys=["user_id"], feature_columns=["score", "label"],
+                              max_age=max_age, prefix="fg_")
+
+
+def point_in_time_rows(df):
+  return sorted((row["event_id"], row["fg_score"], row["fg_label"]) for row in df.collect())
+
+
+def test_point_in_time_join_strategies_agree_with_max_age(spark, offline_store):
+  from darwin_fs.constant.constants import PointInTimeJoinStrategy
+  from darwin_fs.service.point_in_time_service import point_in_time_join
+
+  events = create_point_in_time_tables(spark, offline_store)
+  feature_group = point_in_time_feature_group(max_age=10)
+
+  range_bucket = point_in_time_join(events, "event_ts", [feature_group], PointInTimeJoinStrategy.RANGE_BUCKET)
+  sort_merge = point_in_time_join(events, "event_ts", [feature_group], PointInTimeJoinStrategy.SORT_MERGE)
+
+  assert range_bucket.columns == sort_merge.columns == ["event_id", "user_id", "event_ts", "fg_score", "fg_label"]
+  expected = [
+    # a feature row at the event timestamp is visible, of the tied rows the same one is kept by both
+    (1, 3.0, "c"),
+    # exactly max_age old
+    (2, 3.0, "c"),
+    # half a second older than max_age
+    (3, None, None),
+    # the feature row later in the same second is not visible, the earlier one is too old
+    (4, None, None),
+    # a null feature value of a matched row
+    (5, None, "e"),
+    (6, None, None),
+    (7, None, None),
+  ]
+  assert point_in_time_rows(range_bucket) == expected
+  assert point_in_time_rows(sort_merge) == expected
+  events.unpersist()
+
+
+def test_point_in_time_join_without_max_age(spark, offline_store):
+  from darwin_fs.constant.constants import PointInTimeJoinStrategy
+  from darwin_fs.exception import SparkWriterException
+  from darwin_fs.service.point_in_time_service import point_in_time_join
+
+  events = create_point_in_time_tables(spark, offline_store)
+  feature_group = point_in_time_feature_group(max_age=None)
+
+  df = point_in_time_join(events, "event_ts", [feature_group], PointInTimeJoinStrategy.AUTO)
+
+  assert point_in_time_rows(df) == [(1, 3.0, "c"), (2, 3.0, "c"), (3, 3.0, "c"), (4, 3.0, "c"), (5, None, "e"),
+                                    (6, None, None), (7, None, None)]
+  with pytest.raises(SparkWriterException):
+    point_in_time_join(events, "event_ts", [feature_group], PointInTimeJoinStrategy.RANGE_BUCKET)
+  events.unpersist()
+
+
+def test_stream_skips_unchanged_rows_including_null_keys(spark, tmp_path, monkeypatch):
+  import darwin_fs.service.spark_service as spark_service
+  from darwin_fs.service.streaming_service import write_online_features_stream
+
+  written = {}
+
+  def online_sink(sink_df, feature_group_name, feature_group_version, run_id):
+    written[run_id] = sorted(((row["id"], row["col1"]) for row in sink_df.collect()),
+                             key=lambda row: (row[0] is not None, row[0] or 0))
+    return run_id
+
+  monkeypatch.setattr(spark_service, "write_online_features", online_sink)
+  monkeypatch.setattr(spark_service, "put_feature_group_run_using_spark_jar", lambda *args, **kwargs: None)
+
+  source_path, checkpoint_path = str(tmp_path / "source"), str(tmp_path / "checkpoint")
+  schema = StructType([
+    StructField("id", IntegerType(), True),
+    StructField("col1", StringType(), True),
+  ])
+
+  def run_available_now(rows):
+    spark.createDataFrame(rows, schema).write.mode("append").parquet(source_path)
+    query = write_online_features_stream(spark.readStream.schema(schema).parquet(source_path), "fg", "v1",
+                                         primary_keys=["id"], checkpoint_location=checkpoint_path, available_now=True,
+                                         query_name="local")
+    query.awaitTermination()
+
+  run_available_now([(None, "a"), (1, "b")])
+  run_available_now([(None, "a"), (1, "c")])
+  run_available_now([(None, "d"), (1, "c")])
+
+  assert written == {
+    "run-stream-local-0": [(None, "a"), (1, "b")],
+    # the null key did not change and is not written again
+    "run-stream-local-1": [(1, "c")],
+    "run-stream-local-2": [(None, "d")],
+  }
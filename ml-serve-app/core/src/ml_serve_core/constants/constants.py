@@ -25,6 +25,7 @@ FASTAPI_SERVE_CHART_VERSION = os.getenv("FASTAPI_SERVE_CHART_VERSION", "1.0.0")
 RAY_SERVE_CHART_VERSION = os.getenv("RAY_SERVE_CHART_VERSION", "1.0.0")
 
 HEALTHCHECK_PATH = os.getenv("HEALTHCHECK_PATH", "/healthcheck")
+READINESS_PATH = os.getenv("READINESS_PATH", HEALTHCHECK_PATH)
 APPLICATION_PORT = int(os.getenv("APPLICATION_PORT", "8000"))
 
 ENABLE_ISTIO = os.getenv("ENABLE_ISTIO", "false").lower() == "true"
@@ -9,6 +9,7 @@ from ml_serve_core.config.configs import Config
 from ml_serve_core.constants.constants import (
     APPLICATION_PORT,
     HEALTHCHECK_PATH,
+    READINESS_PATH,
     FASTAPI_VALUES_TEMPLATE_NAME,
     ENABLE_ISTIO,
     ISTIO_SERVICE_NAME,
@@ -149,7 +150,7 @@ def generate_fastapi_values_for_one_click_model_deployment(
     values['hpa']['maxReplicas'] = max_replicas
     values['livenessProbe']['httpGet']['path'] = HEALTHCHECK_PATH
     values['livenessProbe']['httpGet']['port'] = APPLICATION_PORT
-    values['readinessProbe']['httpGet']['path'] = HEALTHCHECK_PATH
+    values['readinessProbe']['httpGet']['path'] = READINESS_PATH
     values['readinessProbe']['httpGet']['port'] = APPLICATION_PORT
 
     # Configure Istio if enabled
@@ -216,7 +217,7 @@ def generate_fastapi_values(
     values['hpa']['maxReplicas'] = serve_infra_config.fast_api_config_object.max_replicas
     values['livenessProbe']['httpGet']['path'] = HEALTHCHECK_PATH
     values['livenessProbe']['httpGet']['port'] = APPLICATION_PORT
-    values['readinessProbe']['httpGet']['path'] = HEALTHCHECK_PATH
+    values['readinessProbe']['httpGet']['path'] = READINESS_PATH
     values['readinessProbe']['httpGet']['port'] = APPLICATION_PORT
 
     # Configure Istio if enabled
@@ -0,0 +1,35 @@
+"""
+Dummy MLflow pyfunc model for benchmarking the serve runtime.
+
+The model sums the numeric columns of each row, optionally sleeping to emulate a
+heavier model, and is logged to a local file based tracking store.
+"""
+import time
+
+import mlflow
+import mlflow.pyfunc
+import pandas as pd
+
+
+class DummyModel(mlflow.pyfunc.PythonModel):
+    def __init__(self, inference_ms: float = 0.0):
+        self.inference_ms = inference_ms
+
+    def predict(self, context, model_input):
+        if self.inference_ms > 0:
+            time.sleep(self.inference_ms / 1000.0)
+        if isinstance(model_input, dict):
+            model_input = pd.DataFrame([model_input])
+        return model_input.sum(axis=1, numeric_only=True).to_numpy()
+
+
+def log_dummy_model(tracking_uri: str, inference_ms: float = 0.0) -> str:
+    """Log the dummy model and return its runs:/ URI"""
+    mlflow.set_tracking_uri(tracking_uri)
+    mlflow.set_experiment("serve-runtime-benchmark")
+    with mlflow.start_run() as run:
+        # Explicit empty requirements skip the slow dependency inference
+        mlflow.pyfunc.log_model(
+            "model", python_model=DummyModel(inference_ms), pip_requirements=[]
+        )
+    return f"runs:/{run.info.run_id}/model"
@@ -0,0 +1,73 @@
+"""
+Mock feature store for benchmarking the serve runtime.
+
+Serves the two endpoints the runtime calls, the OFS admin schema lookup and the
+online feature read, with deterministic feature values and a configurable latency.
+
+Run standalone with:
+    python -m benchmark.mock_feature_store --port 18080
+"""
+import argparse
+import asyncio
+import zlib
+from typing import Any, List
+
+from aiohttp import web
+
+PRIMARY_KEY = "user_id"
+
+
+def feature_names(num_features: int) -> List[str]:
+    return [f"feature_{i}" for i in range(num_features)]
+
+
+def feature_values(key_values: List[Any], columns: List[str]) -> List[float]:
+    """Deterministic values per key so results are identical across runs"""
+    seed = zlib.crc32(repr(key_values).encode())
+    return [float((seed + i * 7919) % 1000) / 10.0 for i in range(len(columns))]
+
+
+def create_app(num_features: int, latency_ms: float) -> web.Application:
+    columns = [PRIMARY_KEY] + feature_names(num_features)
+
+    async def schema(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency_ms / 1000.0)
+        return web.json_response(
+            {"data": {"name": request.query.get("name"), "schema": [{"name": c} for c in columns]}}
+        )
+
+    async def read_features(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency_ms / 1000.0)
+        body = await request.json()
+        feature_columns = body["featureColumns"]
+        successful_keys = [
+            {"key": key_values, "features": feature_values(key_values, feature_columns)}
+            for key_values in body["primaryKeys"]["values"]
+        ]
+        return web.json_response({"data": {"successfulKeys": successful_keys, "failedKeys": []}})
+
+    app = web.Application()
+    app.router.add_get("/feature-group/schema", schema)
+    app.router.add_get("/feature-group/read-features", read_features)
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock feature store for serve runtime benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--num-features", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    web.run_app(
+        create_app(args.num_features, args.latency_ms),
+        host=args.host,
+        port=args.port,
+        print=None,
+        access_log=None,
+    )
+
+
+if __name__ == "__main__":
+    main()
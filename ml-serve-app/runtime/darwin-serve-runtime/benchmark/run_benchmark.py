@@ -0,0 +1,286 @@
+"""
+Load test for the serve runtime against a mock feature store and a dummy model.
+
+Starts the mock feature store and the runtime (uvicorn, src.main:app) as subprocesses,
+then drives closed-loop /predict traffic at each concurrency level and reports
+throughput and latency percentiles. Results are written as JSON, tagged with the git
+commit, so runs can be compared across commits with --compare.
+
+Run from the darwin-serve-runtime directory:
+    python -m benchmark.run_benchmark --concurrency 1,8,32 --ofs-ratio 0.5 \
+        --output results.json [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from benchmark.dummy_model import log_dummy_model
+from benchmark.mock_feature_store import PRIMARY_KEY, feature_names, feature_values
+
+RUNTIME_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FEATURE_GROUP = "benchmark_fg"
+PERCENTILES = (50, 95, 99)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=RUNTIME_DIR, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _percentile(sorted_values: List[float], percentile: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(percentile / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class PayloadFactory:
+    """Builds a seeded, reproducible mix of OFS mode and direct features mode requests"""
+
+    def __init__(self, ofs_ratio: float, num_features: int, key_space: int, seed: int):
+        self._ofs_ratio = ofs_ratio
+        self._columns = feature_names(num_features)
+        self._key_space = key_space
+        self._random = random.Random(seed)
+
+    def next(self) -> Dict[str, Any]:
+        key = self._random.randrange(self._key_space)
+        if self._random.random() < self._ofs_ratio:
+            return {"feature_group": FEATURE_GROUP, "ofs_keys": {PRIMARY_KEY: key}}
+        return {"features": dict(zip(self._columns, feature_values([key], self._columns)))}
+
+
+async def _run_level(
+    base_url: str, concurrency: int, duration: float, warmup: float, payloads: PayloadFactory
+) -> Dict[str, Any]:
+    """Closed loop: each of ``concurrency`` workers sends its next request once the last returns"""
+    latencies: List[float] = []
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(base_url=base_url, connector=connector) as session:
+
+        async def worker():
+            nonlocal errors
+            while True:
+                sent_at = time.perf_counter()
+                if sent_at >= stop_at:
+                    return
+                try:
+                    async with session.post("/predict", json=payloads.next()) as response:
+                        await response.read()
+                        ok = response.status == 200
+                except aiohttp.ClientError:
+                    ok = False
+                done_at = time.perf_counter()
+                if sent_at < measure_from:
+                    continue
+                if ok:
+                    latencies.append(done_at - sent_at)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+    latencies.sort()
+    elapsed = time.perf_counter() - measure_from
+    result = {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed > 0 else 0.0,
+    }
+    for percentile in PERCENTILES:
+        result[f"p{percentile}_ms"] = round(_percentile(latencies, percentile) * 1000, 3)
+    return result
+
+
+async def _wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession(base_url=base_url) as session:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"{process.args} exited with code {process.returncode}")
+            try:
+                async with session.get("/readiness") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Runtime at {base_url} not ready after {timeout}s")
+
+
+def _start_processes(args, work_dir: str) -> List[subprocess.Popen]:
+    fs_port = _free_port()
+    runtime_port = _free_port()
+    args.base_url = f"http://127.0.0.1:{runtime_port}"
+
+    tracking_uri = f"file://{os.path.join(work_dir, 'mlruns')}"
+    model_uri = log_dummy_model(tracking_uri, args.model_latency_ms)
+
+    mock_fs = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmark.mock_feature_store",
+            "--port", str(fs_port),
+            "--num-features", str(args.num_features),
+            "--latency-ms", str(args.fs_latency_ms),
+        ],
+        cwd=RUNTIME_DIR,
+    )
+
+    env = dict(os.environ)
+    env.update(
+        FEATURE_STORE_URL=f"http://127.0.0.1:{fs_port}",
+        OFS_ADMIN_URL=f"http://127.0.0.1:{fs_port}",
+        MLFLOW_MODEL_URI=model_uri,
+        MLFLOW_TRACKING_URI=tracking_uri,
+        MLFLOW_TRACKING_USERNAME=env.get("MLFLOW_TRACKING_USERNAME", "benchmark"),
+        MLFLOW_TRACKING_PASSWORD=env.get("MLFLOW_TRACKING_PASSWORD", "benchmark"),
+        MODEL_CACHE_DIR=os.path.join(work_dir, "model-cache"),
+    )
+    if args.workers > 1:
+        multiproc_dir = os.path.join(work_dir, "prometheus-multiproc")
+        os.makedirs(multiproc_dir, exist_ok=True)
+        env["PROMETHEUS_MULTIPROC_DIR"] = multiproc_dir
+
+    runtime = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "src.main:app",
+            "--host", "127.0.0.1",
+            "--port", str(runtime_port),
+            "--workers", str(args.workers),
+            "--log-level", "warning",
+            "--no-access-log",
+        ],
+        cwd=RUNTIME_DIR,
+        env=env,
+    )
+    return [mock_fs, runtime]
+
+
+def _print_results(results: List[Dict[str, Any]], baseline: Optional[Dict[str, Any]]) -> None:
+    baseline_levels = {
+        level["concurrency"]: level for level in (baseline or {}).get("results", [])
+    }
+    header = f"{'conc':>6} {'rps':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'errors':>7}"
+    print(header)
+    print("-" * len(header))
+    for level in results:
+        print(
+            f"{level['concurrency']:>6} {level['rps']:>10.1f} {level['p50_ms']:>10.2f} "
+            f"{level['p95_ms']:>10.2f} {level['p99_ms']:>10.2f} {level['errors']:>7}"
+        )
+        previous = baseline_levels.get(level["concurrency"])
+        if previous:
+            deltas = [
+                f"{metric} {_relative_change(previous[metric], level[metric]):+.1f}%"
+                for metric in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            ]
+            print(f"{'':>6} vs {baseline.get('commit') or 'baseline'}: {', '.join(deltas)}")
+
+
+def _relative_change(before: float, after: float) -> float:
+    return (after - before) / before * 100.0 if before else 0.0
+
+
+async def _run(args) -> Dict[str, Any]:
+    await _wait_until_ready(args.base_url, args.runtime_process, args.startup_timeout)
+    payloads = PayloadFactory(args.ofs_ratio, args.num_features, args.key_space, args.seed)
+    results = []
+    for concurrency in args.concurrency:
+        results.append(
+            await _run_level(args.base_url, concurrency, args.duration, args.warmup, payloads)
+        )
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "params": {
+            "ofs_ratio": args.ofs_ratio,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "workers": args.workers,
+            "num_features": args.num_features,
+            "key_space": args.key_space,
+            "fs_latency_ms": args.fs_latency_ms,
+            "model_latency_ms": args.model_latency_ms,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the serve runtime /predict endpoint")
+    parser.add_argument(
+        "--concurrency", default="1,8,32",
+        type=lambda value: [int(level) for level in value.split(",")],
+        help="Comma separated concurrency levels",
+    )
+    parser.add_argument("--duration", type=float, default=15.0, help="Measured seconds per level")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds per level")
+    parser.add_argument(
+        "--ofs-ratio", type=float, default=0.5,
+        help="Fraction of requests in OFS mode, the rest send features directly",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--num-features", type=int, default=12)
+    parser.add_argument("--key-space", type=int, default=10000, help="Distinct OFS keys")
+    parser.add_argument("--fs-latency-ms", type=float, default=2.0)
+    parser.add_argument("--model-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Results JSON of an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory(prefix="serve-benchmark-") as work_dir:
+        processes = _start_processes(args, work_dir)
+        args.runtime_process = processes[1]
+        try:
+            report = asyncio.run(_run(args))
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.wait(timeout=30)
+
+    _print_results(report["results"], baseline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,120 @@
+import asyncio
+import random
 import aiohttp
 from aiohttp import ClientSession
 from typing import Optional, Dict
-from asyncio import Lock
+from loguru import logger
 from src.config.config import Config
 
+# Methods that are safe to send again after a transient failure
+IDEMPOTENT_METHODS = {"GET", "PUT", "DELETE"}
+RETRYABLE_STATUSES = {502, 503, 504}
+
+
+class RetryBudget:
+    """
+    Token bucket that caps retries to a fraction of the requests sent.
+
+    Every request deposits ``ratio`` tokens and every retry withdraws one, so a
+    struggling upstream sees at most ``ratio`` extra load instead of a retry storm.
+    The bucket starts with, and is capped at, ``reserve`` tokens so low-traffic
+    callers can still retry occasionally.
+    """
+
+    def __init__(self, ratio: float, reserve: float):
+        self._ratio = ratio
+        self._reserve = reserve
+        self._tokens = reserve
+
+    def deposit(self) -> None:
+        self._tokens = min(self._tokens + self._ratio, self._reserve)
+
+    def try_withdraw(self) -> bool:
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
 
 class APIClient:
     def __init__(self, config: Config):
         self.config = config
         self._sessions: Dict[str, ClientSession] = {}
-        self._retry_attempts = 3  # Retry logic for transient errors
+        self._retry_attempts = self.config.get_http_retry_attempts
+        self._retry_budget = RetryBudget(
+            ratio=self.config.get_http_retry_budget_ratio,
+            reserve=self.config.get_http_retry_budget_reserve,
+        )
 
     async def _get_session(self, base_url: str) -> ClientSession:
         """Retrieve or create a session for the given base URL."""
         if base_url not in self._sessions:
+            connector = aiohttp.TCPConnector(
+                limit=self.config.get_http_connection_limit,
+                limit_per_host=self.config.get_http_connection_limit_per_host,
+                keepalive_timeout=self.config.get_http_keepalive_timeout_seconds,
+                use_dns_cache=True,
+                ttl_dns_cache=self.config.get_http_dns_cache_ttl_seconds,
+            )
             self._sessions[base_url] = aiohttp.ClientSession(
-                base_url=base_url, connector=aiohttp.TCPConnector(limit_per_host=10)
+                base_url=base_url,
+                connector=connector,
+                timeout=self._build_timeout(self.config.get_http_request_timeout_seconds),
             )
         return self._sessions[base_url]
 
+    def _build_timeout(self, total: float) -> aiohttp.ClientTimeout:
+        return aiohttp.ClientTimeout(
+            total=total, connect=self.config.get_http_connect_timeout_seconds
+        )
+
+    def _backoff_seconds(self, attempt: int) -> float:
+        # Full jitter: uniform over an exponentially growing, capped window
+        window_ms = min(
+            self.config.get_http_retry_backoff_ms * (2 ** attempt),
+            self.config.get_http_retry_max_backoff_ms,
+        )
+        return random.uniform(0, window_ms) / 1000.0
+
     async def _make_request(
-        self, method: str, url: str, base_url: str, **kwargs
+        self, method: str, url: str, base_url: str, timeout: Optional[float] = None, **kwargs
     ) -> dict:
-        """Make a non-blocking HTTP request."""
-        try:
-            session = await self._get_session(base_url)
-            async with session.request(method, url, **kwargs) as response:
-                response.raise_for_status()
-                return await response.json()
+        """
+        Make a non-blocking HTTP request.
+
+        Idempotent requests that fail with a connection error, a timeout or a 502/503/504
+        are retried with jittered exponential backoff, up to the configured attempts and
+        only while the retry budget allows it.
+        """
+        session = await self._get_session(base_url)
+        if timeout is not None:
+            kwargs["timeout"] = self._build_timeout(timeout)
+
+        self._retry_budget.deposit()
+        retries_left = self._retry_attempts if method in IDEMPOTENT_METHODS else 0
+        attempt = 0
+        while True:
+            try:
+                async with session.request(method, url, **kwargs) as response:
+                    if response.status in RETRYABLE_STATUSES and self._can_retry(retries_left):
+                        failure = f"HTTP {response.status}"
+                    else:
+                        response.raise_for_status()
+                        return await response.json()
+
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not self._can_retry(retries_left):
+                    raise e
+                failure = repr(e)
+
+            retries_left -= 1
+            delay = self._backoff_seconds(attempt)
+            attempt += 1
+            logger.warning(f"Retrying {method} {base_url}{url} in {delay:.3f}s after {failure}")
+            await asyncio.sleep(delay)
 
-        except Exception as e:
-            raise e
+    def _can_retry(self, retries_left: int) -> bool:
+        return retries_left > 0 and self._retry_budget.try_withdraw()
 
     async def get(
         self,
@@ -39,15 +123,17 @@ class APIClient:
         body: Optional[Dict] = None,  # Added body parameter
         query_params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        timeout: Optional[float] = None,
     ) -> dict:
         kwargs = {}
         if body:
+            # The feature store read endpoints are GET routes that take a JSON body
             kwargs["json"] = body  # Include body in the request
         if query_params:
             kwargs["params"] = query_params
         if headers:
             kwargs["headers"] = headers
-        return await self._make_request("GET", url, base_url, **kwargs)
+        return await self._make_request("GET", url, base_url, timeout=timeout, **kwargs)
 
     async def post(
         self,
@@ -56,6 +142,7 @@ class APIClient:
         body: Optional[Dict] = None,
         query_params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        timeout: Optional[float] = None,
     ) -> dict:
         kwargs = {}
         if body:
@@ -64,7 +151,7 @@ class APIClient:
             kwargs["params"] = query_params
         if headers:
             kwargs["headers"] = headers
-        return await self._make_request("POST", url, base_url, **kwargs)
+        return await self._make_request("POST", url, base_url, timeout=timeout, **kwargs)
 
     async def put(
         self,
@@ -73,6 +160,7 @@ class APIClient:
         body: Optional[Dict] = None,
         query_params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        timeout: Optional[float] = None,
     ) -> dict:
         kwargs = {}
         if body:
@@ -81,7 +169,7 @@ class APIClient:
             kwargs["params"] = query_params
         if headers:
             kwargs["headers"] = headers
-        return await self._make_request("PUT", url, base_url, **kwargs)
+        return await self._make_request("PUT", url, base_url, timeout=timeout, **kwargs)
 
     async def delete(
         self,
@@ -89,13 +177,14 @@ class APIClient:
         base_url: str,
         query_params: Optional[Dict] = None,
         headers: Optional[Dict] = None,
+        timeout: Optional[float] = None,
     ) -> dict:
         kwargs = {}
         if query_params:
             kwargs["params"] = query_params
         if headers:
             kwargs["headers"] = headers
-        return await self._make_request("DELETE", url, base_url, **kwargs)
+        return await self._make_request("DELETE", url, base_url, timeout=timeout, **kwargs)
 
     async def close(self):
         """Clean up and close all open sessions."""
@@ -1,8 +1,11 @@
+import json
 import os
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 from typeguard import typechecked
 
+from src.config.constants import MAX_QUEUE_SIZE, MAX_WORKERS
+
 
 @typechecked
 class Config:
@@ -22,6 +25,87 @@ class Config:
         self.mlflow_tracking_username = os.getenv("MLFLOW_TRACKING_USERNAME")
         self.mlflow_tracking_password = os.getenv("MLFLOW_TRACKING_PASSWORD")
 
+        # Local cache of downloaded model artifacts, shared by restarts and replicas on a node (opt-in)
+        self.model_cache_enabled = os.getenv("MODEL_CACHE_ENABLED", "false").lower() == "true"
+        self.model_cache_dir = os.getenv("MODEL_CACHE_DIR", "/tmp/darwin-serve-model-cache")
+
+        # Eager model loading and warmup at startup, gating /readiness
+        self.model_warmup_enabled = os.getenv("MODEL_WARMUP_ENABLED", "true").lower() == "true"
+        self.model_warmup_payloads_path = os.getenv("MODEL_WARMUP_PAYLOADS_PATH")
+        self.model_warmup_iterations = int(os.getenv("MODEL_WARMUP_ITERATIONS", "3"))
+        # Failed startup loads are retried with exponential backoff, after the last attempt
+        # /healthcheck fails so the pod gets restarted
+        self.model_load_max_attempts = int(os.getenv("MODEL_LOAD_MAX_ATTEMPTS", "5"))
+        self.model_load_retry_backoff_seconds = float(
+            os.getenv("MODEL_LOAD_RETRY_BACKOFF_SECONDS", "5")
+        )
+        self.model_load_retry_max_backoff_seconds = float(
+            os.getenv("MODEL_LOAD_RETRY_MAX_BACKOFF_SECONDS", "60")
+        )
+
+        # Model reloads are shared by the uvicorn workers of a pod through files in this directory,
+        # each worker checks it for a new reload every MODEL_RELOAD_POLL_SECONDS
+        self.model_reload_state_dir = os.getenv(
+            "MODEL_RELOAD_STATE_DIR", "/tmp/darwin-serve-model-reload"
+        )
+        self.model_reload_poll_seconds = float(os.getenv("MODEL_RELOAD_POLL_SECONDS", "1"))
+
+        # Micro-batching of concurrent single-row predictions (opt-in)
+        self.micro_batching_enabled = (
+            os.getenv("MICRO_BATCHING_ENABLED", "false").lower() == "true"
+        )
+        self.micro_batch_max_size = int(os.getenv("MICRO_BATCH_MAX_SIZE", "64"))
+        self.micro_batch_max_wait_ms = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "5"))
+
+        # Feature group schema cache for OFS mode (TTL of 0 disables it)
+        self.feature_schema_cache_ttl_seconds = float(
+            os.getenv("FEATURE_SCHEMA_CACHE_TTL_SECONDS", "300")
+        )
+        self.feature_schema_cache_stale_seconds = float(
+            os.getenv("FEATURE_SCHEMA_CACHE_STALE_SECONDS", "3600")
+        )
+
+        # Feature value cache for hot entity keys in OFS mode (TTL of 0 disables it).
+        # FEATURE_VALUE_CACHE_OVERRIDES takes per feature group settings as JSON, e.g.
+        # {"user_fg": {"ttl_seconds": 5, "max_entries": 50000}, "static_fg": {"ttl_seconds": 0}}
+        self.feature_value_cache_ttl_seconds = float(
+            os.getenv("FEATURE_VALUE_CACHE_TTL_SECONDS", "0")
+        )
+        self.feature_value_cache_max_entries = int(
+            os.getenv("FEATURE_VALUE_CACHE_MAX_ENTRIES", "10000")
+        )
+        self.feature_value_cache_overrides: Dict[str, Dict] = json.loads(
+            os.getenv("FEATURE_VALUE_CACHE_OVERRIDES", "{}")
+        )
+
+        # Pool that runs model inference off the event loop ("thread" or "process")
+        self.inference_executor_type = os.getenv("INFERENCE_EXECUTOR_TYPE", "thread").lower()
+        self.inference_max_workers = int(os.getenv("INFERENCE_MAX_WORKERS", str(MAX_WORKERS)))
+        self.inference_max_queue_size = int(
+            os.getenv("INFERENCE_MAX_QUEUE_SIZE", str(MAX_QUEUE_SIZE))
+        )
+
+        # Outbound HTTP connection pooling, timeouts and retries (feature store / OFS admin)
+        self.http_connection_limit = int(os.getenv("HTTP_CONNECTION_LIMIT", "100"))
+        self.http_connection_limit_per_host = int(
+            os.getenv("HTTP_CONNECTION_LIMIT_PER_HOST", "50")
+        )
+        self.http_keepalive_timeout_seconds = float(
+            os.getenv("HTTP_KEEPALIVE_TIMEOUT_SECONDS", "30")
+        )
+        self.http_dns_cache_ttl_seconds = int(os.getenv("HTTP_DNS_CACHE_TTL_SECONDS", "300"))
+        self.http_connect_timeout_seconds = float(
+            os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "1")
+        )
+        self.http_request_timeout_seconds = float(
+            os.getenv("HTTP_REQUEST_TIMEOUT_SECONDS", "5")
+        )
+        self.http_retry_attempts = int(os.getenv("HTTP_RETRY_ATTEMPTS", "2"))
+        self.http_retry_backoff_ms = float(os.getenv("HTTP_RETRY_BACKOFF_MS", "25"))
+        self.http_retry_max_backoff_ms = float(os.getenv("HTTP_RETRY_MAX_BACKOFF_MS", "500"))
+        self.http_retry_budget_ratio = float(os.getenv("HTTP_RETRY_BUDGET_RATIO", "0.1"))
+        self.http_retry_budget_reserve = float(os.getenv("HTTP_RETRY_BUDGET_RESERVE", "10"))
+
         # Validate required configuration
         self._validate_config()
 
@@ -68,3 +152,127 @@ class Config:
     @property
     def get_mlflow_tracking_password(self):
         return self.mlflow_tracking_password
+
+    @property
+    def get_micro_batching_enabled(self):
+        return self.micro_batching_enabled
+
+    @property
+    def get_micro_batch_max_size(self):
+        return self.micro_batch_max_size
+
+    @property
+    def get_micro_batch_max_wait_ms(self):
+        return self.micro_batch_max_wait_ms
+
+    @property
+    def get_inference_executor_type(self):
+        return self.inference_executor_type
+
+    @property
+    def get_inference_max_workers(self):
+        return self.inference_max_workers
+
+    @property
+    def get_inference_max_queue_size(self):
+        return self.inference_max_queue_size
+
+    @property
+    def get_http_connection_limit(self):
+        return self.http_connection_limit
+
+    @property
+    def get_http_connection_limit_per_host(self):
+        return self.http_connection_limit_per_host
+
+    @property
+    def get_http_keepalive_timeout_seconds(self):
+        return self.http_keepalive_timeout_seconds
+
+    @property
+    def get_http_dns_cache_ttl_seconds(self):
+        return self.http_dns_cache_ttl_seconds
+
+    @property
+    def get_http_connect_timeout_seconds(self):
+        return self.http_connect_timeout_seconds
+
+    @property
+    def get_http_request_timeout_seconds(self):
+        return self.http_request_timeout_seconds
+
+    @property
+    def get_http_retry_attempts(self):
+        return self.http_retry_attempts
+
+    @property
+    def get_http_retry_backoff_ms(self):
+        return self.http_retry_backoff_ms
+
+    @property
+    def get_http_retry_max_backoff_ms(self):
+        return self.http_retry_max_backoff_ms
+
+    @property
+    def get_http_retry_budget_ratio(self):
+        return self.http_retry_budget_ratio
+
+    @property
+    def get_http_retry_budget_reserve(self):
+        return self.http_retry_budget_reserve
+
+    @property
+    def get_feature_schema_cache_ttl_seconds(self):
+        return self.feature_schema_cache_ttl_seconds
+
+    @property
+    def get_feature_schema_cache_stale_seconds(self):
+        return self.feature_schema_cache_stale_seconds
+
+    @property
+    def get_model_cache_enabled(self):
+        return self.model_cache_enabled
+
+    @property
+    def get_model_cache_dir(self):
+        return self.model_cache_dir
+
+    @property
+    def get_model_warmup_enabled(self):
+        return self.model_warmup_enabled
+
+    @property
+    def get_model_warmup_payloads_path(self):
+        return self.model_warmup_payloads_path
+
+    @property
+    def get_model_warmup_iterations(self):
+        return self.model_warmup_iterations
+
+    @property
+    def get_model_reload_state_dir(self):
+        return self.model_reload_state_dir
+
+    @property
+    def get_model_reload_poll_seconds(self):
+        return self.model_reload_poll_seconds
+
+    @property
+    def get_model_load_max_attempts(self):
+        return self.model_load_max_attempts
+
+    @property
+    def get_model_load_retry_backoff_seconds(self):
+        return self.model_load_retry_backoff_seconds
+
+    @property
+    def get_model_load_retry_max_backoff_seconds(self):
+        return self.model_load_retry_max_backoff_seconds
+
+    def get_feature_value_cache_settings(self, feature_group_name: str) -> Tuple[float, int]:
+        """Return (ttl_seconds, max_entries) of the feature value cache for a feature group"""
+        overrides = self.feature_value_cache_overrides.get(feature_group_name, {})
+        return (
+            float(overrides.get("ttl_seconds", self.feature_value_cache_ttl_seconds)),
+            int(overrides.get("max_entries", self.feature_value_cache_max_entries)),
+        )
@@ -1 +1,2 @@
 MAX_WORKERS = 10
+MAX_QUEUE_SIZE = 100
@@ -1,8 +1,11 @@
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, Optional, Tuple
 
 from src.api_client import APIClient
 from src.feature_store.feature_store_interface import FeatureStoreInterface
+from src.feature_store.ttl_cache import AsyncTTLCache, LRUTTLCache
 from src.config.config import Config
+from src.metrics import FEATURE_VALUE_CACHE_REQUESTS
 
 
 class FeatureStoreClient(FeatureStoreInterface):
@@ -11,6 +14,11 @@ class FeatureStoreClient(FeatureStoreInterface):
         self.config = config
         self.feature_store_url = self.config.get_feature_store_url
         self.ofs_admin_url = self.config.get_ofs_admin_url
+        self._schema_cache = AsyncTTLCache(
+            ttl_seconds=self.config.get_feature_schema_cache_ttl_seconds,
+            stale_seconds=self.config.get_feature_schema_cache_stale_seconds,
+        )
+        self._value_caches: Dict[str, LRUTTLCache] = {}
 
     async def fetch_feature_group_data(
         self,
@@ -18,23 +26,163 @@ class FeatureStoreClient(FeatureStoreInterface):
         feature_columns: List[str],
         primary_key_names: List[str],
         primary_key_values: List[List[Any]],
+        feature_group_version: Optional[str] = None,
     ):
+        cache = self._get_value_cache(feature_group_name)
+        if cache is not None:
+            cache_key = self._value_cache_key(
+                feature_group_version, feature_columns, primary_key_names, primary_key_values[0]
+            )
+            features = cache.get(cache_key)
+            self._record_cache_lookup(feature_group_name, features is not None)
+            if features is not None:
+                return features
+
+        data = await self._read_features(
+            feature_group_name,
+            feature_columns,
+            primary_key_names,
+            primary_key_values,
+            feature_group_version,
+        )
+        features = data["successfulKeys"][0]["features"]
+        if cache is not None:
+            cache.put(cache_key, features)
+        return features
+
+    async def fetch_feature_group_rows(
+        self,
+        feature_group_name: str,
+        feature_columns: List[str],
+        primary_key_names: List[str],
+        primary_key_values: List[List[Any]],
+        feature_group_version: Optional[str] = None,
+    ) -> Tuple[List[List[Any]], List[List[Any]], List[List[Any]]]:
+        """
+        Fetch features for many primary keys with a single read-features call.
+
+        Keys found in the feature value cache are served from it and only the
+        remaining keys are sent to the feature store.
+
+        Returns:
+            (successful_keys, feature_rows, failed_keys) where feature_rows[i] holds
+            the feature values for successful_keys[i], in feature_columns order
+        """
+        cache = self._get_value_cache(feature_group_name)
+        keys: List[List[Any]] = []
+        feature_rows: List[List[Any]] = []
+        missing_key_values = primary_key_values
+        if cache is not None:
+            missing_key_values = []
+            for key_values in primary_key_values:
+                features = cache.get(
+                    self._value_cache_key(
+                        feature_group_version, feature_columns, primary_key_names, key_values
+                    )
+                )
+                self._record_cache_lookup(feature_group_name, features is not None)
+                if features is None:
+                    missing_key_values.append(key_values)
+                else:
+                    keys.append(key_values)
+                    feature_rows.append(features)
+
+        if not missing_key_values:
+            return keys, feature_rows, []
+
+        data = await self._read_features(
+            feature_group_name,
+            feature_columns,
+            primary_key_names,
+            missing_key_values,
+            feature_group_version,
+        )
+        for entry in data.get("successfulKeys") or []:
+            keys.append(entry["key"])
+            feature_rows.append(entry["features"])
+            if cache is not None:
+                cache.put(
+                    self._value_cache_key(
+                        feature_group_version, feature_columns, primary_key_names, entry["key"]
+                    ),
+                    entry["features"],
+                )
+        return keys, feature_rows, data.get("failedKeys") or []
+
+    def feature_value_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit, miss and size counters of the feature value cache, per feature group"""
+        return {
+            feature_group_name: cache.stats()
+            for feature_group_name, cache in self._value_caches.items()
+            if cache.enabled
+        }
+
+    @staticmethod
+    def _record_cache_lookup(feature_group_name: str, hit: bool) -> None:
+        FEATURE_VALUE_CACHE_REQUESTS.labels(
+            feature_group=feature_group_name, result="hit" if hit else "miss"
+        ).inc()
+
+    def _get_value_cache(self, feature_group_name: str) -> Optional[LRUTTLCache]:
+        cache = self._value_caches.get(feature_group_name)
+        if cache is None:
+            ttl_seconds, max_entries = self.config.get_feature_value_cache_settings(
+                feature_group_name
+            )
+            cache = LRUTTLCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+            self._value_caches[feature_group_name] = cache
+        return cache if cache.enabled else None
+
+    @staticmethod
+    def _value_cache_key(
+        feature_group_version: Optional[str],
+        feature_columns: List[str],
+        primary_key_names: List[str],
+        key_values: List[Any],
+    ) -> str:
+        # Columns are part of the key since cached values are positional
+        return json.dumps(
+            [feature_group_version, feature_columns, primary_key_names, key_values], default=str
+        )
+
+    async def _read_features(
+        self,
+        feature_group_name: str,
+        feature_columns: List[str],
+        primary_key_names: List[str],
+        primary_key_values: List[List[Any]],
+        feature_group_version: Optional[str] = None,
+    ) -> Dict[str, Any]:
         url = "/feature-group/read-features"
         payload = {
             "featureGroupName": feature_group_name,
             "featureColumns": feature_columns,
             "primaryKeys": {"names": primary_key_names, "values": primary_key_values},
         }
+        if feature_group_version is not None:
+            payload["featureGroupVersion"] = feature_group_version
         headers = {"Content-Type": "application/json"}
         response = await self.api_client.get(
             url=url, base_url=self.feature_store_url, body=payload, headers=headers
         )
-        return response["data"]["successfulKeys"][0]["features"]
+        return response["data"]
 
+    async def fetch_feature_meta_data(
+        self, feature_group_name: str, feature_group_version: Optional[str] = None
+    ):
+        """Return the column names of a feature group, served from the schema cache"""
+        return await self._schema_cache.get(
+            (feature_group_name, feature_group_version),
+            lambda: self._fetch_feature_meta_data(feature_group_name, feature_group_version),
+        )
 
-    async def fetch_feature_meta_data(self, feature_group_name: str):
+    async def _fetch_feature_meta_data(
+        self, feature_group_name: str, feature_group_version: Optional[str] = None
+    ):
         url = "/feature-group/schema"
         payload = {"name": feature_group_name}
+        if feature_group_version is not None:
+            payload["version"] = feature_group_version
         headers = {"Content-Type": "application/json"}
         response = await self.api_client.get(
             url=url, base_url=self.ofs_admin_url, query_params=payload, headers=headers
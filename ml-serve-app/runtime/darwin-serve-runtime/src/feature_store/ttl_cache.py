@@ -0,0 +1,126 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from loguru import logger
+
+
+@dataclass
+class _CacheEntry:
+    value: Any
+    expires_at: float
+    stale_until: float
+
+
+class AsyncTTLCache:
+    """
+    In-process cache for values fetched by async loaders.
+
+    - Entries younger than ``ttl_seconds`` are served directly.
+    - Entries past their TTL but within ``stale_seconds`` are served stale while a
+      single background refresh reloads them (stale-while-revalidate).
+    - Missing or fully expired entries are loaded in the foreground; concurrent
+      callers for the same key share one in-flight load (single-flight).
+
+    Failed loads are never cached. A ``ttl_seconds`` of 0 disables caching.
+    """
+
+    def __init__(self, ttl_seconds: float, stale_seconds: float = 0.0):
+        self._ttl_seconds = ttl_seconds
+        self._stale_seconds = max(stale_seconds, 0.0)
+        self._entries: Dict[Hashable, _CacheEntry] = {}
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await loader()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            now = time.monotonic()
+            if now < entry.expires_at:
+                return entry.value
+            if now < entry.stale_until:
+                self._start_load(key, loader)
+                return entry.value
+
+        # shield so a cancelled caller does not cancel the load shared with others
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def _start_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Future:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._load(key, loader))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda f: self._on_load_done(key, f))
+        return future
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await loader()
+        now = time.monotonic()
+        self._entries[key] = _CacheEntry(
+            value=value,
+            expires_at=now + self._ttl_seconds,
+            stale_until=now + self._ttl_seconds + self._stale_seconds,
+        )
+        return value
+
+    def _on_load_done(self, key: Hashable, future: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        # Retrieve the exception so background refresh failures are logged, not lost
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Failed to load cache entry for {key}: {future.exception()}")
+
+
+class LRUTTLCache:
+    """
+    Bounded in-process cache with a per-entry TTL and least-recently-used eviction.
+
+    Meant for short-lived values such as feature rows of hot entities. Expired entries
+    are dropped on access, and the least recently used entry is evicted once
+    ``max_entries`` is reached. Hit and miss counts are kept for metrics.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._ttl_seconds > 0 and self._max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (value, time.monotonic() + self._ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
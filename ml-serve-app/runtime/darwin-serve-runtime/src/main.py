@@ -1,14 +1,29 @@
+import asyncio
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse
+from loguru import logger
 from pydantic import BaseModel, Field, model_validator
 
 from src.api_client import APIClient
 from src.config.config import Config
 from src.feature_store.feature_store import FeatureStoreClient
+from src.metrics import (
+    IN_FLIGHT_REQUESTS,
+    METRICS_CONTENT_TYPE,
+    REQUEST_LATENCY,
+    STAGE_FEATURE_FETCH,
+    STAGE_SCHEMA_FETCH,
+    render_metrics,
+    track_stage,
+)
+from src.model.inference_executor import InferenceExecutor, InferenceQueueFullError
 from src.model.model import Model
 from src.model.model_loader.ml_flow_model_loader import MLFlowModelLoader
+from src.model.reload_coordinator import ReloadCoordinator
+from src.model.warmup import load_warmup_payloads
 
 
 class PredictRequest(BaseModel):
@@ -25,7 +40,9 @@ class PredictRequest(BaseModel):
     
     Attributes:
         feature_group: (Optional) Name of the feature group to fetch features from
-        ofs_keys: (Optional) Dictionary containing primary keys for feature lookup
+        feature_group_version: (Optional) Version of the feature group, latest when omitted
+        ofs_keys: (Optional) Dictionary containing primary keys for feature lookup,
+                  or a list of such dictionaries to score many keys in one call
         features: (Optional) Dictionary containing feature names and values directly
         
     Examples:
@@ -34,6 +51,12 @@ class PredictRequest(BaseModel):
             "feature_group": "serve_test_fg",
             "ofs_keys": {"user_id": 1}
         }
+
+        Mode 1 - Using Feature Store with many keys:
+        {
+            "feature_group": "serve_test_fg",
+            "ofs_keys": [{"user_id": 1}, {"user_id": 2}, {"user_id": 3}]
+        }
         
         Mode 2 - Direct Features:
         {
@@ -54,7 +77,10 @@ class PredictRequest(BaseModel):
         }
     """
     feature_group: Optional[str] = Field(None, description="Name of the feature group (for OFS mode)")
-    ofs_keys: Optional[Dict[str, Any]] = Field(None, description="Primary keys for feature lookup (for OFS mode)")
+    feature_group_version: Optional[str] = Field(None, description="Version of the feature group (for OFS mode)")
+    ofs_keys: Optional[Union[Dict[str, Any], List[Dict[str, Any]]]] = Field(
+        None, description="Primary keys for feature lookup, or a list of them (for OFS mode)"
+    )
     features: Optional[Dict[str, Any]] = Field(None, description="Feature dictionary for direct prediction (bypass OFS)")
 
     @model_validator(mode='after')
@@ -80,14 +106,50 @@ class PredictRequest(BaseModel):
         
         if self.ofs_keys is not None and self.feature_group is None:
             raise ValueError("ofs_keys requires feature_group")
+
+        if isinstance(self.ofs_keys, list):
+            if len(self.ofs_keys) == 0:
+                raise ValueError("ofs_keys list must not be empty")
+            key_names = self.ofs_keys[0].keys()
+            if any(keys.keys() != key_names for keys in self.ofs_keys):
+                raise ValueError("All entries in ofs_keys must have the same primary key names")
         
         return self
 
 
+class BatchPredictRequest(BaseModel):
+    """
+    Request model for batch prediction endpoint.
+
+    Each entry in inputs follows the same rules as a PredictRequest and may use
+    either OFS mode with a single ofs_keys dictionary or direct features mode. All rows are scored with a single
+    model invocation and the scores are returned in input order.
+
+    Examples:
+        {
+            "inputs": [
+                {"feature_group": "serve_test_fg", "ofs_keys": {"user_id": 1}},
+                {"features": {"area": 4640, "bedrooms": 4, "stories": 2}}
+            ]
+        }
+    """
+    inputs: List[PredictRequest] = Field(..., min_length=1, description="Prediction inputs to score together")
+
+
+class ReloadModelRequest(BaseModel):
+    """Request model for model reload endpoint"""
+    model_uri: Optional[str] = Field(
+        None, description="MLflow model URI to switch to, defaults to the configured MLFLOW_MODEL_URI"
+    )
+
+
 class PredictResponse(BaseModel):
     """Response model for prediction endpoint"""
     prediction: Any = Field(..., description="Model prediction result")
 
+
+PREDICTION_ENDPOINTS = ("/predict/batch", "/predict")
+
 # ROOT_PATH is used for proper OpenAPI/Swagger docs when behind a reverse proxy
 # e.g., if app is served at /my-model/, set ROOT_PATH=/my-model
 root_path = os.environ.get("ROOT_PATH", "")
@@ -101,15 +163,272 @@ api_client = APIClient(config=config)
 
 feature_store_client = FeatureStoreClient(api_client=api_client, config=config)
 
-model = Model(model_loader=model_loader)
+inference_executor = InferenceExecutor(
+    executor_type=config.get_inference_executor_type,
+    max_workers=config.get_inference_max_workers,
+    max_queue_size=config.get_inference_max_queue_size,
+)
+
+model = Model(
+    model_loader=model_loader,
+    micro_batching_enabled=config.get_micro_batching_enabled,
+    micro_batch_max_size=config.get_micro_batch_max_size,
+    micro_batch_max_wait_ms=config.get_micro_batch_max_wait_ms,
+    inference_executor=inference_executor,
+)
+
+reload_coordinator = ReloadCoordinator(state_dir=config.get_model_reload_state_dir)
+
+
+async def _fetch_feature_columns(request: PredictRequest, primary_key_names: List[str]) -> List[str]:
+    """Return the feature group columns to fetch for a request, excluding its primary keys"""
+    # Fetch feature group metadata to get all columns
+    with track_stage(STAGE_SCHEMA_FETCH):
+        fg_columns = await feature_store_client.fetch_feature_meta_data(
+            feature_group_name=request.feature_group,
+            feature_group_version=request.feature_group_version,
+        )
+
+    # Calculate which features need to be fetched (exclude primary keys)
+    return list(set(fg_columns) - set(primary_key_names))
+
+
+async def _resolve_features(request: PredictRequest) -> Dict[str, Any]:
+    """Build the feature dictionary for a request in either OFS or direct features mode"""
+    # Mode 2: Direct Features Mode (bypass OFS)
+    if request.features is not None:
+        return request.features
+
+    # Mode 1: Feature Store (OFS) Mode
+    if isinstance(request.ofs_keys, list):
+        raise ValueError(
+            "A list of ofs_keys is not supported here, send it to /predict to score all keys together"
+        )
+
+    feature_columns = await _fetch_feature_columns(request, list(request.ofs_keys.keys()))
+
+    # Fetch features from feature store
+    with track_stage(STAGE_FEATURE_FETCH):
+        features: Dict = await feature_store_client.fetch_feature_group_data(
+            feature_group_name=request.feature_group,
+            feature_columns=feature_columns,
+            primary_key_names=list(request.ofs_keys.keys()),
+            primary_key_values=[list(request.ofs_keys.values())],
+            feature_group_version=request.feature_group_version,
+        )
+
+    # Combine fetched features with provided keys
+    return dict(zip(feature_columns, features))
+
+
+async def _predict_multi_key(request: PredictRequest) -> Dict[str, Any]:
+    """Fetch features for every key in one call and score all resolved rows together"""
+    primary_key_names = list(request.ofs_keys[0].keys())
+    feature_columns = await _fetch_feature_columns(request, primary_key_names)
+
+    with track_stage(STAGE_FEATURE_FETCH):
+        keys, feature_rows, failed_keys = await feature_store_client.fetch_feature_group_rows(
+            feature_group_name=request.feature_group,
+            feature_columns=feature_columns,
+            primary_key_names=primary_key_names,
+            primary_key_values=[[keys[name] for name in primary_key_names] for keys in request.ofs_keys],
+            feature_group_version=request.feature_group_version,
+        )
+
+    scores: List[Any] = []
+    if feature_rows:
+        result = await model.predict_batch(
+            [dict(zip(feature_columns, features)) for features in feature_rows]
+        )
+        scores = result["scores"]
+
+    return {
+        "scores": scores,
+        "keys": [dict(zip(primary_key_names, key)) for key in keys],
+        "failed_keys": [dict(zip(primary_key_names, key)) for key in failed_keys],
+    }
+
+
+async def _load_and_warmup_model() -> None:
+    """
+    Load and warm up the model, retrying failed loads with exponential backoff.
+
+    A pod that is not ready gets no traffic to load the model lazily, so once every
+    attempt failed the load is marked as failed and /healthcheck reports it, letting
+    Kubernetes restart the pod.
+    """
+    backoff = config.get_model_load_retry_backoff_seconds
+    max_attempts = max(config.get_model_load_max_attempts, 1)
+    for attempt in range(1, max_attempts + 1):
+        try:
+            payloads = load_warmup_payloads(config.get_model_warmup_payloads_path)
+            await model.warmup(payloads, iterations=config.get_model_warmup_iterations)
+            return
+        except Exception as e:
+            logger.exception(
+                f"Failed to load and warm up model at startup (attempt {attempt}/{max_attempts}): {e}"
+            )
+            if attempt == max_attempts:
+                app.state.model_load_error = str(e)
+                return
+        await asyncio.sleep(backoff)
+        backoff = min(backoff * 2, config.get_model_load_retry_max_backoff_seconds)
+
+
+async def _swap_model(model_uri: Optional[str]) -> None:
+    try:
+        await model.swap(model_uri)
+        app.state.last_reload_error = None
+    except Exception as e:
+        logger.exception(f"Failed to reload model {model_uri or config.get_model_uri}: {e}")
+        app.state.last_reload_error = str(e)
+
+
+def _publish_worker_state(reloading: bool = False) -> None:
+    reload_coordinator.publish_worker_state({
+        "generation": app.state.reload_generation,
+        "model_uri": model.model_uri or config.get_model_uri,
+        "ready": model.is_ready,
+        "reloading": reloading,
+        "last_reload_error": getattr(app.state, "last_reload_error", None),
+    })
+
+
+async def _watch_reloads() -> None:
+    """Switch this worker to every reload requested through any worker of the pod"""
+    while True:
+        try:
+            warmup_task = getattr(app.state, "warmup_task", None)
+            # A reload applied during the startup load would be overwritten by it
+            if warmup_task is None or warmup_task.done():
+                request = reload_coordinator.current_request()
+                if request is not None and request["generation"] > app.state.reload_generation:
+                    _publish_worker_state(reloading=True)
+                    await _swap_model(request["model_uri"])
+                    app.state.reload_generation = request["generation"]
+            _publish_worker_state()
+        except Exception as e:
+            logger.exception(f"Failed to check for model reloads: {e}")
+        await asyncio.sleep(config.get_model_reload_poll_seconds)
+
+
+@app.on_event("startup")
+async def startup():
+    """Load and warm up the model in the background so /healthcheck stays responsive"""
+    # A worker started after a reload, e.g. a restarted one, serves the reloaded model
+    request = reload_coordinator.current_request()
+    app.state.reload_generation = 0
+    if request is not None:
+        model.model_uri = request["model_uri"]
+        app.state.reload_generation = request["generation"]
+
+    if config.get_model_warmup_enabled:
+        app.state.warmup_task = asyncio.create_task(_load_and_warmup_model())
+    else:
+        model.is_ready = True
+    app.state.reload_watcher = asyncio.create_task(_watch_reloads())
+
+
+@app.middleware("http")
+async def track_prediction_requests(request: Request, call_next):
+    """Record end to end latency and in-flight count of prediction requests"""
+    endpoint = next(
+        (path for path in PREDICTION_ENDPOINTS if request.url.path.endswith(path)), None
+    )
+    if endpoint is None:
+        return await call_next(request)
+
+    with REQUEST_LATENCY.labels(endpoint=endpoint).time(), \
+            IN_FLIGHT_REQUESTS.labels(endpoint=endpoint).track_inprogress():
+        return await call_next(request)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    """Release the inference pool and outbound HTTP sessions"""
+    app.state.reload_watcher.cancel()
+    reload_coordinator.remove_worker_state()
+    inference_executor.shutdown()
+    await api_client.close()
 
 
 @app.get("/healthcheck")
 async def healthcheck():
-    """Health check endpoint to verify service is running"""
+    """Health check endpoint to verify service is running, fails once the startup model load gave up"""
+    model_load_error = getattr(app.state, "model_load_error", None)
+    if model_load_error is not None:
+        return JSONResponse(
+            status_code=503, content={"status": "unhealthy", "error": model_load_error}
+        )
     return {"status": "healthy"}
 
 
+@app.get("/readiness")
+async def readiness():
+    """Readiness endpoint, not ready until the model is loaded and warmed up"""
+    if not model.is_ready:
+        return JSONResponse(status_code=503, content={"status": "not_ready"})
+    return {"status": "ready"}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: per-stage latency histograms, in-flight and queue depth gauges"""
+    return Response(content=render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+@app.get("/feature-cache/stats")
+async def feature_cache_stats():
+    """Hit and miss counts of the feature value cache, per feature group"""
+    return feature_store_client.feature_value_cache_stats()
+
+
+def _reload_in_progress(request: Optional[Dict[str, Any]], workers: List[Dict[str, Any]]) -> bool:
+    generation = request["generation"] if request is not None else 0
+    return any(worker["reloading"] or worker["generation"] < generation for worker in workers)
+
+
+@app.get("/model/status")
+async def model_status():
+    """Report the model requested for the pod and the state of every worker switching to it"""
+    request = reload_coordinator.current_request()
+    workers = reload_coordinator.worker_states()
+    errors = [worker["last_reload_error"] for worker in workers if worker["last_reload_error"]]
+    return {
+        "model_uri": (request["model_uri"] if request is not None else None) or config.get_model_uri,
+        "generation": request["generation"] if request is not None else 0,
+        "ready": bool(workers) and all(worker["ready"] for worker in workers),
+        "reloading": _reload_in_progress(request, workers),
+        "last_reload_error": errors[0] if errors else None,
+        "workers": workers,
+    }
+
+
+@app.post("/model/reload", status_code=202)
+async def reload_model(request: ReloadModelRequest):
+    """
+    Load a model version in the background and switch to it once it is warmed up.
+
+    The current model keeps serving until the switch, and requests in flight finish
+    on it, so a version rollout needs no redeploy. The reload is shared with every
+    uvicorn worker of the pod, each one switches within MODEL_RELOAD_POLL_SECONDS once
+    it loaded and warmed up the new version. Progress of all workers is reported by
+    /model/status.
+
+    Raises:
+        HTTPException: With status 409 if a reload is already in progress
+    """
+    if _reload_in_progress(reload_coordinator.current_request(), reload_coordinator.worker_states()):
+        raise HTTPException(status_code=409, detail="A model reload is already in progress")
+
+    generation = reload_coordinator.request_reload(request.model_uri)
+    return {
+        "status": "reloading",
+        "model_uri": request.model_uri or config.get_model_uri,
+        "generation": generation,
+    }
+
+
 @app.post("/predict", response_model=Dict[str, Any])
 async def predict(request: PredictRequest):
     """
@@ -122,9 +441,14 @@ async def predict(request: PredictRequest):
     - System fetches features from feature store
     - Steps:
       1. Fetches feature group metadata to get all available columns
+         (cached per feature group and version, refreshed in the background)
       2. Determines which features need to be fetched (excludes the primary keys provided)
       3. Fetches the features from the feature store using the provided primary keys
       4. Makes a prediction using the model
+    - When ofs_keys is a list, all keys are fetched in one read-features call and
+      scored in one model invocation. The response then holds "scores" and "keys"
+      for the resolved keys, in matching order, plus "failed_keys" for keys the
+      feature store could not resolve
     
     **Mode 2 - Direct Features Mode:**
     - Provide features dictionary directly
@@ -142,33 +466,15 @@ async def predict(request: PredictRequest):
         Dictionary containing the prediction result
         
     Raises:
-        HTTPException: If prediction fails or validation errors occur
+        HTTPException: If prediction fails or validation errors occur,
+                       or with status 503 when the inference pool is saturated
     """
     try:
-        # Mode 2: Direct Features Mode (bypass OFS)
-        if request.features is not None:
-            feature_dict = request.features
-        
-        # Mode 1: Feature Store (OFS) Mode
-        else:
-            # Fetch feature group metadata to get all columns
-            fg_columns = await feature_store_client.fetch_feature_meta_data(
-                feature_group_name=request.feature_group
-            )
+        # Mode 1 with a list of ofs_keys: one feature fetch and one model call for all keys
+        if isinstance(request.ofs_keys, list):
+            return await _predict_multi_key(request)
 
-            # Calculate which features need to be fetched (exclude primary keys)
-            feature_columns = list(set(fg_columns) - request.ofs_keys.keys())
-
-            # Fetch features from feature store
-            features: Dict = await feature_store_client.fetch_feature_group_data(
-                feature_group_name=request.feature_group,
-                feature_columns=feature_columns,
-                primary_key_names=list(request.ofs_keys.keys()),
-                primary_key_values=[list(request.ofs_keys.values())],
-            )
-
-            # Combine fetched features with provided keys
-            feature_dict = dict(zip(feature_columns, features))
+        feature_dict = await _resolve_features(request)
 
         # Make prediction (same for both modes)
         result = await model.predict(feature_dict)
@@ -181,9 +487,63 @@ async def predict(request: PredictRequest):
             status_code=422,
             detail=str(e)
         )
+    except InferenceQueueFullError as e:
+        # Inference pool saturated, ask the client to retry later
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
     except Exception as e:
         # Other errors
         raise HTTPException(
             status_code=500,
             detail=f"Prediction failed: {str(e)}"
         )
+
+
+@app.post("/predict/batch", response_model=Dict[str, Any])
+async def predict_batch(request: BatchPredictRequest):
+    """
+    Make predictions for many inputs with a single model invocation.
+
+    Features for every input are resolved concurrently (OFS lookups or direct
+    features), then all rows are scored together so vectorised models can
+    amortise the per-call overhead.
+
+    Args:
+        request: BatchPredictRequest containing a list of PredictRequest inputs
+
+    Returns:
+        Dictionary containing one score per input, in input order
+
+    Raises:
+        HTTPException: If prediction fails or validation errors occur,
+                       or with status 503 when the inference pool is saturated
+    """
+    try:
+        rows = await asyncio.gather(
+            *(_resolve_features(item) for item in request.inputs)
+        )
+
+        return await model.predict_batch(list(rows))
+
+    except ValueError as e:
+        # Validation errors
+        raise HTTPException(
+            status_code=422,
+            detail=str(e)
+        )
+    except InferenceQueueFullError as e:
+        # Inference pool saturated, ask the client to retry later
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except Exception as e:
+        # Other errors
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch prediction failed: {str(e)}"
+        )
@@ -0,0 +1,95 @@
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Fine grained buckets so sub-millisecond stages such as cache lookups stay visible
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+STAGE_SCHEMA_FETCH = "schema_fetch"
+STAGE_FEATURE_FETCH = "feature_fetch"
+STAGE_DATAFRAME_BUILD = "dataframe_build"
+STAGE_MODEL_INFERENCE = "model_inference"
+STAGE_SERIALIZATION = "serialization"
+
+REQUEST_LATENCY = Histogram(
+    "serve_request_latency_seconds",
+    "End to end latency of prediction requests",
+    ["endpoint"],
+    buckets=LATENCY_BUCKETS,
+)
+STAGE_LATENCY = Histogram(
+    "serve_stage_latency_seconds",
+    "Latency of each stage of a prediction request",
+    ["stage"],
+    buckets=LATENCY_BUCKETS,
+)
+MICRO_BATCH_SIZE = Histogram(
+    "serve_micro_batch_size",
+    "Number of rows scored per micro-batch",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512),
+)
+IN_FLIGHT_REQUESTS = Gauge(
+    "serve_in_flight_requests",
+    "Prediction requests currently being handled",
+    ["endpoint"],
+    multiprocess_mode="livesum",
+)
+INFERENCE_IN_FLIGHT = Gauge(
+    "serve_inference_in_flight",
+    "Model predictions running or waiting in the inference pool",
+    multiprocess_mode="livesum",
+)
+INFERENCE_QUEUE_DEPTH = Gauge(
+    "serve_inference_queue_depth",
+    "Model predictions waiting for a free inference worker",
+    multiprocess_mode="livesum",
+)
+INFERENCE_REJECTED = Counter(
+    "serve_inference_rejected_total",
+    "Model predictions rejected because the inference pool was saturated",
+)
+FEATURE_VALUE_CACHE_REQUESTS = Counter(
+    "serve_feature_value_cache_requests_total",
+    "Feature value cache lookups by result",
+    ["feature_group", "result"],
+)
+
+
+@contextmanager
+def track_stage(stage: str):
+    """Record the time spent in a block under the given stage label"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+def render_metrics() -> bytes:
+    """
+    Render all metrics in the Prometheus text format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set, metrics of every uvicorn worker process are
+    aggregated, so a scrape does not depend on which worker answers it.
+    """
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+METRICS_CONTENT_TYPE = CONTENT_TYPE_LATEST
@@ -0,0 +1,125 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any
+
+from loguru import logger
+
+from src.config.constants import MAX_QUEUE_SIZE, MAX_WORKERS
+from src.metrics import INFERENCE_IN_FLIGHT, INFERENCE_QUEUE_DEPTH, INFERENCE_REJECTED
+
+EXECUTOR_TYPE_THREAD = "thread"
+EXECUTOR_TYPE_PROCESS = "process"
+
+# Model instance owned by a process pool worker, set once by the pool initializer
+_worker_model: Any = None
+
+
+def _init_worker_model(model: Any) -> None:
+    global _worker_model
+    _worker_model = model
+
+
+def _predict_in_worker(input_data: Any) -> Any:
+    return _worker_model.predict(input_data)
+
+
+class InferenceQueueFullError(Exception):
+    """Raised when the inference pool and its queue are both saturated"""
+
+
+class InferenceExecutor:
+    """
+    Runs the synchronous model.predict off the event loop on a thread or process pool.
+
+    At most ``max_workers`` predictions run at once and up to ``max_queue_size`` more
+    may wait for a worker. Any request beyond that is rejected immediately with
+    InferenceQueueFullError so callers can shed load instead of queueing unboundedly.
+    """
+
+    def __init__(
+        self,
+        executor_type: str = EXECUTOR_TYPE_THREAD,
+        max_workers: int = MAX_WORKERS,
+        max_queue_size: int = MAX_QUEUE_SIZE,
+    ):
+        if executor_type not in (EXECUTOR_TYPE_THREAD, EXECUTOR_TYPE_PROCESS):
+            raise ValueError(
+                f"Unsupported inference executor type '{executor_type}', "
+                f"expected '{EXECUTOR_TYPE_THREAD}' or '{EXECUTOR_TYPE_PROCESS}'"
+            )
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+
+        self.executor_type = executor_type
+        self.max_workers = max_workers
+        self.max_queue_size = max(max_queue_size, 0)
+        self._in_flight = 0
+        self._executor: Executor | None = None
+        self._executor_model: Any = None
+
+    @property
+    def in_flight(self) -> int:
+        """Number of predictions currently running or waiting for a worker"""
+        return self._in_flight
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of predictions waiting for a free worker"""
+        return max(self._in_flight - self.max_workers, 0)
+
+    async def predict(self, model: Any, input_data: Any) -> Any:
+        if self._in_flight >= self.max_workers + self.max_queue_size:
+            INFERENCE_REJECTED.inc()
+            raise InferenceQueueFullError(
+                f"Inference pool saturated: {self._in_flight} predictions in flight"
+            )
+
+        self._in_flight += 1
+        self._update_gauges()
+        try:
+            loop = asyncio.get_running_loop()
+            if self.executor_type == EXECUTOR_TYPE_THREAD:
+                return await loop.run_in_executor(
+                    self._get_executor(model), model.predict, input_data
+                )
+            return await loop.run_in_executor(
+                self._get_executor(model), _predict_in_worker, input_data
+            )
+        finally:
+            self._in_flight -= 1
+            self._update_gauges()
+
+    def _update_gauges(self) -> None:
+        INFERENCE_IN_FLIGHT.set(self._in_flight)
+        INFERENCE_QUEUE_DEPTH.set(self.queue_depth)
+
+    def _get_executor(self, model: Any) -> Executor:
+        if self.executor_type == EXECUTOR_TYPE_THREAD:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+            return self._executor
+
+        # Process workers hold their own copy of the model, so the pool is rebuilt
+        # whenever the model instance changes. Forking hands the already loaded model
+        # to each worker without pickling it.
+        if self._executor is None or self._executor_model is not model:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            logger.info(f"Starting inference process pool with {self.max_workers} workers")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_worker_model,
+                initargs=(model,),
+            )
+            self._executor_model = model
+        return self._executor
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self._executor_model = None
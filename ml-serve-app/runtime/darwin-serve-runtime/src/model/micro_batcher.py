@@ -0,0 +1,109 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple, Type
+
+from loguru import logger
+
+from src.metrics import MICRO_BATCH_SIZE
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-row predictions for a short window and scores them
+    together with one call to the batch handler.
+
+    Rows are only batched with rows of the same ``key``, e.g. the same feature names,
+    so rows of different shapes never end up in one model input. A batch is flushed
+    when it reaches ``max_batch_size`` rows or when ``max_wait_ms`` has elapsed since
+    its first row arrived, whichever happens first. Results are scattered back to the
+    callers in submission order.
+
+    A batch of a single row, and every row of a batch the handler failed on, is
+    scored on its own by the ``fallback`` handler, so a bad row only fails its own
+    caller. Errors of ``fail_fast_errors``, e.g. a saturated inference pool or a
+    timeout, are not about the rows: they fail every caller of the batch right away
+    instead of retrying each row, so the batch sheds load like a single request would.
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        fallback: Callable[[Any], Awaitable[Any]],
+        max_batch_size: int,
+        max_wait_ms: float,
+        fail_fast_errors: Tuple[Type[BaseException], ...] = (),
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self._handler = handler
+        self._fallback = fallback
+        self._max_batch_size = max_batch_size
+        self._max_wait_s = max(max_wait_ms, 0.0) / 1000.0
+        self._fail_fast_errors = fail_fast_errors
+        self._pending: Dict[Hashable, List[Tuple[Any, asyncio.Future]]] = {}
+        self._flush_handles: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._running: Set[asyncio.Task] = set()
+
+    async def submit(self, item: Any, key: Hashable = None) -> Any:
+        """Queue a single row and wait for its result from the next batch of its key."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(key, [])
+        pending.append((item, future))
+
+        if len(pending) >= self._max_batch_size:
+            self._flush(key)
+        elif key not in self._flush_handles:
+            self._flush_handles[key] = loop.call_later(self._max_wait_s, self._flush, key)
+
+        return await future
+
+    def _flush(self, key: Hashable) -> None:
+        flush_handle = self._flush_handles.pop(key, None)
+        if flush_handle is not None:
+            flush_handle.cancel()
+
+        batch = self._pending.pop(key, [])
+        if not batch:
+            return
+
+        task = asyncio.ensure_future(self._run_batch(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, batch: List[Tuple[Any, asyncio.Future]]) -> None:
+        items = [item for item, _ in batch]
+        MICRO_BATCH_SIZE.observe(len(items))
+        if len(items) == 1:
+            await self._run_single(*batch[0])
+            return
+
+        try:
+            results = await self._handler(items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Model returned {len(results)} predictions for a batch of {len(items)} rows"
+                )
+        except self._fail_fast_errors as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            logger.warning(f"Micro-batch of {len(items)} rows failed, scoring them one by one: {e}")
+            await asyncio.gather(*(self._run_single(item, future) for item, future in batch))
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_single(self, item: Any, future: asyncio.Future) -> None:
+        try:
+            result = await self._fallback(item)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(result)
@@ -1,20 +1,169 @@
-from typing import Any
+import asyncio
+from typing import Any, Dict, List
+
+import pandas as pd
+from loguru import logger
+
+from src.metrics import (
+    STAGE_DATAFRAME_BUILD,
+    STAGE_MODEL_INFERENCE,
+    STAGE_SERIALIZATION,
+    track_stage,
+)
+from .inference_executor import InferenceExecutor, InferenceQueueFullError
+from .micro_batcher import MicroBatcher
+from .warmup import synthetic_payload
 from .model_loader.model_loader_interface import ModelLoaderInterface
 
 
 class Model:
-    def __init__(self, model_loader: ModelLoaderInterface):
+    def __init__(
+        self,
+        model_loader: ModelLoaderInterface,
+        micro_batching_enabled: bool = False,
+        micro_batch_max_size: int = 64,
+        micro_batch_max_wait_ms: float = 5.0,
+        inference_executor: InferenceExecutor | None = None,
+    ):
         self._model_loader: ModelLoaderInterface = model_loader
         self.model: Any | None = None
+        self._executor: InferenceExecutor = inference_executor or InferenceExecutor()
+        self._load_lock = asyncio.Lock()
+        self._swap_lock = asyncio.Lock()
+        self.is_ready: bool = False
+        # URI of a model switched to at runtime, None while serving the configured model
+        self.model_uri: str | None = None
+        self._warmup_payloads: List[Dict[str, Any]] = []
+        self._warmup_iterations: int = 1
+        self._micro_batcher: MicroBatcher | None = None
+        if micro_batching_enabled:
+            self._micro_batcher = MicroBatcher(
+                handler=self._predict_micro_batch,
+                fallback=self.inference,
+                max_batch_size=micro_batch_max_size,
+                max_wait_ms=micro_batch_max_wait_ms,
+                # Overload is answered with 503 for the whole batch, retrying each row would only add load
+                fail_fast_errors=(InferenceQueueFullError, asyncio.TimeoutError, TimeoutError),
+            )
 
-    def _ensure_model_loaded(self) -> None:
+    async def load(self) -> None:
+        """Load the model off the event loop; concurrent callers share a single load"""
+        async with self._load_lock:
+            if self.model is None:
+                loop = asyncio.get_running_loop()
+                # A model switched to at runtime is loaded again, e.g. by a restarted worker
+                self.model = await loop.run_in_executor(
+                    None, self._model_loader.load_model, self.model_uri
+                )
+
+    async def _ensure_model_loaded(self) -> None:
         if self.model is None:
-            self.model = self._model_loader.load_model()
+            await self.load()
+
+    def _payloads_for(self, model: Any) -> List[Dict[str, Any]]:
+        # Recorded payloads when configured, otherwise one synthetic row from the signature
+        if self._warmup_payloads:
+            return self._warmup_payloads
+        payload = synthetic_payload(model)
+        return [payload] if payload is not None else []
+
+    async def warmup(self, payloads: List[Dict[str, Any]], iterations: int = 1) -> None:
+        """
+        Load the model and run warmup payloads through inference, then mark it ready.
+
+        When no payloads are given, a synthetic row is built from the model signature.
+        Warmup failures are logged and do not keep the model from becoming ready.
+        """
+        self._warmup_payloads = payloads
+        self._warmup_iterations = iterations
+        await self._ensure_model_loaded()
+
+        payloads = self._payloads_for(self.model)
+        try:
+            for _ in range(iterations):
+                for payload in payloads:
+                    await self.inference(payload)
+            logger.info(f"Model warmed up with {len(payloads)} payloads x {iterations} iterations")
+        except Exception as e:
+            logger.exception(f"Model warmup failed: {e}")
+
+        self.is_ready = True
+
+    async def swap(self, model_uri: str | None = None) -> None:
+        """
+        Load a model next to the one serving traffic, warm it up and switch to it.
+
+        The new instance is loaded and warmed in a background thread while the current one
+        keeps serving. The switch is a single reference assignment, so requests already in
+        flight finish on the instance they started with and new requests use the new one.
+        If loading or warmup fails, the current model stays in place and the error is raised.
+        """
+        async with self._swap_lock:
+            loop = asyncio.get_running_loop()
+            new_model = await loop.run_in_executor(
+                None, self._model_loader.reload_model, model_uri
+            )
+
+            payloads = self._payloads_for(new_model)
+            for _ in range(self._warmup_iterations):
+                for payload in payloads:
+                    await loop.run_in_executor(None, new_model.predict, payload)
+
+            self.model = new_model
+            self.model_uri = model_uri
+            self.is_ready = True
+            logger.info(f"Switched to model {model_uri or 'from configuration'}")
 
     async def predict(self, input_data: Any) -> Any:
-        self._ensure_model_loaded()
+        await self._ensure_model_loaded()
+        # Single-row feature dicts are merged with concurrent requests of the same feature names when
+        # micro-batching is on, a request scored alone is passed to the model as is
+        if self._micro_batcher is not None and isinstance(input_data, dict):
+            return await self._micro_batcher.submit(input_data, key=tuple(sorted(input_data)))
         return await self.inference(input_data)
 
+    async def predict_batch(self, rows: List[Dict[str, Any]]) -> dict:
+        """
+        Score many feature rows with a single model invocation.
+
+        Args:
+          rows: list of feature dictionaries, one per row.
+
+        Returns:
+          {
+            "scores": List[Any]  # one prediction per input row, in input order
+          }
+        """
+        await self._ensure_model_loaded()
+        return {"scores": await self._predict_rows(rows)}
+
+    async def _predict_micro_batch(self, rows: List[Dict[str, Any]]) -> List[dict]:
+        # One response per request, shaped like the response of a single row prediction
+        return [{"scores": [score]} for score in await self._predict_rows(rows)]
+
+    async def _predict_rows(self, rows: List[Dict[str, Any]]) -> List[Any]:
+        with track_stage(STAGE_DATAFRAME_BUILD):
+            input_data = pd.DataFrame(rows)
+        with track_stage(STAGE_MODEL_INFERENCE):
+            prediction = await self._executor.predict(self.model, input_data)
+        with track_stage(STAGE_SERIALIZATION):
+            scores = self._to_serializable(prediction)
+        if isinstance(scores, list) and len(scores) == len(rows):
+            return scores
+        raise RuntimeError(
+            f"Model returned a prediction that cannot be split into {len(rows)} rows"
+        )
+
+    @staticmethod
+    def _to_serializable(prediction: Any) -> Any:
+        # DataFrame outputs become one record per row; arrays and Series become lists
+        if isinstance(prediction, pd.DataFrame):
+            return prediction.to_dict(orient="records")
+        try:
+            return prediction.tolist()
+        except AttributeError:
+            return prediction
+
     async def inference(
         self,
         input_data: Any,
@@ -35,15 +184,13 @@ class Model:
             "top_k_indices": Optional[List[int]]  # first top_k of global_order
           }
         """
-        self._ensure_model_loaded()
-        prediction = self.model.predict(input_data)
+        await self._ensure_model_loaded()
+        with track_stage(STAGE_MODEL_INFERENCE):
+            prediction = await self._executor.predict(self.model, input_data)
         # Ensure JSON-serializable response
-        try:
-            scores = prediction.tolist()
-        except AttributeError:
-            scores = prediction
+        with track_stage(STAGE_SERIALIZATION):
+            try:
+                scores = prediction.tolist()
+            except AttributeError:
+                scores = prediction
         return {"scores": scores}
-
-
-
-
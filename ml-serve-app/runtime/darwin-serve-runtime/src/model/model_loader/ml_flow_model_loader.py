@@ -1,6 +1,9 @@
 import os
+from typing import Optional
+
 import mlflow
 
+from .model_cache import ModelArtifactCache
 from .model_loader_interface import ModelLoaderInterface
 from src.config.config import Config
 
@@ -20,12 +23,20 @@ class MLFlowModelLoader(ModelLoaderInterface):
         if self.config.get_mlflow_tracking_uri:
             mlflow.set_tracking_uri(uri=self.config.get_mlflow_tracking_uri)
 
-    def load_model(self):
-        # Load the MLflow model from the specified URI
-        model = self.mlflow.pyfunc.load_model(model_uri=self.config.get_model_uri)
-        return model
+        self.artifact_cache = None
+        if self.config.get_model_cache_enabled:
+            self.artifact_cache = ModelArtifactCache(cache_dir=self.config.get_model_cache_dir)
+
+    def load_model(self, model_uri: Optional[str] = None):
+        # Load the MLflow model from the given URI, defaulting to the configured one
+        model_uri = model_uri or self.config.get_model_uri
+        if self.artifact_cache is None:
+            return self.mlflow.pyfunc.load_model(model_uri=model_uri)
+        # Served from the local artifact cache, downloading only on a miss. The entry
+        # stays locked against pruning by other replicas until the model is loaded
+        with self.artifact_cache.local_path(model_uri) as local_path:
+            return self.mlflow.pyfunc.load_model(model_uri=local_path)
 
-    def reload_model(self):
-        # Reload the MLflow model from the specified URI
-        model = self.mlflow.pyfunc.load_model(model_uri=self.config.get_model_uri)
-        return model
+    def reload_model(self, model_uri: Optional[str] = None):
+        # Load a fresh instance, e.g. a new version, without touching the one in use
+        return self.load_model(model_uri)
@@ -0,0 +1,201 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+import mlflow
+from loguru import logger
+from mlflow.store.artifact.artifact_repository_registry import get_artifact_repository
+
+MLMODEL_FILE = "MLmodel"
+COMPLETE_MARKER = ".complete"
+CHUNK_SIZE = 1024 * 1024
+
+
+class ModelArtifactCache:
+    """
+    Local content-addressed cache of downloaded MLflow model artifacts.
+
+    Entries live under ``<cache_dir>/<sha256(model_uri)>/<version key>``. The version key
+    hashes the remote artifact listing (every file path and size) together with the MLmodel
+    file, so a changed artifact of the same URI gets a new entry without downloading the
+    model. A downloaded entry records the sha256 of its whole file tree in a marker written
+    once the download completed, and is verified against it before every load, so a partial
+    or altered entry is downloaded again instead of being served.
+
+    Entries are published with an atomic rename and read under a shared lock. Older
+    versions of the same URI are pruned only when no process holds their lock, so a
+    replica sharing the cache volume never has a version removed while it loads it.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @contextmanager
+    def local_path(self, model_uri: str) -> Iterator[str]:
+        """Yield a verified local copy of the model artifacts, locked against pruning"""
+        uri_dir = os.path.join(self.cache_dir, self._sha256(model_uri.encode()))
+        os.makedirs(uri_dir, exist_ok=True)
+
+        version_error = None
+        try:
+            version_key = self._fetch_version_key(model_uri, uri_dir)
+        except Exception as e:
+            version_key, version_error = None, e
+
+        if version_key is None:
+            with self._latest_entry(uri_dir) as cached_path:
+                if cached_path is None:
+                    raise version_error
+                logger.warning(
+                    f"Unable to verify version of {model_uri}, using cached artifacts at {cached_path}: {version_error}"
+                )
+                yield cached_path
+            return
+
+        entry_path = os.path.join(uri_dir, version_key)
+        with self._shared_lock(entry_path):
+            if self._is_valid(entry_path):
+                logger.info(f"Loading model {model_uri} from local cache {entry_path}")
+            else:
+                self._discard(entry_path)
+                logger.info(f"Downloading model {model_uri} into local cache {entry_path}")
+                self._download(model_uri, uri_dir, entry_path)
+                self._prune(uri_dir, keep=version_key)
+            yield entry_path
+
+    def _fetch_version_key(self, model_uri: str, uri_dir: str) -> str:
+        repository = get_artifact_repository(model_uri)
+        listing: List[Tuple[str, Optional[int]]] = []
+        pending = [None]
+        while pending:
+            for file_info in repository.list_artifacts(pending.pop()):
+                if file_info.is_dir:
+                    pending.append(file_info.path)
+                else:
+                    listing.append((file_info.path, file_info.file_size))
+
+        with tempfile.TemporaryDirectory(dir=uri_dir, prefix=".mlmodel-") as tmp_dir:
+            mlmodel_path = repository.download_artifacts(artifact_path=MLMODEL_FILE, dst_path=tmp_dir)
+            with open(mlmodel_path, "rb") as f:
+                mlmodel = f.read()
+        return self._sha256(json.dumps(sorted(listing)).encode() + mlmodel)
+
+    def _download(self, model_uri: str, uri_dir: str, entry_path: str) -> None:
+        tmp_dir = tempfile.mkdtemp(dir=uri_dir, prefix=".download-")
+        try:
+            local_path = mlflow.artifacts.download_artifacts(
+                artifact_uri=model_uri, dst_path=tmp_dir
+            )
+            # Written last, an entry without a matching marker is never served
+            with open(os.path.join(local_path, COMPLETE_MARKER), "w") as f:
+                f.write(self._tree_digest(local_path))
+            try:
+                os.rename(local_path, entry_path)
+            except OSError:
+                # Another process published the same entry first
+                if not self._is_valid(entry_path):
+                    raise
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def _prune(self, uri_dir: str, keep: str) -> None:
+        """Remove cached versions of the same model URI other than the current one, unless in use"""
+        for name in os.listdir(uri_dir):
+            if name == keep or name.startswith("."):
+                continue
+            entry_path = os.path.join(uri_dir, name)
+            with self._exclusive_lock(entry_path) as acquired:
+                if acquired:
+                    shutil.rmtree(entry_path, ignore_errors=True)
+                else:
+                    logger.info(f"Keeping cached model {entry_path}, another process is loading it")
+
+    @contextmanager
+    def _latest_entry(self, uri_dir: str) -> Iterator[Optional[str]]:
+        entries = [
+            os.path.join(uri_dir, name)
+            for name in os.listdir(uri_dir)
+            if not name.startswith(".")
+        ]
+        for entry_path in sorted(entries, key=os.path.getmtime, reverse=True):
+            with self._shared_lock(entry_path):
+                if self._is_valid(entry_path):
+                    yield entry_path
+                    return
+        yield None
+
+    def _discard(self, entry_path: str) -> None:
+        # Moved aside first so no other process ever sees a partly removed entry
+        if not os.path.exists(entry_path):
+            return
+        discarded = tempfile.mkdtemp(dir=os.path.dirname(entry_path), prefix=".discarded-")
+        try:
+            os.rename(entry_path, os.path.join(discarded, "entry"))
+        except OSError:
+            pass
+        shutil.rmtree(discarded, ignore_errors=True)
+
+    @staticmethod
+    def _lock_path(entry_path: str) -> str:
+        return os.path.join(os.path.dirname(entry_path), f".{os.path.basename(entry_path)}.lock")
+
+    @contextmanager
+    def _shared_lock(self, entry_path: str) -> Iterator[None]:
+        with open(self._lock_path(entry_path), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @contextmanager
+    def _exclusive_lock(self, entry_path: str) -> Iterator[bool]:
+        with open(self._lock_path(entry_path), "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _is_valid(self, entry_path: str) -> bool:
+        marker_path = os.path.join(entry_path, COMPLETE_MARKER)
+        if not os.path.isfile(marker_path):
+            return False
+        with open(marker_path) as f:
+            expected = f.read().strip()
+        actual = self._tree_digest(entry_path)
+        if actual != expected:
+            logger.warning(f"Cached model {entry_path} does not match its recorded checksum")
+            return False
+        return True
+
+    @staticmethod
+    def _tree_digest(root: str) -> str:
+        """sha256 over the relative path and content of every file under root, but the marker"""
+        digest = hashlib.sha256()
+        for dir_path, dir_names, file_names in os.walk(root):
+            dir_names.sort()
+            for file_name in sorted(file_names):
+                path = os.path.join(dir_path, file_name)
+                relative_path = os.path.relpath(path, root)
+                if relative_path == COMPLETE_MARKER:
+                    continue
+                digest.update(relative_path.encode() + b"\0")
+                with open(path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        digest.update(chunk)
+                digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def _sha256(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
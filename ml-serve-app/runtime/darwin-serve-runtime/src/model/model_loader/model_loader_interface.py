@@ -1,12 +1,13 @@
 from abc import ABC
+from typing import Optional
 
 
 class ModelLoaderInterface(ABC):
     def __init__(self):
         pass
 
-    def load_model(self):
+    def load_model(self, model_uri: Optional[str] = None):
         pass
 
-    def reload_model(self):
+    def reload_model(self, model_uri: Optional[str] = None):
         pass
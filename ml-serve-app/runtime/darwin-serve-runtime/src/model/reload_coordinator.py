@@ -0,0 +1,97 @@
+import fcntl
+import json
+import os
+import tempfile
+from typing import Any, Dict, List, Optional
+
+REQUEST_FILE = "request.json"
+LOCK_FILE = ".lock"
+WORKER_FILE_PREFIX = "worker-"
+
+
+class ReloadCoordinator:
+    """
+    Shares model reloads between the uvicorn worker processes of a pod through files.
+
+    A reload received by any worker is recorded in ``<state_dir>/request.json`` under
+    a new generation number. Every worker polls that file, switches to the requested
+    model once it sees a newer generation and publishes its own state in
+    ``<state_dir>/worker-<pid>.json``, so the status of a reload covers all workers
+    and not only the one answering the request.
+    """
+
+    def __init__(self, state_dir: str):
+        self.state_dir = state_dir
+        os.makedirs(state_dir, exist_ok=True)
+
+    def request_reload(self, model_uri: Optional[str]) -> int:
+        """Record a reload to model_uri (None for the configured model), returns its generation"""
+        with open(os.path.join(self.state_dir, LOCK_FILE), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                current = self.current_request()
+                generation = (current["generation"] if current else 0) + 1
+                self._write(REQUEST_FILE, {"generation": generation, "model_uri": model_uri})
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+        return generation
+
+    def current_request(self) -> Optional[Dict[str, Any]]:
+        """The latest reload requested, None when the configured model was never reloaded"""
+        return self._read(REQUEST_FILE)
+
+    def publish_worker_state(self, state: Dict[str, Any]) -> None:
+        self._write(f"{WORKER_FILE_PREFIX}{os.getpid()}.json", {**state, "pid": os.getpid()})
+
+    def remove_worker_state(self) -> None:
+        try:
+            os.remove(os.path.join(self.state_dir, f"{WORKER_FILE_PREFIX}{os.getpid()}.json"))
+        except FileNotFoundError:
+            pass
+
+    def worker_states(self) -> List[Dict[str, Any]]:
+        """States published by the live workers, the ones of exited workers are removed"""
+        states = []
+        for name in sorted(os.listdir(self.state_dir)):
+            if not name.startswith(WORKER_FILE_PREFIX):
+                continue
+            state = self._read(name)
+            if state is None:
+                continue
+            if not self._is_alive(state["pid"]):
+                try:
+                    os.remove(os.path.join(self.state_dir, name))
+                except FileNotFoundError:
+                    pass
+                continue
+            states.append(state)
+        return states
+
+    @staticmethod
+    def _is_alive(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            pass
+        return True
+
+    def _read(self, name: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.state_dir, name)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, name: str, content: Dict[str, Any]) -> None:
+        # Written next to the target and renamed over it, readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.state_dir, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(content, f)
+            os.replace(tmp_path, os.path.join(self.state_dir, name))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
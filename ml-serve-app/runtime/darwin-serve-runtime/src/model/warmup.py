@@ -0,0 +1,55 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+# Placeholder values used to build a synthetic warmup row from the model signature
+_SYNTHETIC_VALUES = {
+    "boolean": False,
+    "integer": 0,
+    "long": 0,
+    "float": 0.0,
+    "double": 0.0,
+    "string": "",
+    "binary": b"",
+}
+
+
+def load_warmup_payloads(path: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Read recorded warmup payloads from a JSON file.
+
+    The file holds either a list of feature dictionaries or a single feature dictionary,
+    in the same shape as the "features" field of a direct-features /predict request.
+    """
+    if not path:
+        return []
+
+    with open(path, "r") as f:
+        payloads = json.load(f)
+
+    if isinstance(payloads, dict):
+        payloads = [payloads]
+    if not isinstance(payloads, list) or not all(isinstance(p, dict) for p in payloads):
+        raise ValueError(f"Warmup payloads in {path} must be a feature dictionary or a list of them")
+    return payloads
+
+
+def synthetic_payload(model: Any) -> Optional[Dict[str, Any]]:
+    """Build one placeholder feature row from the model input signature, if it has one"""
+    try:
+        schema = model.metadata.get_input_schema()
+    except AttributeError:
+        return None
+
+    if schema is None or not schema.has_input_names():
+        return None
+
+    payload = {}
+    for column in schema.inputs:
+        type_name = getattr(column.type, "name", None)
+        if type_name not in _SYNTHETIC_VALUES:
+            logger.info(f"Skipping synthetic warmup, unsupported type for column {column.name}")
+            return None
+        payload[column.name] = _SYNTHETIC_VALUES[type_name]
+    return payload